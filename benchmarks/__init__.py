@@ -0,0 +1 @@
+""" Benchmarks for the vocabulary trainer's data structures and hot paths. """
@@ -0,0 +1,53 @@
+""" Generates synthetic vocabulary decks and vocab trees in the JSON format read by the trainer. """
+
+from json import dump
+from pathlib import Path
+from random import Random
+from typing import Any, Dict, List, Optional
+
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "do", "gu", "fe", "ho", "ji", "be"]
+
+def generate_word(random: Random, markdown_density: float) -> str:
+    """ Returns a random word of two to four syllables, optionally wrapping one syllable in '*' markers. """
+
+    syllables = [random.choice(SYLLABLES) for _ in range(random.randint(2, 4))]
+    if random.random() < markdown_density:
+        i = random.randrange(len(syllables))
+        syllables[i] = f"*{syllables[i]}*"
+    return "".join(syllables)
+
+def generate_deck(entries: int, categories: int = 2, synonyms: int = 1, markdown_density: float = 0.1,
+                  seed: Optional[int] = 0) -> Dict[str, List[Any]]:
+    """ Returns a deck with the given number of entries and categories.
+    Each group holds between one and synonyms words, and markdown_density is the share of words
+    containing a '*' highlight. Entries are numbered so that they are all distinct. """
+
+    random = Random(seed)
+    languages = [f"lang{i}" for i in range(categories)]
+    vocab = [
+        [
+            [f"{generate_word(random, markdown_density)} {i}" for _ in range(random.randint(1, max(1, synonyms)))]
+            for _ in languages
+        ]
+        for i in range(entries)
+    ]
+    return {"categories": languages, "vocab": vocab}
+
+def write_deck(path: Path, deck: Dict[str, List[Any]]) -> Path:
+    """ Writes a deck to the given path, creating parent folders, and returns the path. """
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        dump(deck, f, ensure_ascii=False)
+    return path
+
+def write_vocab_tree(root: Path, folders: int, files_per_folder: int, entries_per_file: int, seed: Optional[int] = 0) -> List[Path]:
+    """ Writes folders * files_per_folder small decks under root and returns their paths. """
+
+    paths = []
+    for folder in range(folders):
+        for file in range(files_per_folder):
+            deck = generate_deck(entries_per_file, seed=None if seed is None else seed + folder * files_per_folder + file)
+            paths.append(write_deck(root / f"folder{folder:03}" / f"deck{file:03}.json", deck))
+    return paths
@@ -0,0 +1,86 @@
+""" Measures the memory used per vocabulary entry by the object model, compared with the original dict-based classes.
+
+Usage: python -m benchmarks.memory_model [--entries 500000]
+"""
+
+from argparse import ArgumentParser
+from gc import collect
+from tracemalloc import get_traced_memory, start, stop
+from typing import Any, Callable, Dict, List
+
+from benchmarks.deck_generator import generate_deck
+from core.translations_selector import generate_translation_pairs
+from core.utils import TranslationPair, VocabData
+
+
+class LegacyWord:
+    def __init__(self, text: str):
+        self.text = text
+
+class LegacyWordGroup:
+    def __init__(self, words: List[LegacyWord], categorie: str):
+        self.words = words
+        self.categorie = categorie
+
+class LegacyVocabEntry:
+    def __init__(self, groups: List[LegacyWordGroup]):
+        self.groups = groups
+
+class LegacyTranslationPair:
+    def __init__(self, prompt: LegacyWordGroup, answers: LegacyVocabEntry, attempts: int = 0, correct: bool = False):
+        self.prompt = prompt
+        self.answers = answers
+        self.attempts = attempts
+        self.correct = correct
+
+def build_legacy_model(data_json: Dict[str, List[Any]]) -> List[LegacyTranslationPair]:
+    """ Builds entries and pairs the way the original dict-based model did. """
+
+    languages = data_json["categories"]
+    entries = [
+        LegacyVocabEntry([
+            LegacyWordGroup([LegacyWord(word) for word in group], languages[i])
+            for i, group in enumerate(entry)
+        ])
+        for entry in data_json["vocab"]
+    ]
+    return [
+        LegacyTranslationPair(
+            LegacyWordGroup(entry.groups[0].words, languages[0]),
+            LegacyVocabEntry([LegacyWordGroup(entry.groups[1].words, languages[1])])
+        )
+        for entry in entries
+    ]
+
+def build_current_model(data_json: Dict[str, List[Any]]) -> List[TranslationPair]:
+    """ Builds entries and pairs with the current object model. """
+
+    vocab_data = VocabData(data_json)
+    return list(generate_translation_pairs(vocab_data, vocab_data.languages[0]))
+
+def measure_bytes(build: Callable[[], Any]) -> int:
+    """ Returns the number of bytes still allocated by the object graph returned by build. """
+
+    collect()
+    start()
+    result = build()
+    current, _ = get_traced_memory()
+    stop()
+    del result
+    return current
+
+def run(entry_count: int) -> None:
+    """ Builds both models from fresh copies of the same synthetic two-language deck and prints bytes per entry. """
+
+    legacy = measure_bytes(lambda: build_legacy_model(generate_deck(entry_count)))
+    current = measure_bytes(lambda: build_current_model(generate_deck(entry_count)))
+
+    print(f"Entries:  {entry_count}")
+    print(f"Before:   {legacy / entry_count:.1f} bytes/entry")
+    print(f"After:    {current / entry_count:.1f} bytes/entry")
+    print(f"Saved:    {100 * (1 - current / legacy):.1f}%")
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=500_000)
+    run(parser.parse_args().entries)
@@ -0,0 +1,151 @@
+""" Load-tests the quiz server with many concurrent learners and reports throughput and request latency.
+
+Each simulated learner opens a keep-alive connection, starts a session and answers until the quiz is over or its
+answer budget is spent. Answers are learned from the corrections the server sends back, so the quiz converges. Usage:
+
+    python -m core.server --port 8765 &
+    python -m benchmarks.server_load --learners 200 --deck french/colors --port 8765
+    python -m benchmarks.server_load --learners 200 --deck french/colors --start-server --json
+"""
+
+from argparse import ArgumentParser
+from asyncio import gather, open_connection, run, start_server as start_listener, StreamReader, StreamWriter
+from json import dumps, loads
+from statistics import quantiles
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.server import DEFAULT_HOST, DEFAULT_PORT, QuizServer, serve_connection
+
+
+class LoadClient:
+    """ A keep-alive HTTP/JSON connection to the server that records the latency of every request. """
+
+    def __init__(self, reader: StreamReader, writer: StreamWriter, latencies: List[float]):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = latencies
+
+    async def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Dict[str, Any]]:
+        """ Sends one request and returns the status and the decoded response. """
+
+        body = dumps(payload).encode("utf-8") if payload is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        start = perf_counter()
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        response = loads(await self.reader.readexactly(length)) if length else {}
+        self.latencies.append(perf_counter() - start)
+        return status, response
+
+    async def close(self) -> None:
+        """ Closes the connection. """
+
+        self.writer.close()
+        await self.writer.wait_closed()
+
+async def run_learner(number: int, host: str, port: int, decks: List[str], mode: Optional[str], max_answers: int,
+                      latencies: List[float]) -> Dict[str, int]:
+    """ Runs the quiz of one simulated learner and returns how many answers it gave and how many requests failed. """
+
+    reader, writer = await open_connection(host, port)
+    client = LoadClient(reader, writer, latencies)
+    known: Dict[Tuple[str, str], List[str]] = {}
+    answers = errors = 0
+
+    try:
+        status, state = await client.request("POST", "/sessions", {"learner": f"load-{number}", "decks": decks, "mode": mode, "resume": False})
+        if status != 201:
+            return {"answers": 0, "errors": 1}
+        session = state["session"]
+
+        while state["question"] is not None and answers < max_answers:
+            question = state["question"]
+            key = (question["categorie"], question["prompt"])
+            guess = known.get(key, [""] * len(question["answer_categories"]))
+            status, state = await client.request("POST", f"/sessions/{session}/answer", {"answers": guess})
+            answers += 1
+            if status != 200:
+                errors += 1
+                break
+            known[key] = [words[0] for words in state["expected"]]
+
+        status, _ = await client.request("DELETE", f"/sessions/{session}")
+        errors += status != 200
+    finally:
+        await client.close()
+    return {"answers": answers, "errors": errors}
+
+async def run_load_test(learners: int, host: str, port: int, decks: List[str], mode: Optional[str], max_answers: int,
+                        start_server: bool) -> Dict[str, Any]:
+    """ Runs every learner concurrently, optionally against a server started in this process, and returns the report. """
+
+    listener = None
+    if start_server:
+        server = QuizServer()
+        listener = await start_listener(lambda reader, writer: serve_connection(server, reader, writer), host, port, backlog=max(learners, 128))
+
+    latencies: List[float] = []
+    start = perf_counter()
+    try:
+        results = await gather(*(run_learner(i, host, port, decks, mode, max_answers, latencies) for i in range(learners)))
+    finally:
+        elapsed = perf_counter() - start
+        if listener is not None:
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+
+    cuts = quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "learners": learners,
+        "answers": sum(result["answers"] for result in results),
+        "requests": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3)
+    }
+
+def display_report(report: Dict[str, Any]) -> None:
+    """ Prints a readable summary of a load test report. """
+
+    print(f"{report['learners']} learners, {report['answers']} answers, {report['requests']} requests, {report['errors']} errors "
+          f"in {report['seconds']:.3f}s ({report['requests_per_second']} req/s)")
+    print(f"  latency p50={report['p50_ms']:.3f}ms p95={report['p95_ms']:.3f}ms p99={report['p99_ms']:.3f}ms max={report['max_ms']:.3f}ms")
+
+def main() -> None:
+    """ Parses the command line and runs the load test. """
+
+    parser = ArgumentParser(description="Load-test the quiz server with concurrent simulated learners.")
+    parser.add_argument("--learners", type=int, default=100, help="number of concurrent learners")
+    parser.add_argument("--deck", action="append", required=True, help="deck to practice, e.g. french/colors (repeatable)")
+    parser.add_argument("--mode", help="prompt language or 'random' (defaults to the first language)")
+    parser.add_argument("--max-answers", type=int, default=200, help="answers per learner before it stops")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--start-server", action="store_true", help="run the server in this process instead of connecting to one")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(run_load_test(args.learners, args.host, args.port, args.deck, args.mode, args.max_answers, args.start_server))
+    if args.json:
+        print(dumps(report, indent=2))
+    else:
+        display_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+""" Times the trainer's hot paths on synthetic decks and writes machine-readable results, optionally compared against a baseline.
+
+Usage:
+    python -m benchmarks.suite --entries 100000 --output results.json
+    python -m benchmarks.suite --entries 100000 --compare baseline.json --threshold 0.2
+"""
+
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from json import dump, load
+from os import chdir, getcwd
+from pathlib import Path
+from platform import platform, python_version
+from random import Random
+from statistics import median
+from sys import exit
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List
+
+from benchmarks.deck_generator import generate_deck, write_deck, write_vocab_tree
+from core.catalog import CATALOG_PATH, forget_catalog
+from core.console import reset_console, set_output_sink
+from core.deck_cache import build_deck_cache_path
+from core.file_selector import display_files, get_grouped_vocab_files
+from core.loader import load_translations_progress, load_vocab_data, open_vocab_stream
+from core.saver import save_failed_translations
+from core.trainer import is_correct_answer
+from core.translations_selector import generate_translation_pairs
+from core.utils import VocabData
+
+
+Results = Dict[str, Dict[str, float]]
+
+@contextmanager
+def working_directory(path: Path) -> Iterator[None]:
+    """ Temporarily changes the working directory, since the trainer resolves vocab/ and data/ relatively. """
+
+    previous = getcwd()
+    chdir(path)
+    try:
+        yield
+    finally:
+        chdir(previous)
+
+def time_call(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """ Calls function repeat times and returns the minimum and median duration in seconds. """
+
+    durations = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        durations.append(perf_counter() - start)
+    return {"min_s": min(durations), "median_s": median(durations), "repeat": repeat}
+
+def discard_output(text: str) -> None:
+    """ Output sink that drops everything, so listing benchmarks do not measure the terminal. """
+
+def run_suite(entries: int, categories: int, synonyms: int, markdown_density: float, tree_files: int, repeat: int) -> Results:
+    """ Generates the decks in a temporary directory and times every hot path on them. """
+
+    results: Results = {}
+    with TemporaryDirectory() as temp, working_directory(Path(temp)):
+        deck = generate_deck(entries, categories, synonyms, markdown_density)
+        deck_path = write_deck(Path("vocab") / "bench" / "deck.json", deck)
+
+        results["load_vocab_data"] = time_call(lambda: load_vocab_data(deck_path), repeat)
+        results["VocabData.__init__"] = time_call(lambda: VocabData(deck), repeat)
+        results["open_vocab_stream[compile]"] = time_call(lambda: compile_and_open(deck_path), repeat)
+        results["open_vocab_stream[compiled]"] = time_call(lambda: open_vocab_stream(deck_path), repeat)
+
+        vocab_data = VocabData(deck)
+        first_language = vocab_data.languages[0]
+        results["generate_translation_pairs[fixed]"] = time_call(lambda: list(generate_translation_pairs(vocab_data, first_language)), repeat)
+        results["generate_translation_pairs[random]"] = time_call(lambda: list(generate_translation_pairs(vocab_data, "random")), repeat)
+
+        pairs = list(generate_translation_pairs(vocab_data, "random"))
+        results["is_correct_answer"] = time_call(lambda: check_answers(pairs), repeat)
+        results["save_failed_translations"] = time_call(lambda: save_failed_translations(pairs, deck_path), repeat)
+        results["load_translations_progress"] = time_call(lambda: load_translations_progress(deck_path), repeat)
+
+        folders = max(1, tree_files // 50)
+        write_vocab_tree(Path("vocab") / "tree", folders, max(1, tree_files // folders), 50)
+        results.update(time_listing(repeat))
+    return results
+
+def compile_and_open(deck_path: Path) -> None:
+    """ Removes the compiled deck, then opens the vocab file, which compiles it again. """
+
+    build_deck_cache_path(deck_path).unlink(missing_ok=True)
+    open_vocab_stream(deck_path)
+
+def check_answers(pairs: List[Any]) -> None:
+    """ Checks one answer per pair, alternating between a correct and a wrong answer. """
+
+    random = Random(0)
+    for i, pair in enumerate(pairs):
+        group = pair.answers.groups[0]
+        answer = random.choice(group.words).text if i % 2 else "wrong"
+        is_correct_answer(answer, group)
+
+def time_listing(repeat: int) -> Results:
+    """ Times listing the vocab tree and displaying every file's counts, first with a cold catalog, then warm. """
+
+    def list_tree() -> None:
+        for files in get_grouped_vocab_files().values():
+            display_files(files)
+
+    def list_tree_cold() -> None:
+        forget_catalog()
+        CATALOG_PATH.unlink(missing_ok=True)
+        list_tree()
+
+    set_output_sink(discard_output)
+    try:
+        cold = time_call(list_tree_cold, repeat)
+        list_tree()
+        warm = time_call(list_tree, repeat)
+    finally:
+        reset_console()
+    return {"list_vocab_tree[cold]": cold, "list_vocab_tree[warm]": warm}
+
+def compare_results(results: Results, baseline: Results, threshold: float) -> List[str]:
+    """ Prints the ratio of each median to its baseline and returns the names of benchmarks
+    that became slower by more than threshold (0.2 = 20%). """
+
+    regressions = []
+    print(f"{'benchmark':<40} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<40} {'-':>12} {result['median_s']:>12.6f} {'new':>8}")
+            continue
+
+        ratio = result["median_s"] / baseline[name]["median_s"] if baseline[name]["median_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:<40} {baseline[name]['median_s']:>12.6f} {result['median_s']:>12.6f} {ratio:>8.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def display_results(results: Results) -> None:
+    """ Prints the median and minimum duration of each benchmark. """
+
+    print(f"{'benchmark':<40} {'median (s)':>12} {'min (s)':>12}")
+    for name, result in results.items():
+        print(f"{name:<40} {result['median_s']:>12.6f} {result['min_s']:>12.6f}")
+
+def main() -> None:
+    """ Parses the command line, runs the suite, writes the JSON report and compares it with a baseline if given. """
+
+    parser = ArgumentParser(description="Benchmark the vocabulary trainer's hot paths on synthetic decks.")
+    parser.add_argument("--entries", type=int, default=10_000, help="entries in the main deck (1k to 1M)")
+    parser.add_argument("--categories", type=int, default=2)
+    parser.add_argument("--synonyms", type=int, default=2, help="maximum words per group")
+    parser.add_argument("--markdown-density", type=float, default=0.1, help="share of words with '*' highlights")
+    parser.add_argument("--tree-files", type=int, default=1000, help="number of small decks in the listing benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write the results as JSON to this file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON produced by an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    results = run_suite(args.entries, args.categories, args.synonyms, args.markdown_density, args.tree_files, args.repeat)
+    report = {
+        "meta": {
+            "python": python_version(),
+            "platform": platform(),
+            "entries": args.entries,
+            "categories": args.categories,
+            "synonyms": args.synonyms,
+            "markdown_density": args.markdown_density,
+            "tree_files": args.tree_files
+        },
+        "results": results
+    }
+
+    if args.output:
+        with args.output.open("w", encoding="utf-8") as f:
+            dump(report, f, indent=2)
+
+    if not args.compare:
+        display_results(results)
+        return
+
+    with args.compare.open("r", encoding="utf-8") as f:
+        baseline = load(f)["results"]
+    if compare_results(results, baseline, args.threshold):
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+""" Maintains an on-disk catalog of vocabulary files so listings do not have to re-parse every deck. """
+
+from hashlib import sha1
+from os import replace, stat_result
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.json_codec import decode_json, decode_vocab, encode_json
+from core.loader import count_pending_progress
+from core.utils import build_journal_path, build_progress_path
+
+
+CATALOG_PATH = Path("data") / ".catalog.json"
+
+DeckVersion = Tuple[str, int]
+
+_catalog: Optional[Dict[str, Dict[str, Any]]] = None
+
+def get_catalog() -> Dict[str, Dict[str, Any]]:
+    """ Returns the in-memory catalog, loading it from disk the first time it is needed. """
+
+    global _catalog
+    if _catalog is None:
+        _catalog = read_catalog_file()
+    return _catalog
+
+def forget_catalog() -> None:
+    """ Drops the in-memory catalog so it is read from disk again the next time it is needed. """
+
+    global _catalog
+    _catalog = None
+
+def read_catalog_file() -> Dict[str, Dict[str, Any]]:
+    """ Reads the catalog file from disk.
+    Returns an empty catalog if the file does not exist or cannot be read. """
+
+    try:
+        return decode_json(CATALOG_PATH.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+def write_catalog_file(catalog: Dict[str, Dict[str, Any]]) -> None:
+    """ Atomically writes the catalog to disk through a temporary file. """
+
+    CATALOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = CATALOG_PATH.with_suffix(".tmp")
+    temp_path.write_bytes(encode_json(catalog))
+    replace(temp_path, CATALOG_PATH)
+
+def get_catalog_key(file_path: Path) -> str:
+    """ Returns the key under which a vocabulary file is stored in the catalog. """
+
+    return Path(file_path).as_posix()
+
+def refresh_catalog(files: List[Path]) -> Dict[str, Dict[str, Any]]:
+    """ Brings the catalog up to date for the given vocabulary files.
+    Only files whose size or modification time changed are parsed again,
+    and entries for files that no longer exist are dropped. """
+
+    catalog = get_catalog()
+    changed = False
+    keys = set()
+
+    for file in files:
+        key = get_catalog_key(file)
+        keys.add(key)
+        changed |= refresh_catalog_entry(catalog, key, file)
+
+    for key in [key for key in catalog if key not in keys]:
+        del catalog[key]
+        changed = True
+
+    if changed:
+        write_catalog_file(catalog)
+    return catalog
+
+def refresh_catalog_entry(catalog: Dict[str, Dict[str, Any]], key: str, file: Path) -> bool:
+    """ Updates a single catalog entry if the vocab file or its progress file changed.
+    Returns True if the entry was modified. """
+
+    file_stat = file.stat()
+    entry = catalog.get(key)
+    changed = False
+
+    if entry is None or not stat_matches(entry, file_stat):
+        entry = describe_vocab_file(file, file_stat)
+        catalog[key] = entry
+        changed = True
+
+    progress_stat = get_progress_stat(file)
+    if entry.get("progress") != progress_stat or "pending" not in entry:
+        entry["pending"] = count_pending_translations(file)
+        entry["progress"] = progress_stat
+        changed = True
+
+    return changed
+
+def stat_matches(entry: Dict[str, Any], file_stat: stat_result) -> bool:
+    """ Returns True if the catalog entry was built from a file with the same size and modification time. """
+
+    return entry.get("size") == file_stat.st_size and entry.get("mtime") == file_stat.st_mtime_ns
+
+def describe_vocab_file(file: Path, file_stat: stat_result) -> Dict[str, Any]:
+    """ Parses a vocabulary file and returns its catalog entry:
+    word count, languages, size, modification time and content hash. Files that cannot be read or parsed,
+    or whose categories or entries are not lists, are marked invalid. """
+
+    entry = {
+        "size": file_stat.st_size,
+        "mtime": file_stat.st_mtime_ns,
+        "hash": "",
+        "words": 0,
+        "languages": []
+    }
+
+    try:
+        content = file.read_bytes()
+        entry["hash"] = sha1(content).hexdigest()
+        languages, vocab = decode_vocab(content)
+        if not isinstance(languages, list) or not isinstance(vocab, list):
+            raise TypeError("'categories' and 'vocab' must be lists.")
+        entry["words"] = len(vocab)
+        entry["languages"] = languages
+    except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError):
+        entry["invalid"] = True
+    return entry
+
+def get_progress_stat(file_path: Path) -> Optional[List[int]]:
+    """ Returns the size and modification time of the progress file and journal for a vocab file,
+    or None if no progress file exists. """
+
+    try:
+        progress_stat = build_progress_path(file_path).stat()
+    except OSError:
+        return None
+
+    try:
+        journal_stat = build_journal_path(file_path).stat()
+        journal = [journal_stat.st_size, journal_stat.st_mtime_ns]
+    except OSError:
+        journal = [0, 0]
+    return [progress_stat.st_size, progress_stat.st_mtime_ns] + journal
+
+def count_pending_translations(file_path: Path) -> Optional[int]:
+    """ Returns the number of pending (not correct) translations in the progress of a vocab file.
+    Returns None if the progress file does not exist or cannot be read. """
+
+    if not build_progress_path(file_path).exists():
+        return None
+
+    try:
+        return count_pending_progress(file_path)
+    except (OSError, ValueError, AttributeError, IndexError, KeyError):
+        return None
+
+def get_catalog_entry(file_path: Path) -> Dict[str, Any]:
+    """ Returns the catalog entry of a vocabulary file, refreshing it if it is missing or outdated. """
+
+    catalog = get_catalog()
+    key = get_catalog_key(file_path)
+    if refresh_catalog_entry(catalog, key, Path(file_path)):
+        write_catalog_file(catalog)
+    return catalog[key]
+
+def get_deck_hash(file_path: Path) -> str:
+    """ Returns the content hash of a vocabulary file from the catalog, recomputing it only if the file changed. """
+
+    return get_catalog_entry(file_path)["hash"]
+
+def get_deck_entry_count(file_path: Path) -> int:
+    """ Returns the number of entries of a vocabulary file from the catalog. """
+
+    return get_catalog_entry(file_path)["words"]
+
+def get_deck_version(file_path: Path) -> DeckVersion:
+    """ Returns the content hash and entry count of a vocabulary file as it is now.
+    A session captures it before loading its pairs, so its saves describe the file the pairs came from. """
+
+    entry = get_catalog_entry(file_path)
+    return entry["hash"], entry["words"]
+
+def record_pending_count(file_path: Path, pending: Optional[int]) -> None:
+    """ Stores the pending count of a vocab file after its progress file was written or removed,
+    so the next listing does not need to parse the progress file again. """
+
+    catalog = get_catalog()
+    entry = catalog.get(get_catalog_key(file_path))
+    if entry is None:
+        return
+
+    entry["pending"] = pending
+    entry["progress"] = get_progress_stat(file_path)
+    write_catalog_file(catalog)
@@ -0,0 +1,51 @@
+""" Routes user input and output through replaceable functions, so sessions can also run without a terminal. """
+
+from typing import Callable, Optional
+
+from core.utils import WordGroup
+
+
+AnswerSource = Callable[[str, Optional[WordGroup]], str]
+OutputSink = Callable[[str], None]
+
+def terminal_input(prompt: str, expected: Optional[WordGroup] = None) -> str:
+    """ Reads a line typed by the user after displaying the prompt. The expected answers are ignored. """
+
+    return input(prompt)
+
+def terminal_output(text: str) -> None:
+    """ Writes text to the terminal as is. """
+
+    print(text, end="")
+
+_input_source: AnswerSource = terminal_input
+_output_sink: OutputSink = terminal_output
+
+def read_input(prompt: str = "", expected: Optional[WordGroup] = None) -> str:
+    """ Reads one line of input from the current answer source.
+    When the prompt asks for a translation, expected is the word group holding the correct answers. """
+
+    return _input_source(prompt, expected)
+
+def write_output(text: str = "", end: str = "\n") -> None:
+    """ Writes text followed by end to the current output sink. """
+
+    _output_sink(text + end)
+
+def set_input_source(source: AnswerSource) -> None:
+    """ Replaces the function that answers prompts. """
+
+    global _input_source
+    _input_source = source
+
+def set_output_sink(sink: OutputSink) -> None:
+    """ Replaces the function that receives all output. """
+
+    global _output_sink
+    _output_sink = sink
+
+def reset_console() -> None:
+    """ Restores terminal input and output. """
+
+    set_input_source(terminal_input)
+    set_output_sink(terminal_output)
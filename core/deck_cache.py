@@ -0,0 +1,243 @@
+""" Compiles vocabulary files into a binary deck cache under data/.decks/ and maps it back as a read-only view.
+
+A compiled deck holds a header, offset arrays for entries, groups and words, and a table of distinct strings.
+Loading maps the file with mmap: nothing is decoded up front, and an entry's words are only read when it is used.
+The cache records the size, modification time and hash of its vocab file and is rebuilt when the file changed.
+Opening a cache only reads it; a cache whose file was touched without changing is rewritten atomically, like a new one. """
+
+from array import array
+from mmap import ACCESS_READ, mmap
+from os import environ, replace, stat_result
+from pathlib import Path
+from struct import calcsize, pack, unpack_from
+from sys import byteorder, intern
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from core.utils import compute_file_hash, get_relative_vocab_path, VocabEntry, Word, WordGroup
+
+
+DECK_CACHE_ENABLED = environ.get("VOCAB_TRAINER_DECK_CACHE", "1") != "0"
+
+DECK_CACHE_DIR = Path("data") / ".decks"
+
+DECK_MAGIC = b"VOCD"
+
+DECK_FORMAT = 1
+
+# magic, format, source size, source mtime (ns), source sha1, categories, entries, groups, words, strings
+HEADER = "<4sIQQ20sIIIII"
+
+HEADER_SIZE = (calcsize(HEADER) + 7) // 8 * 8
+
+class MappedEntries(Sequence):
+    """ The entries of a compiled deck, built one at a time from the mapped arrays when accessed. """
+
+    def __init__(self, deck: "MappedDeck"):
+        self.deck = deck
+
+    def __len__(self) -> int:
+        return self.deck.entry_count
+
+    def __getitem__(self, index: int) -> VocabEntry:
+        if not -len(self) <= index < len(self):
+            raise IndexError("entry index out of range")
+        return self.deck.get_entry(index % len(self))
+
+    def __iter__(self) -> Iterator[VocabEntry]:
+        return (self.deck.get_entry(i) for i in range(len(self)))
+
+class MappedDeck:
+    """ Read-only view of a compiled deck with the same languages, entries and source attributes as VocabData. """
+
+    def __init__(self, buffer: mmap, source: Path):
+        self.buffer = buffer
+        self.source = source
+        view = self.view = memoryview(buffer)
+        _, _, _, _, digest, categories, entries, groups, words, strings = unpack_from(HEADER, buffer)
+        self.hash = digest.hex()
+        self.entry_count = entries
+
+        offset = HEADER_SIZE
+        category_strings, offset = map_array(view, offset, categories)
+        self.entry_groups, offset = map_array(view, offset, entries + 1)
+        self.group_words, offset = map_array(view, offset, groups + 1)
+        self.word_strings, offset = map_array(view, offset, words)
+        self.string_offsets, offset = map_array(view, offset, strings + 1)
+        self.strings = view[offset:]
+
+        self.languages = [intern(self.get_string(i)) for i in category_strings]
+        self.entries = MappedEntries(self)
+
+    def close(self) -> None:
+        """ Releases the views of the mapped file and unmaps it. The deck cannot be read afterwards. """
+
+        for view in (self.entry_groups, self.group_words, self.word_strings, self.string_offsets, self.strings, self.view):
+            view.release()
+        self.buffer.close()
+
+    def iter_raw_entries(self) -> Iterator[List[List[str]]]:
+        """ Yields the word lists of each entry, in the form they have in the vocab file. """
+
+        return ([[word.text for word in group.words] for group in entry.groups] for entry in self.entries)
+
+    def get_string(self, index: int) -> str:
+        """ Decodes one string of the string table. """
+
+        return str(self.strings[self.string_offsets[index]:self.string_offsets[index + 1]], "utf-8")
+
+    def get_entry(self, index: int) -> VocabEntry:
+        """ Builds the entry at the given index from the mapped arrays. """
+
+        group_start, group_end = self.entry_groups[index], self.entry_groups[index + 1]
+        return VocabEntry(tuple(
+            WordGroup(tuple(
+                Word(self.get_string(self.word_strings[w]))
+                for w in range(self.group_words[g], self.group_words[g + 1])
+            ), self.languages[g - group_start])
+            for g in range(group_start, group_end)
+        ))
+
+def map_array(view: memoryview, offset: int, length: int) -> Any:
+    """ Returns a zero-copy view of length unsigned 32-bit integers at offset, and the offset following them. """
+
+    end = offset + 4 * length
+    return view[offset:end].cast("I"), end
+
+def get_deck_size(buffer: Any) -> int:
+    """ Returns the size a compiled deck should have according to its header and string offsets,
+    or -1 if the buffer is too short to hold them. """
+
+    if len(buffer) < HEADER_SIZE:
+        return -1
+    categories, entries, groups, words, strings = unpack_from(HEADER, buffer)[5:]
+    arrays_end = HEADER_SIZE + 4 * (categories + entries + 1 + groups + 1 + words + strings + 1)
+    if len(buffer) < arrays_end:
+        return -1
+    return arrays_end + unpack_from("<I", buffer, arrays_end - 4)[0]
+
+def build_deck_cache_path(file_path: Path) -> Path:
+    """ Constructs the path of the compiled deck of a vocabulary file, mirroring its place in vocab/. """
+
+    return DECK_CACHE_DIR / get_relative_vocab_path(Path(file_path)).with_suffix(".deck")
+
+def compile_deck(languages: List[str], raw_entries: Iterable[List[List[str]]], size: int, mtime: int, digest: bytes) -> bytes:
+    """ Returns the compiled deck of the given categories and raw entries, for a source file of the given size,
+    modification time and sha1 digest. The entries are consumed one at a time.
+    Identical strings are stored once; arrays use the native (little-endian) byte order. """
+
+    string_ids: Dict[str, int] = {}
+    string_offsets = array("I", [0])
+    string_table = bytearray()
+
+    def get_string_id(text: str) -> int:
+        string_id = string_ids.get(text)
+        if string_id is None:
+            string_id = string_ids[text] = len(string_ids)
+            string_table.extend(text.encode("utf-8"))
+            string_offsets.append(len(string_table))
+        return string_id
+
+    category_strings = array("I", (get_string_id(language) for language in languages))
+    entry_groups, group_words, word_strings = array("I", [0]), array("I", [0]), array("I")
+    for entry in raw_entries:
+        for group in entry:
+            word_strings.extend(get_string_id(word) for word in group)
+            group_words.append(len(word_strings))
+        entry_groups.append(len(group_words) - 1)
+
+    header = pack(HEADER, DECK_MAGIC, DECK_FORMAT, size, mtime, digest, len(category_strings), len(entry_groups) - 1,
+                  len(group_words) - 1, len(word_strings), len(string_ids))
+    arrays = b"".join(values.tobytes() for values in (category_strings, entry_groups, group_words, word_strings, string_offsets))
+    return header.ljust(HEADER_SIZE, b"\0") + arrays + bytes(string_table)
+
+def write_deck_cache(file_path: Path, languages: List[str], raw_entries: Iterable[List[List[str]]],
+                     replaced: Optional[MappedDeck] = None, file_stat: Optional[stat_result] = None, digest: Optional[bytes] = None) -> None:
+    """ Compiles a vocabulary file from its raw entries, consumed one at a time, and atomically writes its deck cache.
+    The size, modification time and hash of the file are read first unless the caller already checked them.
+    replaced is a mapping of the cache being replaced: it is closed just before the replace, which fails on Windows while
+    the file is mapped. Raises OSError if the cache cannot be written. """
+
+    file_stat = file_stat or Path(file_path).stat()
+    digest = digest or bytes.fromhex(compute_file_hash(file_path))
+    data = compile_deck(languages, raw_entries, file_stat.st_size, file_stat.st_mtime_ns, digest)
+
+    cache_path = build_deck_cache_path(file_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_name(cache_path.name + ".tmp")
+    temp_path.write_bytes(data)
+    if replaced is not None:
+        replaced.close()
+    try:
+        replace(temp_path, cache_path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+def open_deck_cache(file_path: Path) -> Optional[MappedDeck]:
+    """ Maps the deck cache of a vocabulary file, or returns None if there is none, it is out of date or truncated.
+    If only the modification time changed but the content hash still matches, the cache is kept and rewritten with
+    the new modification time, so the file is not hashed again next time. """
+
+    cache_path = build_deck_cache_path(file_path)
+    try:
+        with open(cache_path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                return None
+            magic, version, size, mtime, digest = unpack_from(HEADER, header)[:5]
+            if magic != DECK_MAGIC or version != DECK_FORMAT:
+                return None
+
+            file_stat = Path(file_path).stat()
+            touched = (size, mtime) != (file_stat.st_size, file_stat.st_mtime_ns)
+            if touched and (size != file_stat.st_size or digest != bytes.fromhex(compute_file_hash(file_path))):
+                return None
+
+            buffer = mmap(f.fileno(), 0, access=ACCESS_READ)
+    except OSError:
+        return None
+
+    if get_deck_size(buffer) != len(buffer):
+        buffer.close()
+        return None
+    deck = MappedDeck(buffer, Path(file_path))
+    if touched:
+        return refresh_deck_cache(deck, file_stat, digest)
+    return deck
+
+def refresh_deck_cache(deck: MappedDeck, file_stat: stat_result, digest: bytes) -> Optional[MappedDeck]:
+    """ Rewrites the cache of a deck whose vocab file was touched without changing, from the mapped deck itself,
+    recording the file's new modification time. Returns the mapping of the new cache, or the old mapping if the cache
+    cannot be written, e.g. because data/ is read-only. """
+
+    try:
+        write_deck_cache(deck.source, deck.languages, deck.iter_raw_entries(), deck, file_stat, digest)
+    except OSError:
+        if not deck.buffer.closed:
+            return deck
+    return map_deck_cache(deck.source)
+
+def map_deck_cache(file_path: Path) -> Optional[MappedDeck]:
+    """ Maps the deck cache of a vocabulary file without checking it against the file. Returns None if it cannot be read. """
+
+    try:
+        with open(build_deck_cache_path(file_path), "rb") as f:
+            buffer = mmap(f.fileno(), 0, access=ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if get_deck_size(buffer) != len(buffer):
+        buffer.close()
+        return None
+    return MappedDeck(buffer, Path(file_path))
+
+def is_deck_cache_supported(file_path: Path) -> bool:
+    """ Returns True if the vocabulary file can be compiled: the cache is enabled, the platform is little-endian
+    (the arrays are mapped without conversion) and the file lives in vocab/, whose layout the cache mirrors. """
+
+    if not DECK_CACHE_ENABLED or byteorder != "little":
+        return False
+    try:
+        build_deck_cache_path(file_path)
+    except ValueError:
+        return False
+    return True
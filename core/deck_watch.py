@@ -0,0 +1,205 @@
+""" Reloads the decks of a running session when their vocab files change on disk, keeping the progress of unchanged entries.
+
+Each deck is polled between questions: a change of size or modification time triggers a reload. The new file's entries
+are hashed one by one and diffed against the hashes of the loaded entries, so only added, edited and removed entries
+turn into new or dropped pairs; unchanged entries keep their pair, attempts and correctness, and only have their index
+updated if entries were inserted or removed before them. Set VOCAB_TRAINER_WATCH=1 to enable it, and
+VOCAB_TRAINER_WATCH_INTERVAL to the number of seconds between polls (1 by default). """
+
+from hashlib import blake2b, sha1
+from os import environ
+from pathlib import Path
+from sys import intern
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.console import write_output
+from core.json_codec import decode_vocab
+from core.persistence import flush_persistence, Journal
+from core.session_state import replace_session_pairs
+from core.study_window import StudyWindow
+from core.timing import span
+from core.translations_selector import random_direction
+from core.utils import build_translation_pair, build_vocab_entry, get_deck_key, TranslationPair
+
+
+DECK_WATCH_ENABLED = environ.get("VOCAB_TRAINER_WATCH", "0") == "1"
+WATCH_INTERVAL = float(environ.get("VOCAB_TRAINER_WATCH_INTERVAL", "1"))
+
+ENTRY_DIGEST_SIZE = 16
+
+FileState = Tuple[int, int]
+PairChanges = Tuple[List[TranslationPair], List[TranslationPair]]
+
+class WatchedDeck:
+    """ The state of one deck of the session as last read from disk: its file state and content hash,
+    its categories, the digest of each entry, and the session's pair of each entry by entry index. """
+
+    def __init__(self, file_path: Path, pairs: List[TranslationPair]):
+        self.file_path = file_path
+        self.pairs: Dict[int, TranslationPair] = {pair.entry_index: pair for pair in pairs}
+        self.state = read_file_state(file_path)
+        content = Path(file_path).read_bytes()
+        self.hash = sha1(content).hexdigest()
+        self.languages, raw_entries = parse_deck(content)
+        self.digests = [get_raw_entry_digest(entry) for entry in raw_entries]
+        self.mode = get_deck_mode(self.languages, self.pairs.values())
+
+    def merge(self, languages: List[str], raw_entries: List[Any]) -> PairChanges:
+        """ Diffs the new entries against the loaded ones and updates the pairs of entries that moved.
+        Returns the new pairs of added and edited entries, not yet part of the session, and the pairs of removed entries.
+        If the categories changed, every entry counts as edited. """
+
+        digests = [get_raw_entry_digest(entry) for entry in raw_entries]
+        if languages == self.languages:
+            moved, added, removed = diff_entry_digests(self.digests, digests)
+        else:
+            moved, added, removed = {}, list(range(len(digests))), list(range(len(self.digests)))
+
+        removed_pairs = [pair for pair in (self.pairs.pop(i, None) for i in removed) if pair is not None]
+        moved_pairs = [(new_index, self.pairs.pop(old_index, None)) for old_index, new_index in moved.items()]
+        for new_index, pair in moved_pairs:
+            if pair is not None:
+                pair.entry_index = new_index
+                self.pairs[new_index] = pair
+
+        added_pairs = []
+        for i in added:
+            entry = build_vocab_entry(raw_entries[i], languages)
+            direction = languages.index(self.mode) if self.mode in languages else None
+            if direction is None or direction >= len(entry.groups):
+                direction = random_direction(entry)
+            added_pairs.append(build_translation_pair(entry, i, direction, source=self.file_path))
+
+        self.languages, self.digests = languages, digests
+        return added_pairs, removed_pairs
+
+class DeckWatcher:
+    """ Polls the vocab files of a session and merges their changes into the session's pairs and journal. """
+
+    def __init__(self, pairs: List[TranslationPair], files: List[Path], journal: Journal):
+        self.pairs = pairs
+        self.journal = journal
+        pairs_by_file: Dict[Path, List[TranslationPair]] = {file: [] for file in files}
+        for pair in pairs:
+            pairs_by_file[pair.source].append(pair)
+        self.decks = [WatchedDeck(file, deck_pairs) for file, deck_pairs in pairs_by_file.items()]
+        self.next_poll = monotonic() + WATCH_INTERVAL
+
+    def poll(self) -> PairChanges:
+        """ Reloads the decks whose file changed, at most once per WATCH_INTERVAL.
+        Returns the pairs added to and removed from the session. """
+
+        if monotonic() < self.next_poll:
+            return [], []
+        self.next_poll = monotonic() + WATCH_INTERVAL
+
+        added: List[TranslationPair] = []
+        removed: List[TranslationPair] = []
+        for deck in self.decks:
+            try:
+                state = read_file_state(deck.file_path)
+            except OSError:
+                continue
+            if state != deck.state:
+                deck.state = state
+                with span("reload_deck"):
+                    deck_added, deck_removed = self.reload(deck)
+                added.extend(deck_added)
+                removed.extend(deck_removed)
+        return added, removed
+
+    def reload(self, deck: WatchedDeck) -> PairChanges:
+        """ Merges the current content of a deck's file into the session and rewrites the deck's progress.
+        A file whose content did not change is left alone; one that cannot be parsed is skipped until it changes again. """
+
+        try:
+            content = deck.file_path.read_bytes()
+            content_hash = sha1(content).hexdigest()
+            if content_hash == deck.hash:
+                return [], []
+            deck.hash = content_hash
+            languages, raw_entries = parse_deck(content)
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            write_output(f"⚠️ Could not reload {get_deck_key(deck.file_path)}: {error}")
+            return [], []
+
+        flush_persistence()
+        added, removed = deck.merge(languages, raw_entries)
+        added = replace_session_pairs(self.pairs, removed, added)
+        for pair in added:
+            deck.pairs[pair.entry_index] = pair
+        self.journal.reload_deck(deck.file_path, list(deck.pairs.values()), (deck.hash, len(deck.digests)))
+
+        write_output(f"\n🔄 Reloaded {get_deck_key(deck.file_path)}: {len(added)} new or edited, {len(removed)} removed entry(ies).")
+        return added, removed
+
+def open_deck_watcher(pairs: List[TranslationPair], files: List[Path], journal: Journal) -> Optional[DeckWatcher]:
+    """ Starts watching the session's vocab files, or returns None when watching is disabled.
+    Study windows are not watched: their progress rows follow the entries of the whole deck, which a reload would renumber. """
+
+    if not DECK_WATCH_ENABLED or isinstance(pairs, StudyWindow):
+        return None
+    return DeckWatcher(pairs, files, journal)
+
+def read_file_state(file_path: Path) -> FileState:
+    """ Returns the modification time and size of a file. """
+
+    file_stat = Path(file_path).stat()
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+def parse_deck(content: bytes) -> Tuple[List[str], List[Any]]:
+    """ Returns the interned categories and the raw entries of a vocab file's content.
+    Raises an error if the required keys are missing. """
+
+    languages, raw_entries = decode_vocab(content)
+    return [intern(language) for language in languages], raw_entries
+
+def get_raw_entry_digest(raw_entry: Any) -> bytes:
+    """ Returns a hash of the words of a raw entry, in order. The digests are only compared within a session,
+    so the entry's repr, about twice as fast to build as its JSON, is hashed. """
+
+    return blake2b(repr(raw_entry).encode("utf-8"), digest_size=ENTRY_DIGEST_SIZE).digest()
+
+def get_deck_mode(languages: List[str], pairs: Any) -> Optional[str]:
+    """ Returns the prompt language shared by every pair of the deck, or None if they use several (random mode). """
+
+    directions = {pair.direction for pair in pairs}
+    if len(directions) == 1:
+        direction = directions.pop()
+        return languages[direction] if direction < len(languages) else None
+    return None
+
+def diff_entry_digests(old: List[bytes], new: List[bytes]) -> Tuple[Dict[int, int], List[int], List[int]]:
+    """ Diffs two lists of entry digests. Returns the new index of every old entry found again at another index,
+    the indexes of new entries not found in the old list, and the indexes of old entries not found in the new list.
+    The common head and tail are skipped first; entries in the tail only move if the entry count changed. """
+
+    limit = min(len(old), len(new))
+    head = 0
+    while head < limit and old[head] == new[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and old[-1 - tail] == new[-1 - tail]:
+        tail += 1
+
+    old_end, new_end = len(old) - tail, len(new) - tail
+    unmatched: Dict[bytes, List[int]] = {}
+    for i in range(old_end - 1, head - 1, -1):
+        unmatched.setdefault(old[i], []).append(i)
+
+    moved: Dict[int, int] = {}
+    added: List[int] = []
+    for i in range(head, new_end):
+        candidates = unmatched.get(new[i])
+        if candidates:
+            old_index = candidates.pop()
+            if old_index != i:
+                moved[old_index] = i
+        else:
+            added.append(i)
+    removed = [i for candidates in unmatched.values() for i in candidates]
+
+    if new_end != old_end:
+        moved.update((i, i + new_end - old_end) for i in range(old_end, len(old)))
+    return moved, added, removed
@@ -0,0 +1,321 @@
+""" Records every answer in an append-only event log and keeps per-word response-time and error statistics up to date incrementally.
+
+Each event is one compact JSON line: timestamp, deck, entry key, prompt language, time to answer, correctness and near miss.
+The entry key is the digest of the entry's words (see core.translations_selector.get_entry_digest), so a word keeps its
+history when entries are inserted, removed or reordered in its deck. The statistics file stores, per word, counts and a
+histogram of response times together with the log offset they cover, so a report only reads the events appended since
+the previous one. Events logged by index, before entry keys, are skipped. Usage:
+
+    python -m core.events
+    python -m core.events --deck french/colors --top 10 --json
+"""
+
+from argparse import ArgumentParser
+from bisect import bisect_left
+from collections import defaultdict
+from json import dump, dumps, load, loads
+from os import environ, replace
+from pathlib import Path
+from re import compile as compile_pattern, DOTALL
+from time import time
+from typing import Any, Dict, List, Optional, Sequence, TextIO, Tuple
+
+from core.loader import open_vocab_stream
+from core.translations_selector import get_entry_digest
+from core.utils import build_translation_pair, get_deck_key, TranslationPair
+
+
+EVENT_LOG_ENABLED = environ.get("VOCAB_TRAINER_EVENT_LOG", "1") != "0"
+
+EVENT_LOG_PATH = Path("data") / ".events.log"
+EVENT_STATS_PATH = Path("data") / ".events.stats.json"
+VOCAB_DIR = Path("vocab")
+
+EVENT_STATS_FORMAT = 2
+EVENT_FLUSH_INTERVAL = 32
+RESPONSE_BUCKETS_MS = (250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000, 16000, 24000, 32000, 60000)
+TREND_SMOOTHING = 0.2
+TREND_THRESHOLD = 0.1
+SLOW_ANSWER_MS = 10000
+SLOW_ANSWER_WEIGHT = 0.25
+HARD_WORD_THRESHOLD = 0.55
+
+WORD_ID_PATTERN = compile_pattern(r"(.*)#([0-9a-f]{16}):(.*)", DOTALL)
+
+WordStats = Dict[str, Any]
+
+_log_file: Optional[TextIO] = None
+_unflushed = 0
+
+def get_word_id(deck: str, entry_key: str, language: str) -> str:
+    """ Returns the identifier of a word: one entry of a deck, by entry key, prompted in one language. """
+
+    return f"{deck}#{entry_key}:{language}"
+
+def parse_word_id(word_id: str) -> Tuple[str, str, str]:
+    """ Splits a word identifier back into its deck, entry key and prompt language. """
+
+    deck, entry_key, language = WORD_ID_PATTERN.fullmatch(word_id).groups()
+    return deck, entry_key, language
+
+def get_entry_key(pair: TranslationPair) -> str:
+    """ Returns the key identifying the pair's entry by its words, whatever its position in the deck. """
+
+    return get_entry_digest(pair).hex()
+
+def get_pair_word_id(pair: TranslationPair) -> Optional[str]:
+    """ Returns the word identifier of a pair, or None if the pair does not come from a file inside vocab/. """
+
+    if pair.source is None:
+        return None
+    try:
+        return get_word_id(get_deck_key(pair.source), get_entry_key(pair), pair.prompt.categorie)
+    except ValueError:
+        return None
+
+def record_answer(pair: TranslationPair, seconds: float, correct: bool, near_miss: bool) -> None:
+    """ Appends the answer to a pair to the event log, unless the log is disabled or the pair has no deck. """
+
+    if not EVENT_LOG_ENABLED or pair.source is None:
+        return
+    try:
+        deck = get_deck_key(pair.source)
+    except ValueError:
+        return
+
+    event = {"t": round(time(), 3), "d": deck, "e": get_entry_key(pair), "p": pair.prompt.categorie,
+             "ms": round(seconds * 1000), "c": int(correct), "n": int(near_miss)}
+    write_event(dumps(event, separators=(",", ":"), ensure_ascii=False))
+
+def write_event(line: str) -> None:
+    """ Appends one line to the event log, opening it on first use and flushing once a batch is complete. """
+
+    global _log_file, _unflushed
+    if _log_file is None:
+        EVENT_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _log_file = EVENT_LOG_PATH.open("a", encoding="utf-8")
+
+    _log_file.write(line + "\n")
+    _unflushed += 1
+    if _unflushed >= EVENT_FLUSH_INTERVAL:
+        flush_events()
+
+def flush_events() -> None:
+    """ Writes buffered events to the log file. """
+
+    global _unflushed
+    if _log_file is not None:
+        _log_file.flush()
+    _unflushed = 0
+
+def close_event_log() -> None:
+    """ Flushes and closes the event log. """
+
+    global _log_file
+    flush_events()
+    if _log_file is not None:
+        _log_file.close()
+        _log_file = None
+
+def new_word_stats() -> WordStats:
+    """ Returns the statistics of a word that was never answered. """
+
+    return {"n": 0, "errors": 0, "near": 0, "hist": [0] * (len(RESPONSE_BUCKETS_MS) + 1), "recent_error": 0.0, "last": 0.0}
+
+def apply_event(stats: Dict[str, WordStats], event: Dict[str, Any]) -> None:
+    """ Adds one event to the statistics of its word. The recent error rate is an exponential moving average. """
+
+    word = stats.setdefault(get_word_id(event["d"], event["e"], event["p"]), new_word_stats())
+    error = 0.0 if event["c"] else 1.0
+    word["n"] += 1
+    word["errors"] += int(error)
+    word["near"] += event["n"]
+    word["hist"][bisect_left(RESPONSE_BUCKETS_MS, event["ms"])] += 1
+    word["recent_error"] = error if word["n"] == 1 else word["recent_error"] + TREND_SMOOTHING * (error - word["recent_error"])
+    word["last"] = event["t"]
+
+def read_stats_file() -> Dict[str, Any]:
+    """ Reads the statistics file, or returns empty statistics at log offset 0 if it is missing, unreadable
+    or was written in another format. """
+
+    try:
+        with EVENT_STATS_PATH.open("r", encoding="utf-8") as f:
+            data = load(f)
+        if isinstance(data, dict) and data.get("format") == EVENT_STATS_FORMAT and "offset" in data and "words" in data:
+            return data
+    except (OSError, ValueError):
+        pass
+    return new_stats()
+
+def new_stats() -> Dict[str, Any]:
+    """ Returns the statistics of an empty log. """
+
+    return {"format": EVENT_STATS_FORMAT, "offset": 0, "words": {}}
+
+def write_stats_file(data: Dict[str, Any]) -> None:
+    """ Atomically writes the statistics file. """
+
+    EVENT_STATS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = EVENT_STATS_PATH.with_suffix(".tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    replace(temp_path, EVENT_STATS_PATH)
+
+def update_event_stats() -> Dict[str, WordStats]:
+    """ Applies the events appended to the log since the last update and saves the statistics with the new offset.
+    A log shorter than the recorded offset was replaced, so the statistics are rebuilt from its start.
+    A last line without newline is still being written and is left for the next update. """
+
+    flush_events()
+    data = read_stats_file()
+    try:
+        size = EVENT_LOG_PATH.stat().st_size
+    except OSError:
+        return data["words"]
+
+    if size < data["offset"]:
+        data = new_stats()
+    if size == data["offset"]:
+        return data["words"]
+
+    with EVENT_LOG_PATH.open("rb") as f:
+        f.seek(data["offset"])
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            data["offset"] += len(line)
+            try:
+                apply_event(data["words"], loads(line))
+            except (ValueError, KeyError, TypeError, IndexError):
+                continue
+
+    write_stats_file(data)
+    return data["words"]
+
+def estimate_percentile(histogram: List[int], fraction: float) -> int:
+    """ Returns the upper bound, in milliseconds, of the histogram bucket holding the given fraction of answers.
+    Answers slower than the last bound are reported at that bound. """
+
+    target = fraction * sum(histogram)
+    cumulative = 0
+    for i, count in enumerate(histogram):
+        cumulative += count
+        if count and cumulative >= target:
+            return RESPONSE_BUCKETS_MS[min(i, len(RESPONSE_BUCKETS_MS) - 1)]
+    return 0
+
+def get_trend(word: WordStats) -> str:
+    """ Compares the recent error rate of a word with its overall error rate. """
+
+    difference = word["recent_error"] - word["errors"] / word["n"]
+    if difference > TREND_THRESHOLD:
+        return "worse"
+    if difference < -TREND_THRESHOLD:
+        return "better"
+    return "steady"
+
+def get_difficulty(word: WordStats) -> float:
+    """ Scores how hard a word is: its smoothed error rate, with near misses counting as half an error,
+    plus a bonus of up to SLOW_ANSWER_WEIGHT for slow answers. """
+
+    error_rate = (word["errors"] + 0.5 * word["near"] + 1) / (word["n"] + 2)
+    slowness = min(1.0, estimate_percentile(word["hist"], 0.95) / SLOW_ANSWER_MS)
+    return error_rate + SLOW_ANSWER_WEIGHT * slowness
+
+def summarize_word(word_id: str, word: WordStats) -> Dict[str, Any]:
+    """ Returns the report row of a word. """
+
+    deck, entry_key, language = parse_word_id(word_id)
+    return {
+        "deck": deck,
+        "entry": entry_key,
+        "language": language,
+        "answers": word["n"],
+        "error_rate": round(word["errors"] / word["n"], 3),
+        "near_misses": word["near"],
+        "p50_ms": estimate_percentile(word["hist"], 0.5),
+        "p95_ms": estimate_percentile(word["hist"], 0.95),
+        "trend": get_trend(word),
+        "difficulty": round(get_difficulty(word), 3)
+    }
+
+def rank_hard_pairs(pairs: Sequence[TranslationPair]) -> List[TranslationPair]:
+    """ Returns the pairs whose difficulty reaches HARD_WORD_THRESHOLD, hardest first.
+    Pairs without any recorded answer fall back to the former rule of more than two attempts. """
+
+    stats = update_event_stats()
+    scored = []
+    for pair in pairs:
+        word = stats.get(get_pair_word_id(pair))
+        difficulty = get_difficulty(word) if word is not None else float(pair.attempts > 2)
+        if difficulty >= HARD_WORD_THRESHOLD:
+            scored.append((difficulty, pair))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [pair for _, pair in scored]
+
+def build_report(deck: Optional[str], top: int) -> List[Dict[str, Any]]:
+    """ Returns the report rows of the hardest words, optionally of one deck only, with their prompt words. """
+
+    stats = update_event_stats()
+    rows = [summarize_word(word_id, word) for word_id, word in stats.items()]
+    if deck is not None:
+        rows = [row for row in rows if row["deck"] == deck]
+    rows.sort(key=lambda row: row["difficulty"], reverse=True)
+    rows = rows[:top]
+    add_prompt_words(rows)
+    return rows
+
+def add_prompt_words(rows: List[Dict[str, Any]]) -> None:
+    """ Adds the prompt words of each row, read from the entry with the row's key in its vocab file.
+    Rows whose file is missing, or whose entry is no longer in it, get an empty prompt. """
+
+    rows_by_deck: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        row["prompt"] = ""
+        rows_by_deck[row["deck"]].append(row)
+
+    for deck, deck_rows in rows_by_deck.items():
+        file_path = VOCAB_DIR / f"{deck}.json"
+        if not file_path.exists():
+            continue
+        rows_by_entry = defaultdict(list)
+        for row in deck_rows:
+            rows_by_entry[row["entry"]].append(row)
+        for i, entry in enumerate(open_vocab_stream(file_path).entries):
+            entry_rows = rows_by_entry.pop(get_entry_key(build_translation_pair(entry, i, 0)), [])
+            for row in entry_rows:
+                group = next((group for group in entry.groups if group.categorie == row["language"]), None)
+                if group is not None:
+                    row["prompt"] = ", ".join(word.text.replace("*", "") for word in group.words)
+            if not rows_by_entry:
+                break
+
+def display_report(rows: List[Dict[str, Any]]) -> None:
+    """ Prints the report rows as a table. """
+
+    if not rows:
+        print("No answers recorded yet.")
+        return
+
+    print(f"{'word':<30} {'deck':<24} {'answers':>7} {'errors':>7} {'p50 ms':>7} {'p95 ms':>7} {'trend':>7} {'score':>6}")
+    for row in rows:
+        print(f"{row['prompt'][:30]:<30} {row['deck'][:24]:<24} {row['answers']:>7} {row['error_rate']:>7.0%} "
+              f"{row['p50_ms']:>7} {row['p95_ms']:>7} {row['trend']:>7} {row['difficulty']:>6.2f}")
+
+def main() -> None:
+    """ Parses the command line, updates the statistics and prints the hardest words. """
+
+    parser = ArgumentParser(description="Report per-word response times, error rates and trends from the answer event log.")
+    parser.add_argument("--deck", help="only report this deck, e.g. french/colors")
+    parser.add_argument("--top", type=int, default=20, help="number of words to report")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    rows = build_report(args.deck, args.top)
+    if args.json:
+        print(dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        display_report(rows)
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,30 @@
-""" Handles user interaction for selecting a vocabulary file to use in the session. """
+""" Handles user interaction for selecting the vocabulary files to use in the session. """
 
 from collections import defaultdict
-from json import load
 from pathlib import Path
 from typing import List, Dict, Any
 
-from core.utils import build_progress_path
+from core.catalog import get_catalog_entry, refresh_catalog
+from core.console import read_input, write_output
+from core.progress_store import count_pending_pairs, SQLITE_PROGRESS
+from core.timing import span
 
 
 VOCAB_DIR = Path("vocab")
 
-def select_vocab_file() -> Path:
-    """ Prompts the user to select a vocabulary file from available folders and files.
-    Returns the selected file path, or None if no files are found. """
+def select_vocab_files() -> List[Path]:
+    """ Prompts the user to select one or more vocabulary files, or a whole folder, from available folders and files.
+    Returns the selected file paths, or an empty list if no files are found. """
     
     grouped_files = get_grouped_vocab_files()
     if not grouped_files:
         display_no_files_found()
-        return None
+        return []
 
     folder = prompt_folder_selection(grouped_files)
-    file = prompt_file_selection(grouped_files[folder])
-    display_selected_file(file)
-    return file
+    files = prompt_file_selection(sorted(grouped_files[folder]))
+    display_selected_files(files)
+    return files
 
 def get_grouped_vocab_files() -> Dict[str, List[Path]]:
     """ Returns a dictionary grouping all .json vocab files by their folder names. """
@@ -31,9 +33,14 @@ def get_grouped_vocab_files() -> Dict[str, List[Path]]:
     return group_files_by_folder(files)
 
 def find_vocab_files() -> List[Path]:
-    """ Returns a list of all .json files in the VOCAB_DIR directory and subdirectories. """
+    """ Returns a list of all .json files in the VOCAB_DIR directory and subdirectories.
+    Refreshes the catalog so that only new or modified files are parsed again. """
     
-    return [file for file in VOCAB_DIR.rglob("*.json") if file.is_file()]
+    with span("scan_vocab_tree"):
+        files = [file for file in VOCAB_DIR.rglob("*.json") if file.is_file()]
+    with span("refresh_catalog"):
+        refresh_catalog(files)
+    return files
 
 def group_files_by_folder(files: List[Path]) -> Dict[str, List[Path]]:
     """ Groups a list of files by their parent folder names. """
@@ -49,7 +56,7 @@ def group_files_by_folder(files: List[Path]) -> Dict[str, List[Path]]:
 def display_no_files_found():
     """ Prints a message indicating no vocab files were found. """
     
-    print("⚠️ No vocab files found in the 'vocab/' directory.")
+    write_output("⚠️ No vocab files found in the 'vocab/' directory.")
 
 def prompt_folder_selection(grouped: Dict[str, List[Path]]) -> str:
     """ Prompts the user to select a folder from the available grouped folders.
@@ -63,74 +70,83 @@ def prompt_folder_selection(grouped: Dict[str, List[Path]]) -> str:
 def display_folders(folders: List[str]):
     """ Displays the available folders to the user. """
 
-    print("\n📁 Available Folders:")
+    write_output("\n📁 Available Folders:")
 
     for i, folder in enumerate(folders):
-        print(f"  [{i}] {folder}")
+        write_output(f"  [{i}] {folder}")
 
-def prompt_file_selection(files: List[Path]) -> Path:
-    """ Prompts the user to select a vocabulary file from the list.
-    Returns the selected file path. """
+def prompt_file_selection(files: List[Path]) -> List[Path]:
+    """ Prompts the user to select vocabulary files from the list: one number, several comma-separated numbers,
+    or 'a' for the whole folder. Returns the selected file paths. """
 
     display_files(files)
-    return get_valid_selection(files, "\nChoose a vocab set by number: ")
+    return get_valid_multi_selection(files, "\nChoose vocab sets by number (e.g. 0 or 0,2), or 'a' for all: ")
 
 def display_files(files: List[Path]):
     """ Displays the available vocabulary files with word count and progress info. """
     
-    print("\n📚 Vocabulary Files:")
+    write_output("\n📚 Vocabulary Files:")
 
     for i, file in enumerate(files):
         word_count = get_word_count(file)
         pending_count = get_pending_progress_count(file)
         info = f"🧠 {word_count} words"
 
+        if is_invalid_vocab_file(file):
+            info = "⚠️ invalid, run 'python -m core.validator'"
+
         if pending_count is not None:
             info += f" | 💾 {pending_count} pending"
-        print(f"  [{i}] {file.name} ({info})")
+        write_output(f"  [{i}] {file.name} ({info})")
 
 def get_valid_selection(options: List[Any], prompt: str) -> Any:
     """ Prompts the user to select an option by number and returns the selected item. """
 
     while True:
-        choice = input(prompt).strip()
+        choice = read_input(prompt).strip()
 
         if choice.isdigit() and 0 <= int(choice) < len(options):
             return options[int(choice)]
         
-        print("❌ Invalid choice. Please enter a valid number.")
+        write_output("❌ Invalid choice. Please enter a valid number.")
+
+def get_valid_multi_selection(options: List[Any], prompt: str) -> List[Any]:
+    """ Prompts the user to select options by comma-separated numbers, or all of them with 'a'.
+    Returns the selected items in the given order, without duplicates. """
+
+    while True:
+        choice = read_input(prompt).strip().lower()
+
+        if choice == "a":
+            return list(options)
+
+        numbers = [part.strip() for part in choice.split(",")]
+        if all(number.isdigit() and 0 <= int(number) < len(options) for number in numbers):
+            return [options[i] for i in sorted(set(map(int, numbers)))]
+
+        write_output("❌ Invalid choice. Please enter valid numbers separated by commas, or 'a'.")
 
 def get_word_count(file_path: Path) -> int:
-    """ Returns the number of words in the given vocabulary file. """
+    """ Returns the number of words in the given vocabulary file, as recorded in the catalog. """
 
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data: Dict[str, List[Any]] = load(f)
-        
-        return len(data.get("vocab", []))
-    
-    except Exception:
-        return 0
+    return get_catalog_entry(file_path)["words"]
+
+def is_invalid_vocab_file(file_path: Path) -> bool:
+    """ Returns True if the catalog could not parse the vocabulary file. """
+
+    return get_catalog_entry(file_path).get("invalid", False)
 
 def get_pending_progress_count(file_path: Path) -> int:
-    """ Returns the number of pending (not correct) translations in the progress file.
+    """ Returns the number of pending (not correct) translations in the progress file, as recorded in the catalog,
+    or queried from the progress database with the SQLite backend.
     Returns None if the progress file does not exist or cannot be read. """
 
-    progress_file = build_progress_path(file_path)
-
-    if not progress_file.exists():
-        return None
-    
-    try:
-        with open(progress_file, "r", encoding="utf-8") as f:
-            data: List[Dict[str, Any]] = load(f)
-        
-        return sum(1 for translation in data if not translation.get("correct", False))
-    
-    except Exception:
-        return None
+    if SQLITE_PROGRESS:
+        return count_pending_pairs(file_path)
+    return get_catalog_entry(file_path)["pending"]
 
-def display_selected_file(file: Path):
-    """ Prints the selected vocabulary file relative to VOCAB_DIR. """
+def display_selected_files(files: List[Path]):
+    """ Prints the selected vocabulary files relative to VOCAB_DIR. """
 
-    print(f"\n🔹 Selected: {file.relative_to(VOCAB_DIR)}\n")
\ No newline at end of file
+    names = ", ".join(str(file.relative_to(VOCAB_DIR)) for file in files)
+    write_output(f"\n🔹 Selected: {names}\n")
\ No newline at end of file
@@ -0,0 +1,79 @@
+""" Finds answers within a bounded edit distance of the user's input, using a BK-tree so only a fraction of the answers is compared. """
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.matching import normalize_answer
+
+
+def levenshtein(a: str, b: str) -> int:
+    """ Returns the number of single-character insertions, deletions and substitutions turning a into b. """
+
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+class BKNode:
+    __slots__ = ("key", "value", "children")
+
+    def __init__(self, key: str, value: str):
+        self.key = key
+        self.value = value
+        self.children: Dict[int, BKNode] = {}
+
+class BKTree:
+    """ Metric tree over edit distance. Each child is stored under its distance to the parent,
+    so a search only descends into children whose distance can still be within the limit. """
+
+    __slots__ = ("root",)
+
+    def __init__(self, items: Iterable[Tuple[str, str]] = ()):
+        self.root: Optional[BKNode] = None
+        for key, value in items:
+            self.add(key, value)
+
+    def add(self, key: str, value: str) -> None:
+        """ Inserts a key with its value, ignoring keys that are already present. """
+
+        if self.root is None:
+            self.root = BKNode(key, value)
+            return
+
+        node = self.root
+        while True:
+            distance = levenshtein(key, node.key)
+            if distance == 0:
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = BKNode(key, value)
+                return
+            node = child
+
+    def search(self, key: str, max_distance: int) -> List[Tuple[int, str]]:
+        """ Returns (distance, value) for every key within max_distance edits, closest first. """
+
+        matches = []
+        pending = [self.root] if self.root is not None else []
+
+        while pending:
+            node = pending.pop()
+            distance = levenshtein(key, node.key)
+            if distance <= max_distance:
+                matches.append((distance, node.value))
+            pending.extend(
+                child for child_distance, child in node.children.items()
+                if distance - max_distance <= child_distance <= distance + max_distance
+            )
+        return sorted(matches)
+
+def build_near_miss_index(texts: Iterable[str]) -> BKTree:
+    """ Returns a BK-tree of the normalized forms of the given answers, each mapped to its original text. """
+
+    return BKTree((normalize_answer(text), text) for text in texts)
@@ -0,0 +1,216 @@
+""" Drives quiz sessions without a terminal and reports throughput and per-stage latency.
+
+Answers come from a script (a file or any iterable of lines) or from a simulated learner with a configurable accuracy;
+output goes to a pluggable sink. The session runs in a temporary directory holding a copy of the vocab file, so its progress,
+catalog, compiled deck and answer events never touch the real data/ directory. Usage:
+
+    python -m core.headless vocab/french/colors.json --accuracy 0.8 --seed 1
+    python -m core.headless vocab/french/colors.json --answers answers.txt --output session.log
+"""
+
+from argparse import ArgumentParser
+from collections import defaultdict
+from contextlib import contextmanager
+from json import dumps
+from os import chdir
+from pathlib import Path
+from random import Random
+from shutil import copyfile
+from statistics import mean, quantiles
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from core.catalog import forget_catalog, get_deck_version
+from core.console import AnswerSource, OutputSink, reset_console, set_input_source, set_output_sink
+from core.events import close_event_log
+from core.loader import open_vocab_stream
+from core.progress_store import close_connection
+from core.results import run_results
+from core.session_state import build_session_pairs
+from core.timing import set_span_recorder
+from core.trainer import run_vocabulary_quiz
+from core.translations_selector import generate_translation_pairs
+from core.utils import get_relative_vocab_path, WordGroup
+
+
+class ScriptedAnswers:
+    """ Answers prompts with the given lines in order, and raises EOFError once they run out, like input() does. """
+
+    def __init__(self, lines: Iterable[str]):
+        self.lines = iter(lines)
+
+    def __call__(self, prompt: str, expected: Optional[WordGroup] = None) -> str:
+        try:
+            return next(self.lines).rstrip("\n")
+        except StopIteration:
+            raise EOFError("The answer script ran out of answers.") from None
+
+class SimulatedLearner:
+    """ Answers translation prompts correctly with the given probability and answers every yes/no prompt with 'y'.
+    Raises EOFError after max_answers translation answers, so low accuracies cannot run forever. """
+
+    def __init__(self, accuracy: float, seed: Optional[int] = None, max_answers: Optional[int] = None):
+        self.accuracy = accuracy
+        self.random = Random(seed)
+        self.max_answers = max_answers
+        self.answers = 0
+
+    def __call__(self, prompt: str, expected: Optional[WordGroup] = None) -> str:
+        if expected is None:
+            return "y"
+
+        if self.max_answers is not None and self.answers >= self.max_answers:
+            raise EOFError("The simulated learner reached its answer limit.")
+        self.answers += 1
+
+        if self.random.random() < self.accuracy:
+            return self.random.choice(expected.words).text.replace("*", "")
+        return "?"
+
+class LatencyRecorder:
+    """ Collects the duration of every span by stage name. """
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def __call__(self, name: str, start: float, duration: float) -> None:
+        self.durations[name].append(duration)
+
+    def summarize(self) -> Dict[str, Dict[str, float]]:
+        """ Returns count, mean, p50, p95 and max in microseconds for each stage. """
+
+        return {name: summarize_durations(durations) for name, durations in sorted(self.durations.items())}
+
+def summarize_durations(durations: List[float]) -> Dict[str, float]:
+    """ Returns count, mean, p50, p95 and max of the given durations, in microseconds. """
+
+    micros = [duration * 1e6 for duration in durations]
+    percentiles = quantiles(micros, n=100, method="inclusive") if len(micros) > 1 else micros * 99
+    return {
+        "count": len(micros),
+        "mean_us": round(mean(micros), 3),
+        "p50_us": round(percentiles[49], 3),
+        "p95_us": round(percentiles[94], 3),
+        "max_us": round(max(micros), 3)
+    }
+
+def discard_output(text: str) -> None:
+    """ Output sink that drops everything. """
+
+@contextmanager
+def temporary_data_root(file_path: Path) -> Iterator[None]:
+    """ Runs the enclosed code in a temporary working directory that only holds a copy of the vocab file, at the same path
+    inside vocab/, so everything the session writes under data/ is discarded afterwards.
+    Open event log, catalog and progress database handles are closed on both sides of the switch. """
+
+    source = Path(file_path).resolve()
+    relative = get_relative_vocab_path(Path(file_path))
+    previous = Path.cwd()
+
+    with TemporaryDirectory(prefix="vocab-headless-") as root:
+        copy = Path(root) / "vocab" / relative
+        copy.parent.mkdir(parents=True)
+        copyfile(source, copy)
+        release_data_handles()
+        chdir(root)
+        try:
+            yield
+        finally:
+            release_data_handles()
+            chdir(previous)
+
+def release_data_handles() -> None:
+    """ Closes the event log and the progress database and drops the in-memory catalog, which all refer to the current data/ directory. """
+
+    close_event_log()
+    close_connection()
+    forget_catalog()
+
+def run_headless_session(file_path: Path, source: AnswerSource, sink: OutputSink = discard_output,
+                         mode: Optional[str] = None, session_mode: str = "rounds") -> Dict[str, Any]:
+    """ Runs a full quiz and results phase on a fresh session of the vocab file, with answers from source and output to sink.
+    The vocab file must be inside vocab/; the session runs under a temporary data root, so saved progress and the answer history are left untouched.
+    mode is the prompt language or 'random' (defaults to the first language).
+    Returns a report with the number of questions, the throughput and the latency of each stage. """
+
+    recorder = LatencyRecorder()
+    set_input_source(source)
+    set_output_sink(sink)
+    set_span_recorder(recorder)
+    completed = True
+    start = perf_counter()
+
+    try:
+        with temporary_data_root(file_path):
+            run_session(Path(file_path), mode, session_mode)
+    except EOFError:
+        completed = False
+    finally:
+        elapsed = perf_counter() - start
+        reset_console()
+        set_span_recorder(None)
+
+    questions = len(recorder.durations["check"])
+    return {
+        "file": Path(file_path).as_posix(),
+        "session_mode": session_mode,
+        "completed": completed,
+        "questions": questions,
+        "seconds": round(elapsed, 6),
+        "questions_per_second": round(questions / elapsed, 1) if elapsed else 0.0,
+        "stages": recorder.summarize()
+    }
+
+def run_session(file_path: Path, mode: Optional[str], session_mode: str) -> None:
+    """ Loads a fresh session of the vocab file and runs the quiz and results phases on it. """
+
+    deck_versions = {file_path: get_deck_version(file_path)}
+    vocab_data = open_vocab_stream(file_path)
+    pairs = build_session_pairs(generate_translation_pairs(vocab_data, mode or vocab_data.languages[0]))
+    run_vocabulary_quiz(pairs, [vocab_data.source], session_mode, deck_versions)
+    run_results(pairs, [vocab_data.source])
+
+def display_report(report: Dict[str, Any]) -> None:
+    """ Prints a readable summary of a headless session report. """
+
+    status = "completed" if report["completed"] else "stopped early"
+    print(f"{report['file']} ({report['session_mode']}, {status})")
+    print(f"  {report['questions']} questions in {report['seconds']:.3f}s ({report['questions_per_second']} q/s)")
+    for name, stats in report["stages"].items():
+        print(f"  {name:<8} n={stats['count']:<8} p50={stats['p50_us']:.1f}µs p95={stats['p95_us']:.1f}µs max={stats['max_us']:.1f}µs")
+
+def main() -> None:
+    """ Parses the command line and runs a headless session. """
+
+    parser = ArgumentParser(description="Run a quiz session without a terminal and report throughput and latency.")
+    parser.add_argument("file", type=Path, help="vocab file, inside the vocab/ directory")
+    parser.add_argument("--answers", type=Path, help="file with one scripted answer per line")
+    parser.add_argument("--accuracy", type=float, default=0.8, help="accuracy of the simulated learner")
+    parser.add_argument("--seed", type=int, help="random seed of the simulated learner")
+    parser.add_argument("--max-answers", type=int, help="stop the simulated learner after this many answers")
+    parser.add_argument("--mode", help="prompt language or 'random' (defaults to the first language)")
+    parser.add_argument("--session", choices=["rounds", "leitner"], default="rounds")
+    parser.add_argument("--output", type=Path, help="write session output to this file instead of discarding it")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.answers:
+        source = ScriptedAnswers(args.answers.read_text(encoding="utf-8").splitlines())
+    else:
+        source = SimulatedLearner(args.accuracy, args.seed, args.max_answers)
+
+    output_file = args.output.open("w", encoding="utf-8") if args.output else None
+    try:
+        report = run_headless_session(args.file, source, output_file.write if output_file else discard_output, args.mode, args.session)
+    finally:
+        if output_file:
+            output_file.close()
+
+    if args.json:
+        print(dumps(report, indent=2))
+    else:
+        display_report(report)
+
+if __name__ == "__main__":
+    main()
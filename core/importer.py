@@ -0,0 +1,329 @@
+""" Imports word lists from CSV/TSV files and flashcard exports into the JSON deck format, streaming rows in chunks.
+
+Rows are read and written a chunk at a time, so memory stays bounded whatever the size of the input.
+Columns are mapped to categories, cells are split into synonyms, and large inputs can be sharded into several decks
+of one folder under vocab/, which the file selector then lists together. The decks an import writes are recorded in a
+manifest next to them, '.<stem>.import', so importing the same input again replaces exactly those decks and removes the
+ones it no longer writes; an existing deck that no import of this input wrote is never overwritten unless --force is given.
+Usage:
+
+    python -m core.importer words.csv --name spanish/core
+    python -m core.importer export.tsv --name spanish/core --columns "English=en,Spanish=es" --shard-size 5000
+    python -m core.importer anki.txt --name japanese/anki --no-header --columns "0=jp,1=en"
+
+Leading '#key:value' lines of Anki text exports are honoured: '#separator' sets the delimiter and '#columns' names the columns.
+"""
+
+from argparse import ArgumentParser
+from csv import Error as CsvError, reader as csv_reader, Sniffer
+from itertools import islice
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from re import compile as compile_pattern, escape
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Set, TextIO, Tuple
+
+
+VOCAB_DIR = Path("vocab")
+
+CHUNK_ROWS = 10000
+SNIFF_SAMPLE_SIZE = 64 * 1024
+DEFAULT_SYNONYM_SEPARATORS = ";|"
+SNIFF_DELIMITERS = ",;\t|"
+TAB_SUFFIXES = (".tsv", ".tab")
+MANIFEST_SUFFIX = ".import"
+ANKI_SEPARATORS = {"comma": ",", "semicolon": ";", "tab": "\t", "space": " ", "pipe": "|", "colon": ":"}
+
+Entry = List[List[str]]
+
+class DeckWriter:
+    """ Writes a deck file entry by entry: the categories first, then each entry as it comes.
+    The deck is written to a temporary file and renamed over the target once complete, so a failed import leaves no partial deck. """
+
+    def __init__(self, path: Path, categories: List[str]):
+        self.path = path
+        self.temp_path = path.with_suffix(".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = self.temp_path.open("w", encoding="utf-8")
+        self.file.write(f'{{"categories": {dumps(categories, ensure_ascii=False)}, "vocab": [')
+        self.count = 0
+
+    def write(self, entries: Iterable[Entry]) -> None:
+        """ Appends entries to the deck, one per line. """
+
+        for entry in entries:
+            self.file.write(("," if self.count else "") + "\n  " + dumps(entry, ensure_ascii=False))
+            self.count += 1
+
+    def close(self) -> None:
+        """ Completes the deck and moves it into place. """
+
+        self.file.write("\n]}\n")
+        self.file.close()
+        replace(self.temp_path, self.path)
+
+    def abort(self) -> None:
+        """ Discards the incomplete deck. """
+
+        self.file.close()
+        self.temp_path.unlink(missing_ok=True)
+
+def read_directives(f: TextIO) -> Dict[str, str]:
+    """ Reads the leading '#key:value' lines of an Anki text export and leaves the file at the first row. """
+
+    directives = {}
+    while True:
+        position = f.tell()
+        line = f.readline()
+        if not line.startswith("#") or ":" not in line:
+            f.seek(position)
+            return directives
+        key, _, value = line[1:].rstrip("\r\n").partition(":")
+        directives[key.strip().lower()] = value
+
+def detect_delimiter(f: TextIO, file_path: Path, directives: Dict[str, str]) -> str:
+    """ Returns the delimiter given by an Anki '#separator' directive, a tab for .tsv files,
+    or the one sniffed from the start of the file, defaulting to a comma. """
+
+    separator = directives.get("separator", "").strip().lower()
+    if separator:
+        return ANKI_SEPARATORS.get(separator, separator)
+    if file_path.suffix.lower() in TAB_SUFFIXES:
+        return "\t"
+
+    position = f.tell()
+    sample = f.read(SNIFF_SAMPLE_SIZE)
+    f.seek(position)
+    try:
+        return Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+    except CsvError:
+        return ","
+
+def parse_column_mapping(mapping: Optional[str], header: List[str]) -> Tuple[List[int], List[str]]:
+    """ Returns the indexes of the imported columns and their categories, from a mapping such as 'English=en,2=es'.
+    Columns are given by header name or 0-based index; without mapping, every column is imported under its header name.
+    Raises an error for unknown columns and for mappings with fewer than two or duplicate categories. """
+
+    if mapping is None:
+        if not header:
+            raise ValueError("Without a header row, --columns must map column indexes to categories, e.g. '0=en,1=es'.")
+        pairs = [(str(i), name.strip()) for i, name in enumerate(header)]
+    else:
+        pairs = [tuple(part.strip() for part in item.split("=", 1)) if "=" in item else (item.strip(), item.strip())
+                 for item in mapping.split(",") if item.strip()]
+
+    indexes, categories = [], []
+    for column, categorie in pairs:
+        if column in header:
+            indexes.append(header.index(column))
+        elif column.isdigit():
+            indexes.append(int(column))
+        else:
+            raise ValueError(f"Unknown column: {column}")
+        categories.append(categorie)
+
+    if len(categories) < 2 or not all(categories):
+        raise ValueError("At least two columns must be mapped to non-empty categories.")
+    if len(set(categories)) != len(categories):
+        raise ValueError("The same category is mapped twice.")
+    return indexes, categories
+
+def build_synonym_pattern(separators: str) -> Pattern:
+    """ Returns the pattern splitting a cell into synonyms at any of the separator characters. """
+
+    return compile_pattern("[" + "".join(escape(separator) for separator in separators) + "]")
+
+def split_synonyms(cell: str, pattern: Optional[Pattern]) -> List[str]:
+    """ Returns the non-empty synonyms of a cell, with repeated whitespace collapsed.
+    '*' markers are dropped from words where they are unbalanced, since they would not render. """
+
+    parts = pattern.split(cell) if pattern is not None else [cell]
+    words = []
+    for part in parts:
+        word = " ".join(part.split())
+        if word.count("*") % 2:
+            word = word.replace("*", "")
+        if word:
+            words.append(word)
+    return words
+
+def build_entry(row: List[str], indexes: List[int], pattern: Optional[Pattern]) -> Optional[Entry]:
+    """ Returns the entry of a row, or None if a mapped column is missing or has no word. """
+
+    entry = []
+    for i in indexes:
+        if i >= len(row):
+            return None
+        words = split_synonyms(row[i], pattern)
+        if not words:
+            return None
+        entry.append(words)
+    return entry
+
+def iter_chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """ Yields lists of at most size consecutive rows. """
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_entry_chunks(rows: Iterable[List[str]], indexes: List[int], pattern: Optional[Pattern], chunk_rows: int,
+                      counts: Dict[str, int]) -> Iterator[List[Entry]]:
+    """ Yields the entries of each chunk of rows, counting the rows read and the rows skipped in counts. """
+
+    for chunk in iter_chunks(rows, chunk_rows):
+        entries = [entry for entry in (build_entry(row, indexes, pattern) for row in chunk) if entry is not None]
+        counts["rows"] += len(chunk)
+        counts["skipped"] += len(chunk) - len(entries)
+        yield entries
+
+def get_deck_path(output_dir: Path, stem: str, shard: Optional[int]) -> Path:
+    """ Returns the path of the deck, or of one numbered shard of it. """
+
+    return output_dir / (f"{stem}.json" if shard is None else f"{stem}_{shard:04d}.json")
+
+def write_decks(entries: Iterable[List[Entry]], categories: List[str], output_dir: Path, stem: str, shard_size: int) -> List[Path]:
+    """ Writes chunks of entries to one deck, or to numbered shards of shard_size entries when shard_size is positive.
+    Returns the paths of the written decks. Without any entry, nothing is written. """
+
+    written: List[Path] = []
+    writer: Optional[DeckWriter] = None
+    try:
+        for chunk in entries:
+            while chunk:
+                if writer is None:
+                    writer = DeckWriter(get_deck_path(output_dir, stem, len(written) + 1 if shard_size > 0 else None), categories)
+                room = shard_size - writer.count if shard_size > 0 else len(chunk)
+                writer.write(chunk[:room])
+                chunk = chunk[room:]
+                if shard_size > 0 and writer.count >= shard_size:
+                    writer.close()
+                    written.append(writer.path)
+                    writer = None
+        if writer is not None:
+            writer.close()
+            written.append(writer.path)
+            writer = None
+    finally:
+        if writer is not None:
+            writer.abort()
+    return written
+
+def get_manifest_path(output_dir: Path, stem: str) -> Path:
+    """ Returns the path of the manifest recording the decks written by the last import of an input. """
+
+    return output_dir / f".{stem}{MANIFEST_SUFFIX}"
+
+def read_import_manifest(output_dir: Path, stem: str) -> Set[Path]:
+    """ Returns the decks written by the last import of the input, or an empty set if it was never imported here. """
+
+    try:
+        return {output_dir / name for name in loads(get_manifest_path(output_dir, stem).read_text(encoding="utf-8"))}
+    except (OSError, ValueError):
+        return set()
+
+def write_import_manifest(output_dir: Path, stem: str, written: List[Path]) -> None:
+    """ Records the decks written by this import of the input. """
+
+    get_manifest_path(output_dir, stem).write_text(dumps([path.name for path in written], ensure_ascii=False), encoding="utf-8")
+
+def check_existing_decks(output_dir: Path, stem: str, shard_size: int, imported: Set[Path]) -> None:
+    """ Raises an error if a deck the import may write already exists and was not written by a previous import of the input. """
+
+    if shard_size > 0:
+        candidates = set(output_dir.glob(f"{stem}_[0-9][0-9][0-9][0-9].json"))
+    else:
+        candidates = {path for path in [get_deck_path(output_dir, stem, None)] if path.exists()}
+    conflicts = sorted(candidates - imported)
+    if conflicts:
+        raise ValueError(f"Refusing to overwrite existing deck(s) not written by a previous import: "
+                         f"{', '.join(path.as_posix() for path in conflicts)}. Use --force to overwrite them.")
+
+def remove_stale_decks(imported: Set[Path], written: List[Path]) -> None:
+    """ Removes the decks of the previous import of the same input that this import did not write again. """
+
+    for path in imported - set(written):
+        path.unlink(missing_ok=True)
+
+def import_word_list(file_path: Path, name: str, columns: Optional[str] = None, has_header: bool = True,
+                     delimiter: Optional[str] = None, synonym_separators: str = DEFAULT_SYNONYM_SEPARATORS,
+                     shard_size: int = 0, encoding: str = "utf-8-sig", chunk_rows: int = CHUNK_ROWS, force: bool = False) -> Dict[str, Any]:
+    """ Imports a CSV/TSV word list into vocab/<name>/ and returns a report of the rows read, entries written,
+    rows skipped and decks written. Decks of the previous import of the same input that are not written again are removed.
+    Raises an error if the columns cannot be mapped, or if a deck it may write exists but was not written
+    by a previous import of the input, unless force is True. """
+
+    output_dir = VOCAB_DIR / name
+    imported = read_import_manifest(output_dir, file_path.stem)
+    if not force:
+        check_existing_decks(output_dir, file_path.stem, shard_size, imported)
+    pattern = build_synonym_pattern(synonym_separators) if synonym_separators else None
+    counts = {"rows": 0, "skipped": 0}
+
+    with file_path.open("r", encoding=encoding, newline="") as f:
+        directives = read_directives(f)
+        rows = csv_reader(f, delimiter=delimiter or detect_delimiter(f, file_path, directives))
+        if "columns" in directives:
+            header = [column.strip() for column in next(csv_reader([directives["columns"]], delimiter=rows.dialect.delimiter), [])]
+        else:
+            header = [column.strip() for column in next(rows, [])] if has_header else []
+        indexes, categories = parse_column_mapping(columns, header)
+
+        files = write_decks(iter_entry_chunks(rows, indexes, pattern, chunk_rows, counts), categories, output_dir, file_path.stem, shard_size)
+
+    if files:
+        remove_stale_decks(imported, files)
+        write_import_manifest(output_dir, file_path.stem, files)
+
+    return {
+        "input": file_path.as_posix(),
+        "categories": categories,
+        "rows": counts["rows"],
+        "entries": counts["rows"] - counts["skipped"],
+        "skipped": counts["skipped"],
+        "decks": [path.as_posix() for path in files]
+    }
+
+def display_report(report: Dict[str, Any]) -> None:
+    """ Prints a readable summary of an import. """
+
+    if not report["decks"]:
+        print(f"❌ No entries found in {report['input']}; nothing was written.")
+        return
+    print(f"✅ Imported {report['entries']} entries ({', '.join(report['categories'])}) from {report['input']}")
+    if report["skipped"]:
+        print(f"⚠️ Skipped {report['skipped']} of {report['rows']} rows with a missing or empty column.")
+    for path in report["decks"]:
+        print(f"  • {path}")
+
+def main() -> None:
+    """ Parses the command line and imports the word list. """
+
+    parser = ArgumentParser(description="Import a CSV/TSV word list or flashcard export as vocab decks.")
+    parser.add_argument("file", type=Path, help="CSV, TSV or text export to import")
+    parser.add_argument("--name", required=True, help="folder inside vocab/ to write the decks to, e.g. spanish/core")
+    parser.add_argument("--columns", help="columns to import and their categories, e.g. 'English=en,Spanish=es' or '0=en,1=es'")
+    parser.add_argument("--no-header", action="store_true", help="the first row is a word row, not column names")
+    parser.add_argument("--delimiter", help="field delimiter (detected by default)")
+    parser.add_argument("--synonyms", default=DEFAULT_SYNONYM_SEPARATORS, help="characters separating synonyms in a cell ('' to disable)")
+    parser.add_argument("--shard-size", type=int, default=0, help="split into decks of at most this many entries")
+    parser.add_argument("--encoding", default="utf-8-sig", help="input encoding")
+    parser.add_argument("--force", action="store_true", help="overwrite existing decks that were not written by a previous import")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = import_word_list(args.file, args.name, args.columns, not args.no_header, args.delimiter, args.synonyms,
+                                  args.shard_size, args.encoding, force=args.force)
+    except ValueError as error:
+        parser.exit(1, f"❌ {error}\n")
+    if args.json:
+        print(dumps(report, indent=2, ensure_ascii=False))
+    else:
+        display_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+""" Records quiz answers in an append-only journal next to the progress file, so each answer is persisted without rewriting the whole snapshot. """
+
+from json import dumps
+from os import fsync
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from core.catalog import DeckVersion, get_deck_version, record_pending_count
+from core.progress_format import count_pending_entries, ProgressSnapshot
+from core.progress_store import commit_progress, record_pair, SQLITE_PROGRESS
+from core.saver import build_progress_snapshot, ensure_directory_exists, save_failed_translations, save_progress_snapshot
+from core.study_window import StudyWindow
+from core.utils import build_journal_path, TranslationPair
+
+
+FSYNC_BATCH_SIZE = 32
+MIN_COMPACTION_RECORDS = 1000
+
+CheckpointState = Tuple[Optional[int], Optional[ProgressSnapshot]]
+
+class ProgressJournal:
+    """ Appends one compact record per answered question to the journal of a vocabulary file.
+    Records hold absolute values, so replaying a record twice is harmless.
+    The deck of a study window also has a base snapshot, holding its retired entries, that compaction writes the pairs over.
+    version is the content hash and entry count of the vocab file the pairs were loaded from. """
+
+    def __init__(self, pairs: List[TranslationPair], file_path: Path, base: Optional[ProgressSnapshot] = None,
+                 version: Optional[DeckVersion] = None):
+        self.pairs = pairs
+        self.file_path = file_path
+        self.base = base
+        self.version = version
+        self.journal_path = build_journal_path(file_path)
+        self.file: Optional[TextIO] = None
+        self.records = 0
+        self.unsynced = 0
+
+    def record(self, pair: TranslationPair) -> None:
+        """ Appends the current attempts and correctness of a pair, keyed by its vocab entry index,
+        syncing to disk once a batch is complete. """
+
+        if self.file is None:
+            ensure_directory_exists(self.journal_path)
+            self.file = self.journal_path.open("a", encoding="utf-8")
+
+        self.file.write(dumps({"i": pair.entry_index, "a": pair.attempts, "c": int(pair.correct)}, separators=(",", ":")) + "\n")
+        self.records += 1
+        self.unsynced += 1
+        if self.unsynced >= FSYNC_BATCH_SIZE:
+            self.sync()
+
+    def sync(self) -> None:
+        """ Flushes buffered records and forces them to disk. """
+
+        if self.file is not None and self.unsynced:
+            self.file.flush()
+            fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def capture(self) -> ProgressSnapshot:
+        """ Returns the progress of the deck as it is now, as a snapshot that later answers do not change. """
+
+        return build_progress_snapshot(self.pairs, self.file_path, self.base, self.version)
+
+    def capture_checkpoint(self, pending: Optional[int] = None) -> CheckpointState:
+        """ Returns what a checkpoint writes, taken from the pairs now: a snapshot once the journal holds more records
+        than the snapshot has pairs, otherwise the pending count, counted from the pairs unless the caller already knows it. """
+
+        if self.records > max(MIN_COMPACTION_RECORDS, len(self.pairs)):
+            return None, self.capture()
+        if self.base is not None:
+            return count_pending_entries(self.base), None
+        return (count_pending(self.pairs) if pending is None else pending), None
+
+    def checkpoint(self, pending: Optional[int] = None, snapshot: Optional[ProgressSnapshot] = None) -> None:
+        """ Syncs the journal, then compacts it into the given snapshot or records the pending count in the catalog.
+        Without either, they are captured from the pairs now. """
+
+        if pending is None and snapshot is None:
+            pending, snapshot = self.capture_checkpoint()
+        self.sync()
+        if snapshot is not None:
+            self.compact(snapshot)
+        else:
+            record_pending_count(self.file_path, pending)
+
+    def compact(self, snapshot: Optional[ProgressSnapshot] = None) -> None:
+        """ Atomically rewrites the snapshot, from the current pairs unless a captured snapshot is given, then removes the journal. """
+
+        self.close()
+        if snapshot is None:
+            save_failed_translations(self.pairs, self.file_path, self.base, self.version)
+        else:
+            save_progress_snapshot(snapshot, self.file_path)
+        self.journal_path.unlink(missing_ok=True)
+        self.records = 0
+
+    def close(self) -> None:
+        """ Syncs and closes the journal file. """
+
+        self.sync()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class StoreJournal:
+    """ Counterpart of ProgressJournal for the SQLite progress backend: each answer updates the row of its pair,
+    and updates are committed in batches. """
+
+    def __init__(self, pairs: List[TranslationPair], file_path: Path, base: Optional[ProgressSnapshot] = None,
+                 version: Optional[DeckVersion] = None):
+        self.pairs = pairs
+        self.file_path = file_path
+        self.base = base
+        self.version = version
+        self.unsynced = 0
+
+    def record(self, pair: TranslationPair) -> None:
+        """ Updates the row of the pair, committing once a batch is complete. """
+
+        record_pair(self.file_path, pair)
+        self.unsynced += 1
+        if self.unsynced >= FSYNC_BATCH_SIZE:
+            self.sync()
+
+    def sync(self) -> None:
+        """ Commits the pending row updates. """
+
+        if self.unsynced:
+            commit_progress()
+        self.unsynced = 0
+
+    def capture(self) -> ProgressSnapshot:
+        """ Returns the progress of the deck as it is now, as a snapshot that later answers do not change. """
+
+        return build_progress_snapshot(self.pairs, self.file_path, self.base, self.version)
+
+    def capture_checkpoint(self, pending: Optional[int] = None) -> CheckpointState:
+        """ Returns what a checkpoint writes: nothing, since rows are updated in place and pending counts are queried from the database. """
+
+        return None, None
+
+    def checkpoint(self, pending: Optional[int] = None, snapshot: Optional[ProgressSnapshot] = None) -> None:
+        """ Commits the pending row updates; pending counts are queried from the database, so nothing else is kept. """
+
+        self.sync()
+
+    def compact(self, snapshot: Optional[ProgressSnapshot] = None) -> None:
+        """ Replaces the deck's rows with the current pairs, or with the rows of a captured snapshot. """
+
+        self.sync()
+        if snapshot is None:
+            save_failed_translations(self.pairs, self.file_path, self.base, self.version)
+        else:
+            save_progress_snapshot(snapshot, self.file_path)
+
+    def close(self) -> None:
+        """ Commits the pending row updates. """
+
+        self.sync()
+
+def count_pending(pairs: List[TranslationPair]) -> int:
+    """ Returns the number of pairs that are not answered correctly yet. """
+
+    return sum(1 for pair in pairs if not pair.correct)
+
+class SessionJournal:
+    """ Routes the answers of a session, which may span several decks, to the journal of each pair's vocab file.
+    The journal of each deck of a study window shares the deck's list of pairs and its snapshot of retired entries.
+    versions holds the content hash and entry count of each vocab file as captured before its pairs were loaded;
+    files missing from it are read from the catalog now. """
+
+    def __init__(self, pairs: List[TranslationPair], files: List[Path], versions: Optional[Dict[Path, DeckVersion]] = None):
+        journal_class = StoreJournal if SQLITE_PROGRESS else ProgressJournal
+        if isinstance(pairs, StudyWindow):
+            self.journals = {deck.file_path: journal_class(deck.pairs, deck.file_path, deck.snapshot) for deck in pairs.decks}
+            return
+
+        pairs_by_file: Dict[Path, List[TranslationPair]] = {file: [] for file in files}
+        for pair in pairs:
+            pairs_by_file[pair.source].append(pair)
+        versions = versions or {}
+        self.journals = {
+            file: journal_class(deck_pairs, file, version=versions.get(file) or get_deck_version(file))
+            for file, deck_pairs in pairs_by_file.items()
+        }
+
+    def record(self, pair: TranslationPair) -> None:
+        """ Appends the pair's answer to the journal of its vocab file. """
+
+        self.journals[pair.source].record(pair)
+
+    def capture_checkpoint(self, pending: Optional[int] = None) -> Dict[Path, CheckpointState]:
+        """ Returns what the checkpoint of each deck's journal writes, taken from the pairs now.
+        A session-wide pending count is only used when there is a single deck. """
+
+        return {file: journal.capture_checkpoint(pending if len(self.journals) == 1 else None) for file, journal in self.journals.items()}
+
+    def checkpoint(self, pending: Optional[int] = None, captured: Optional[Dict[Path, CheckpointState]] = None) -> None:
+        """ Checkpoints every deck's journal, with the states captured earlier or, without them, with states captured now. """
+
+        captured = captured or self.capture_checkpoint(pending)
+        for file, journal in self.journals.items():
+            journal.checkpoint(*captured[file])
+
+    def replace_deck(self, file_path: Path, pairs: List[TranslationPair], version: DeckVersion) -> None:
+        """ Replaces the pairs and version of a deck whose vocab file was reloaded. """
+
+        journal = self.journals[file_path]
+        journal.pairs = pairs
+        journal.version = version
+
+    def reload_deck(self, file_path: Path, pairs: List[TranslationPair], version: DeckVersion) -> None:
+        """ Replaces the pairs and version of a deck whose vocab file was reloaded and rewrites its snapshot,
+        since the entry indexes in its journal no longer match the file. """
+
+        self.replace_deck(file_path, pairs, version)
+        self.journals[file_path].compact()
+
+    def capture(self) -> Dict[Path, ProgressSnapshot]:
+        """ Returns the progress of every deck as it is now, as snapshots that later answers do not change. """
+
+        return {file: journal.capture() for file, journal in self.journals.items()}
+
+    def compact(self, snapshots: Optional[Dict[Path, ProgressSnapshot]] = None) -> None:
+        """ Rewrites every deck's snapshot, from the current pairs unless captured snapshots are given, and removes its journal. """
+
+        for file, journal in self.journals.items():
+            journal.compact(snapshots[file] if snapshots is not None else None)
+
+    def close(self) -> None:
+        """ Syncs and closes every deck's journal. """
+
+        for journal in self.journals.values():
+            journal.close()
+
+def open_progress_journal(pairs: List[TranslationPair], files: List[Path], versions: Optional[Dict[Path, DeckVersion]] = None) -> SessionJournal:
+    """ Starts journaling a session: writes a fresh snapshot of each deck's pairs and discards any previous journal. """
+
+    journal = SessionJournal(pairs, files, versions)
+    journal.compact()
+    return journal
@@ -0,0 +1,120 @@
+""" Encodes and decodes the JSON files of the trainer through the fastest available backend.
+
+msgspec is used when it is installed, then orjson, then the standard library. With msgspec, vocab files and progress
+snapshots are decoded straight into typed structs for their schemas, so no dictionary is built for them and their
+structure is checked while decoding. Set VOCAB_TRAINER_JSON_BACKEND to msgspec, orjson or json to pick a backend
+(an unavailable one falls back to the default), and VOCAB_TRAINER_JSON_PRETTY=1 to write indented progress files. """
+
+import json
+from os import environ
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from core.progress_format import decode_snapshot, decode_snapshot_columns, is_snapshot_data, PROGRESS_FORMAT, ProgressSnapshot
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+JSON_PRETTY = environ.get("VOCAB_TRAINER_JSON_PRETTY", "0") == "1"
+
+JSON_INDENT = 2
+
+RawEntry = List[List[str]]
+
+if msgspec is not None:
+    class VocabDocument(msgspec.Struct):
+        """ The schema of a vocab file: its categories and the word lists of each entry. """
+
+        categories: List[str]
+        vocab: List[RawEntry]
+
+    class ProgressDocument(msgspec.Struct, tag_field="format", tag=PROGRESS_FORMAT):
+        """ The schema of a progress snapshot, as written by encode_snapshot. """
+
+        deck_hash: str
+        entries: int
+        directions: str
+        attempts: str
+        correct: str
+        window: Optional[Dict[str, Any]] = None
+
+    VOCAB_DECODER = msgspec.json.Decoder(VocabDocument)
+    PROGRESS_DECODER = msgspec.json.Decoder(Union[ProgressDocument, List[Dict[str, Any]]])
+    JSON_DECODER = msgspec.json.Decoder()
+    JSON_ENCODER = msgspec.json.Encoder()
+
+def get_json_backend(requested: str) -> str:
+    """ Returns the requested backend if it is available, otherwise the fastest available one. """
+
+    available = [name for name, module in (("msgspec", msgspec), ("orjson", orjson)) if module is not None] + ["json"]
+    return requested if requested in available else available[0]
+
+JSON_BACKEND = get_json_backend(environ.get("VOCAB_TRAINER_JSON_BACKEND", "auto"))
+
+def decode_json(content: Union[bytes, str]) -> Any:
+    """ Decodes a JSON document into dictionaries and lists. Raises a ValueError if it is not valid JSON. """
+
+    if JSON_BACKEND == "msgspec":
+        try:
+            return JSON_DECODER.decode(content)
+        except msgspec.DecodeError as error:
+            raise ValueError(str(error)) from error
+    if JSON_BACKEND == "orjson":
+        return orjson.loads(content)
+    return json.loads(content)
+
+def encode_json(data: Any, pretty: bool = False) -> bytes:
+    """ Encodes data as UTF-8 JSON, compact unless pretty is True, in which case it is indented. """
+
+    if JSON_BACKEND == "msgspec":
+        encoded = JSON_ENCODER.encode(data)
+        return msgspec.json.format(encoded, indent=JSON_INDENT) if pretty else encoded
+    if JSON_BACKEND == "orjson":
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=JSON_INDENT).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def decode_vocab(content: Union[bytes, str]) -> Tuple[List[str], List[RawEntry]]:
+    """ Decodes a vocab file and returns its categories and the raw word lists of its entries.
+    Raises a ValueError if it is not valid JSON or if the required keys are missing. """
+
+    if JSON_BACKEND == "msgspec":
+        try:
+            document = VOCAB_DECODER.decode(content)
+        except msgspec.DecodeError as error:
+            raise ValueError(f"Invalid JSON vocab: {error}") from error
+        return document.categories, document.vocab
+
+    data_json = decode_json(content)
+    if not isinstance(data_json, dict) or "categories" not in data_json or "vocab" not in data_json:
+        raise ValueError("JSON vocab must contain 'categories' and 'vocab' keys.")
+    return data_json["categories"], data_json["vocab"]
+
+def decode_progress(content: Union[bytes, str]) -> Union[ProgressSnapshot, List[Dict[str, Any]]]:
+    """ Decodes a progress file: returns a ProgressSnapshot for the column format and the list of dictionaries
+    of the original format. Raises a ValueError if it is neither. """
+
+    if JSON_BACKEND == "msgspec":
+        try:
+            document = PROGRESS_DECODER.decode(content)
+        except msgspec.DecodeError as error:
+            raise ValueError(f"Invalid progress file: {error}") from error
+        if isinstance(document, list):
+            return document
+        return decode_snapshot_columns(document.deck_hash, document.entries, document.directions, document.attempts,
+                                       document.correct, document.window)
+
+    data = decode_json(content)
+    if is_snapshot_data(data):
+        return decode_snapshot(data)
+    if not isinstance(data, list):
+        raise ValueError("Invalid progress file: unknown format.")
+    return data
@@ -0,0 +1,120 @@
+""" Incrementally reads JSON documents from files so large arrays can be walked item by item. """
+
+from json import JSONDecodeError, JSONDecoder
+from typing import Any, Iterator, TextIO
+
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+NUMBER_CHARS = "0123456789.eE+-"
+
+class JsonStreamReader:
+    """ Reads JSON values from a text file while keeping only a small window of the file in memory. """
+
+    def __init__(self, file: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+
+    def fill(self) -> bool:
+        """ Drops the consumed part of the buffer and appends the next chunk of the file.
+        Returns False once the end of the file is reached. """
+
+        chunk = self.file.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """ Returns the next non-whitespace character without consuming it, or an empty string at the end of the file. """
+
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def next_char(self) -> str:
+        """ Consumes and returns the next non-whitespace character. """
+
+        char = self.peek()
+        self.pos += len(char)
+        return char
+
+    def expect(self, expected: str) -> None:
+        """ Consumes the next non-whitespace character and checks that it is the expected one. """
+
+        char = self.next_char()
+        if char != expected:
+            raise ValueError(f"Invalid JSON: expected '{expected}' but found '{char or 'end of file'}'.")
+
+    def read_value(self) -> Any:
+        """ Decodes and returns the next complete JSON value, reading more of the file as needed. """
+
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            if self.is_cut_off(value, end) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def is_cut_off(self, value: Any, end: int) -> bool:
+        """ Returns True if a value decoded up to end may continue in the next chunk: it reaches the end of the buffer,
+        or it is a number followed by a character that can only continue a number (as in "-0." or "1e"). """
+
+        if end == len(self.buffer):
+            return True
+        is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+        return is_number and self.buffer[end] in NUMBER_CHARS
+
+    def skip_value(self) -> None:
+        """ Consumes the next JSON value, walking arrays item by item so they are never held in memory. """
+
+        if self.peek() == "[":
+            for _ in iter_array_items(self):
+                pass
+        else:
+            self.read_value()
+
+def iter_object_keys(reader: JsonStreamReader) -> Iterator[str]:
+    """ Yields the keys of the JSON object at the reader position.
+    The caller must consume the value of each key before asking for the next one. """
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.next_char()
+        return
+
+    while True:
+        key = reader.read_value()
+        reader.expect(":")
+        yield key
+        separator = reader.next_char()
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError("Invalid JSON: expected ',' or '}' in object.")
+
+def iter_array_items(reader: JsonStreamReader) -> Iterator[Any]:
+    """ Yields the items of the JSON array at the reader position one at a time. """
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.next_char()
+        return
+
+    while True:
+        yield reader.read_value()
+        separator = reader.next_char()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError("Invalid JSON: expected ',' or ']' in array.")
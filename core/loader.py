@@ -1,10 +1,22 @@
 """ Loads vocabulary translations and user progress from files, preparing data for the quiz. """
 
-from json import load
+from random import randrange
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
 
-from core.utils import AnswerGroup, AnswerGroups, build_progress_path, PromptGroup, TranslationPair, VocabData, Word
+from core.console import read_input, write_output
+from core.deck_cache import is_deck_cache_supported, MappedDeck, open_deck_cache, write_deck_cache
+from core.json_codec import decode_json, decode_progress, decode_vocab
+from core.json_stream import iter_array_items, iter_object_keys, JsonStreamReader
+from core.progress_format import (
+    apply_record, build_snapshot, count_pending_entries, NOT_IN_SESSION, ProgressSnapshot
+)
+from core.progress_store import count_pending_pairs, has_deck_progress, load_deck_progress, SQLITE_PROGRESS
+from core.timing import span
+from core.utils import (
+    AnswerGroups, build_journal_path, build_progress_path, build_translation_pair, compute_file_hash,
+    TranslationPair, VocabData, VocabStream, Word, WordGroup
+)
 
 
 def get_progress_file(file_path: Path) -> Path:
@@ -17,18 +29,18 @@ def file_exists(file_path: Path) -> bool:
     
     return file_path.exists()
 
-def read_json_file(file_path: Path) -> List[Dict[str, Any]]:
+def read_json_file(file_path: Path) -> Any:
     """ Reads and returns the JSON content from the specified file path. """
     
-    with file_path.open("r", encoding="utf-8") as f:
-        return load(f)
+    return decode_json(file_path.read_bytes())
 
 def parse_translations(data: List[Dict[str, Any]]) -> List[TranslationPair]:
-    """ Converts a list of translation dictionaries to a list of TranslationPair objects. """
+    """ Converts a list of translation dictionaries, as written by the original progress format,
+    to a list of TranslationPair objects. """
     
     return [
         TranslationPair(
-            PromptGroup(
+            WordGroup(
                 [
                 Word(text)
                 for text in item["prompts"]["words"]
@@ -37,7 +49,7 @@ def parse_translations(data: List[Dict[str, Any]]) -> List[TranslationPair]:
             ),
             AnswerGroups(
                 [
-                AnswerGroup(
+                WordGroup(
                     [
                     Word(text)
                     for text in answer["words"]
@@ -53,41 +65,261 @@ def parse_translations(data: List[Dict[str, Any]]) -> List[TranslationPair]:
         for item in data
     ]
 
-def load_translations_progress(file_path: Path) -> List[TranslationPair]:
-    """ Loads the progress of translations from the associated progress file.
-    Returns a list of TranslationPair objects if the file exists, otherwise an empty list. """
-    
+def read_journal_records(journal_path: Path) -> Iterator[Dict[str, int]]:
+    """ Yields the records of a progress journal in the order they were written.
+    Stops at the first unreadable line, which can only be a record torn by a crash. """
+
+    if not file_exists(journal_path):
+        return
+
+    with journal_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield decode_json(line)
+            except ValueError:
+                return
+
+def apply_journal_records(data: List[Dict[str, Any]], records: Iterator[Dict[str, int]]) -> List[Dict[str, Any]]:
+    """ Replays journal records over progress data in the original list format,
+    overwriting the attempts and correctness of each recorded pair. """
+
+    for record in records:
+        item = data[record["i"]]
+        item["attempts"] = record["a"]
+        item["correct"] = bool(record["c"])
+    return data
+
+def read_progress_data(file_path: Path) -> Union[ProgressSnapshot, List[Dict[str, Any]], None]:
+    """ Reads the saved progress of a vocabulary file, from the progress database with the SQLite backend
+    and from its progress file and journal otherwise. Returns None if there is no saved progress. """
+
+    with span("load_progress"):
+        if SQLITE_PROGRESS:
+            return load_deck_progress(file_path)
+        return read_progress_files(file_path)
+
+def read_progress_files(file_path: Path) -> Union[ProgressSnapshot, List[Dict[str, Any]], None]:
+    """ Reads the progress file of a vocabulary file and replays its journal on top of it.
+    Returns a ProgressSnapshot, a list of dictionaries for progress files in the original format,
+    or None if no progress file exists. """
+
     progress_file = get_progress_file(file_path)
-    if file_exists(progress_file):
-        data = read_json_file(progress_file)
-        return parse_translations(data)
-    return []
+    if not file_exists(progress_file):
+        return None
+
+    data = decode_progress(progress_file.read_bytes())
+    records = read_journal_records(build_journal_path(file_path))
+    if not isinstance(data, ProgressSnapshot):
+        return apply_journal_records(data, records)
+
+    for record in records:
+        apply_record(data, record)
+    return data
+
+def count_pending_progress(file_path: Path) -> Optional[int]:
+    """ Returns the number of pending (not correct) translations saved for a vocabulary file,
+    or None if no progress file exists. With the SQLite backend this is an indexed query. """
+
+    if SQLITE_PROGRESS:
+        return count_pending_pairs(file_path)
+
+    data = read_progress_data(file_path)
+    if data is None:
+        return None
+    if isinstance(data, ProgressSnapshot):
+        return count_pending_entries(data)
+    return sum(1 for translation in data if not translation.get("correct", False))
 
-def validate_vocab_json(data_json: dict) -> None:
-    """ Validates that the vocab JSON contains required keys."""
+def load_translations_progress(file_path: Path) -> List[TranslationPair]:
+    """ Loads the progress of translations from the associated progress file and journal,
+    rebuilding the pairs from the words of the vocab file itself. Progress saved by a study window is resumed
+    as a whole, with the entries the window did not reach yet.
+    Returns an empty list if there is no progress or if the vocab file changed since it was saved. """
     
-    if "categories" not in data_json or "vocab" not in data_json:
-        raise ValueError("JSON vocab must contain 'categories' and 'vocab' keys.")
+    data = read_progress_data(file_path)
+    if data is None:
+        return []
+
+    vocab_data = open_vocab_stream(file_path)
+    if not isinstance(data, ProgressSnapshot):
+        return migrate_legacy_translations(parse_translations(data), vocab_data)
+
+    if data.deck_hash != get_vocab_hash(vocab_data, file_path):
+        display_deck_changed_message()
+        return []
+    if data.window is not None:
+        release_window(data, vocab_data.languages)
+    with span("rehydrate_pairs"):
+        return rehydrate_translations(data, vocab_data)
+
+def load_progress_snapshot(file_path: Path, vocab_data: Union[MappedDeck, VocabData, VocabStream]) -> Optional[ProgressSnapshot]:
+    """ Loads the saved progress of a vocabulary file as a snapshot, for a study window to carry on from.
+    Progress saved without a window is resumed from the first entry, in random mode for entries that were not in the session.
+    Returns None if there is no progress or if the vocab file changed since it was saved. """
+
+    data = read_progress_data(file_path)
+    if data is None:
+        return None
+
+    if not isinstance(data, ProgressSnapshot):
+        entries = vocab_data.entries
+        entry_count = len(entries) if isinstance(entries, Sequence) else sum(1 for _ in entries)
+        pairs = migrate_legacy_translations(parse_translations(data), vocab_data)
+        data = build_snapshot(pairs, entry_count, get_vocab_hash(vocab_data, file_path))
+    elif data.deck_hash != get_vocab_hash(vocab_data, file_path):
+        display_deck_changed_message()
+        return None
+
+    if data.window is None:
+        data.window = {"next": 0, "mode": "random"}
+    return data
+
+def release_window(snapshot: ProgressSnapshot, languages: List[str]) -> None:
+    """ Puts the entries a study window did not reach back in the session, in the window's translation mode,
+    so its progress can be resumed without a window. """
+
+    mode = snapshot.window["mode"]
+    for i in range(snapshot.window["next"], len(snapshot.directions)):
+        if snapshot.directions[i] == NOT_IN_SESSION:
+            snapshot.directions[i] = languages.index(mode) if mode in languages else randrange(len(languages))
+    snapshot.window = None
+
+def get_vocab_hash(vocab_data: Union[MappedDeck, VocabData, VocabStream], file_path: Path) -> str:
+    """ Returns the content hash of the vocab file, as recorded by its compiled deck if there is one. """
+
+    if isinstance(vocab_data, MappedDeck):
+        return vocab_data.hash
+    return compute_file_hash(file_path)
+
+def rehydrate_translations(snapshot: ProgressSnapshot, vocab_data: Union[MappedDeck, VocabData, VocabStream]) -> List[TranslationPair]:
+    """ Rebuilds the pairs of a snapshot from the entries of the vocab file, skipping entries that are not in the session.
+    A compiled deck is indexed directly, so only the entries in the session are read. """
+
+    if isinstance(vocab_data, MappedDeck):
+        entries = vocab_data.entries
+        return [
+            build_translation_pair(entries[i], i, direction, snapshot.attempts[i], bool(snapshot.correct[i]), vocab_data.source)
+            for i, direction in enumerate(snapshot.directions[:len(entries)])
+            if direction != NOT_IN_SESSION
+        ]
+
+    return [
+        build_translation_pair(entry, i, snapshot.directions[i], snapshot.attempts[i], bool(snapshot.correct[i]), vocab_data.source)
+        for i, entry in enumerate(vocab_data.entries)
+        if snapshot.directions[i] != NOT_IN_SESSION
+    ]
+
+def migrate_legacy_translations(legacy_pairs: List[TranslationPair], vocab_data: Union[MappedDeck, VocabData, VocabStream]) -> List[TranslationPair]:
+    """ Matches pairs loaded from the original progress format to the entries of the vocab file by their prompt words,
+    so they can be saved in the reference-based format. Pairs whose prompt no longer exists in the deck are dropped. """
+
+    legacy_by_prompt = {
+        (pair.prompt.categorie, tuple(word.text for word in pair.prompt.words)): pair
+        for pair in legacy_pairs
+    }
+    pairs = []
+
+    for i, entry in enumerate(vocab_data.entries):
+        for direction, group in enumerate(entry.groups):
+            legacy = legacy_by_prompt.pop((group.categorie, tuple(word.text for word in group.words)), None)
+            if legacy is not None:
+                pairs.append(build_translation_pair(entry, i, direction, legacy.attempts, legacy.correct, vocab_data.source))
+                break
+
+    if legacy_by_prompt:
+        display_deck_changed_message()
+    return pairs
+
+def display_deck_changed_message() -> None:
+    """ Notifies the user that saved progress no longer matches the vocab file. """
+
+    write_output("⚠️ The vocab file changed since this progress was saved; outdated progress was discarded.")
+
+def validate_vocab_extension(file_path: str) -> None:
+    """ Validates that the vocab file is a JSON file. """
+
+    ext = Path(file_path).suffix
+    if ext != '.json':
+        raise ValueError("Only JSON vocab files are supported in this version.")
 
 def load_vocab_data(file_path: str) -> VocabData:
     """ Loads vocabulary data from a JSON file and returns a VocabData object.
     Raises an error if the file extension is not .json or required keys are missing. """
     
-    ext = Path(file_path).suffix
-    if ext != '.json':
-        raise ValueError("Only JSON vocab files are supported in this version.")
+    validate_vocab_extension(file_path)
+    with span("json_load"):
+        categories, vocab = decode_vocab(Path(file_path).read_bytes())
+    return VocabData({"categories": categories, "vocab": vocab}, Path(file_path))
+
+def open_vocab_stream(file_path: str) -> Union[MappedDeck, VocabStream]:
+    """ Opens a vocabulary file without loading its entries.
+    Returns its compiled deck, compiling it first if needed, so entries are read from the mapped file only when used.
+    Where the deck cache is unavailable, returns a VocabStream: only the categories are read up front and entries
+    are decoded one at a time while iterating, so the raw JSON tree of the deck is never held in memory. """
+
+    validate_vocab_extension(file_path)
+    if is_deck_cache_supported(file_path):
+        return open_compiled_deck(file_path)
+
+    languages = read_vocab_categories(file_path)
+    return VocabStream(languages, lambda: iter_raw_vocab_entries(file_path), Path(file_path))
+
+def open_compiled_deck(file_path: str) -> Union[MappedDeck, VocabStream]:
+    """ Maps the compiled deck of a vocabulary file, compiling the file first if its deck is missing or out of date.
+    The file is compiled from its entries streamed one at a time, so its JSON tree is never held in memory.
+    Falls back to a VocabStream if the deck cannot be written or mapped, e.g. because the file changed meanwhile. """
+
+    with span("open_deck"):
+        deck = open_deck_cache(file_path)
+    if deck is not None:
+        return deck
+
+    languages = read_vocab_categories(file_path)
+    try:
+        with span("compile_deck"):
+            write_deck_cache(file_path, languages, iter_raw_vocab_entries(file_path))
+        deck = open_deck_cache(file_path)
+    except OSError:
+        deck = None
+    return deck if deck is not None else VocabStream(languages, lambda: iter_raw_vocab_entries(file_path), Path(file_path))
+
+def read_vocab_categories(file_path: str) -> List[str]:
+    """ Reads the 'categories' list of a vocab file without loading its entries.
+    Raises an error if the key is missing. """
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        reader = JsonStreamReader(f)
+        for key in iter_object_keys(reader):
+            if key == "categories":
+                return reader.read_value()
+            reader.skip_value()
+    raise ValueError("JSON vocab must contain 'categories' and 'vocab' keys.")
+
+def iter_raw_vocab_entries(file_path: str) -> Iterator[List[List[str]]]:
+    """ Yields the raw word lists of each entry of the 'vocab' array, one entry at a time.
+    Raises an error if the key is missing. """
+
     with open(file_path, 'r', encoding='utf-8') as f:
-        data_json = load(f)
-        validate_vocab_json(data_json)
-        return VocabData(data_json)
+        reader = JsonStreamReader(f)
+        for key in iter_object_keys(reader):
+            if key == "vocab":
+                yield from iter_array_items(reader)
+                return
+            reader.skip_value()
+    raise ValueError("JSON vocab must contain 'categories' and 'vocab' keys.")
 
-def should_resume_previous_session(file_path: Path) -> bool:
-    """ Checks if a previous progress file exists and prompts the user to resume the session.
+def has_saved_progress(file_path: Path) -> bool:
+    """ Returns True if progress is saved for the vocabulary file, in the progress database or as a progress file. """
+
+    if SQLITE_PROGRESS:
+        return has_deck_progress(file_path)
+    return file_exists(get_progress_file(file_path))
+
+def should_resume_previous_session(files: List[Path]) -> bool:
+    """ Checks if previous progress exists for any of the selected files and prompts the user to resume the session.
     Returns True if the user chooses to resume, otherwise False. """
 
-    progress_file = get_progress_file(file_path)
-    if file_exists(progress_file):
-        print("Resume previous session? (y/n): ", end="")
-        choice = input().strip().lower()
+    if any(has_saved_progress(file) for file in files):
+        choice = read_input("Resume previous session? (y/n): ").strip().lower()
         return choice == "y"
-    return False
\ No newline at end of file
+    return False
@@ -0,0 +1,23 @@
+""" Normalizes answers and builds the match indexes used to check them, so the quiz and the manual retry share one pipeline. """
+
+from os import getenv
+from typing import FrozenSet, Iterable
+from unicodedata import normalize
+
+
+UNICODE_FOLDING = getenv("VOCAB_TRAINER_UNICODE_FOLDING", "") not in ("", "0")
+NEAR_MISS_DISTANCE = int(getenv("VOCAB_TRAINER_NEAR_MISS", "0"))
+
+def normalize_answer(text: str, unicode_folding: bool = UNICODE_FOLDING) -> str:
+    """ Returns the normalized form of an answer: asterisks removed, optionally NFKC-folded,
+    lowercased, and with runs of whitespace collapsed to single spaces. """
+
+    text = text.replace("*", "")
+    if unicode_folding:
+        text = normalize("NFKC", text)
+    return " ".join(text.lower().split())
+
+def build_match_index(texts: Iterable[str]) -> FrozenSet[str]:
+    """ Returns the set of normalized forms of the given answers, for constant-time lookups. """
+
+    return frozenset(normalize_answer(text) for text in texts)
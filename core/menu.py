@@ -1,40 +1,53 @@
 """ Displays the main menu and manages user choices for starting, resuming, or configuring a session. """
 
 from pathlib import Path
-from shutil import rmtree
 from typing import List
 
+from core.catalog import CATALOG_PATH, forget_catalog
+from core.console import read_input, write_output
+from core.progress_store import clear_all_progress, list_decks_in_progress, SQLITE_PROGRESS
+from core.results import remove_empty_parent_dirs
+from core.utils import is_learner_progress_file
+
 
 def main_menu():
     """ Displays the main menu for the Vocab Trainer application.
     Shows saved progress and prompts the user to start a quiz or clear progress. """
     
-    print("📘 Welcome to Vocab Trainer")
-    progress_files = find_progress_files()
-    display_progress_summary(progress_files)
+    write_output("📘 Welcome to Vocab Trainer")
+    vocab_sets = find_vocab_sets_in_progress()
+    display_progress_summary(vocab_sets)
 
-    if progress_files:
+    if vocab_sets:
         display_menu_options()
         handle_menu_choice()
 
+def find_vocab_sets_in_progress() -> List[str]:
+    """ Returns the names of all vocab sets with saved progress,
+    queried from the progress database with the SQLite backend and found from the progress files otherwise. """
+
+    if SQLITE_PROGRESS:
+        return list_decks_in_progress()
+    return [get_vocab_set_name(file) for file in find_progress_files()]
+
 def find_progress_files() -> List[Path]:
-    """ Searches for all saved progress files in the 'data' directory.
+    """ Searches for all saved progress files in the 'data' directory, leaving out those of quiz server learners.
     Returns a list of Path objects for each progress file found. """
     
-    return list(Path("data").rglob("*_progress.json"))
+    return [file for file in Path("data").rglob("*_progress.json") if not is_learner_progress_file(file)]
 
-def display_progress_summary(progress_files: List[Path]):
+def display_progress_summary(vocab_sets: List[str]):
     """ Prints a summary of all vocab sets with saved progress.
     If none are found, notifies the user. """
     
-    if not progress_files:
-        print("📂 No saved progress found.\n")
+    if not vocab_sets:
+        write_output("📂 No saved progress found.\n")
         return
 
-    print(f"📦 {len(progress_files)} vocab set(s) in progress:")
-    for file in progress_files:
-        print(f"  • {get_vocab_set_name(file)}")
-    print()
+    write_output(f"📦 {len(vocab_sets)} vocab set(s) in progress:")
+    for name in vocab_sets:
+        write_output(f"  • {name}")
+    write_output()
 
 def get_vocab_set_name(progress_file: Path) -> str:
     """ Extracts and formats the vocab set name from a progress file path.
@@ -46,32 +59,48 @@ def get_vocab_set_name(progress_file: Path) -> str:
 def display_menu_options():
     """ Displays the available menu options to the user. """
     
-    print("1. Start quiz")
-    print("2. Clear all saved progress")
+    write_output("1. Start quiz")
+    write_output("2. Clear all saved progress")
 
 def handle_menu_choice():
     """ Handles the user's menu selection and triggers the appropriate action. """
     
-    choice = input("Choose an option (1/2): ").strip()
+    choice = read_input("Choose an option (1/2): ").strip()
     if choice == "2":
         confirm_and_clear_progress()
 
 def confirm_and_clear_progress():
-    """ Asks the user for confirmation before deleting all saved progress.
-    Deletes the 'data' directory if confirmed. """
+    """ Asks the user for confirmation before deleting all saved progress, and deletes it if confirmed. """
 
-    confirm = input("⚠️ Are you sure you want to delete ALL saved progress? (yes/no): ").strip().lower()
+    confirm = read_input("⚠️ Are you sure you want to delete ALL saved progress? (yes/no): ").strip().lower()
     if confirm == 'yes':
         delete_progress_data()
     else:
-        print("❌ Cancelled.\n")
+        write_output("❌ Cancelled.\n")
 
 def delete_progress_data():
-    """ Deletes the 'data' directory containing all saved progress files.
+    """ Deletes every vocab set's progress file and journal, and the catalog holding their pending counts,
+    or every deck's rows from the progress database with the SQLite backend.
+    The rest of the 'data' directory is kept: the progress of quiz server learners in data/learners/,
+    the answer history, the search index and compiled decks.
     Notifies the user of the result. """
 
-    if Path("data").exists():
-        rmtree("data")
-        print("✅ All progress cleared.\n")
+    if SQLITE_PROGRESS:
+        cleared = clear_all_progress()
     else:
-        print("ℹ️ No saved progress to delete.\n")
+        cleared = delete_progress_files()
+    write_output("✅ All progress cleared.\n" if cleared else "ℹ️ No saved progress to delete.\n")
+
+def delete_progress_files() -> bool:
+    """ Deletes the progress files, their journals and the catalog, then the folders left empty.
+    Returns True if there was any progress file to delete. """
+
+    progress_files = find_progress_files()
+    for progress_file in progress_files:
+        progress_file.unlink(missing_ok=True)
+        progress_file.with_suffix(".journal").unlink(missing_ok=True)
+        remove_empty_parent_dirs(progress_file)
+
+    CATALOG_PATH.unlink(missing_ok=True)
+    forget_catalog()
+    return bool(progress_files)
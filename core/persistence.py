@@ -0,0 +1,185 @@
+""" Moves progress persistence to a background writer thread, so journaling, snapshots and compaction never block the prompt.
+
+Tasks are queued under a key; a task queued again before it ran keeps its place and runs once, which coalesces bursts of answers
+into a single journal write. The writer is flushed when a session ends, on Ctrl-C and at interpreter exit.
+Set VOCAB_TRAINER_BACKGROUND_SAVE=0 to persist synchronously on the main thread instead. """
+
+from atexit import register
+from os import environ
+from pathlib import Path
+from threading import Condition, Lock, Thread
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from core.catalog import DeckVersion
+from core.journal import open_progress_journal, SessionJournal
+from core.timing import span
+from core.utils import TranslationPair
+
+
+BACKGROUND_SAVE_ENABLED = environ.get("VOCAB_TRAINER_BACKGROUND_SAVE", "1") != "0"
+
+class BackgroundWriter:
+    """ Runs persistence tasks one at a time on a daemon thread, in the order they were first queued. """
+
+    def __init__(self):
+        self.condition = Condition()
+        self.tasks: Dict[Hashable, Callable[[], None]] = {}
+        self.running = False
+        self.errors: List[BaseException] = []
+        self.thread = Thread(target=self.run, name="vocab-persistence", daemon=True)
+        self.thread.start()
+
+    def submit(self, key: Hashable, task: Callable[[], None]) -> None:
+        """ Queues a task. If a task with the same key is still waiting, only the latest one runs, in the earlier one's place. """
+
+        with self.condition:
+            self.tasks[key] = task
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        """ Takes the oldest waiting task and runs it, forever. Errors are kept for the next flush to raise. """
+
+        while True:
+            with self.condition:
+                while not self.tasks:
+                    self.condition.wait()
+                key = next(iter(self.tasks))
+                task = self.tasks.pop(key)
+                self.running = True
+
+            try:
+                with span("persist"):
+                    task()
+            except BaseException as error:
+                self.errors.append(error)
+            finally:
+                with self.condition:
+                    self.running = False
+                    self.condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """ Waits until every queued task has run. Returns False if the timeout expired first.
+        Raises the first error a task raised since the previous flush. """
+
+        with self.condition:
+            done = self.condition.wait_for(lambda: not self.tasks and not self.running, timeout)
+
+        if self.errors:
+            error, self.errors = self.errors[0], []
+            raise error
+        return done
+
+_writer: Optional[BackgroundWriter] = None
+
+def get_background_writer() -> BackgroundWriter:
+    """ Returns the background writer, starting its thread on first use and flushing it at interpreter exit. """
+
+    global _writer
+    if _writer is None:
+        _writer = BackgroundWriter()
+        register(flush_persistence)
+    return _writer
+
+def flush_persistence(timeout: Optional[float] = None) -> bool:
+    """ Waits until all queued persistence has been written. Returns False if the timeout expired first. """
+
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
+
+def copy_pair(pair: TranslationPair) -> TranslationPair:
+    """ Returns a plain pair holding the pair's current state, which later answers and moved session rows do not change. """
+
+    return TranslationPair(pair.prompt, pair.answers, pair.attempts, pair.correct, pair.entry_index, pair.direction, pair.source)
+
+class BackgroundJournal:
+    """ Same interface as SessionJournal, but every call only queues work for the background writer.
+    Answers are collected per pair until the writer runs, so a pair answered again before then is written once.
+    The writer never reads the live pairs of the session: answers are queued as copies, and snapshots are captured
+    on the calling thread. Answers given after a snapshot was captured are queued behind the task writing it,
+    since that task removes the journal. """
+
+    def __init__(self, journal: SessionJournal, writer: BackgroundWriter):
+        self.journal = journal
+        self.writer = writer
+        self.lock = Lock()
+        self.generation = 0
+        self.pending: Dict[Tuple[Optional[Path], Optional[int]], TranslationPair] = {}
+
+    def record(self, pair: TranslationPair) -> None:
+        """ Queues a copy of the pair's answer for the journal of its vocab file. """
+
+        with self.lock:
+            pending = self.pending
+            pending[(pair.source, pair.entry_index)] = copy_pair(pair)
+            key = (id(self), "record", self.generation)
+        self.writer.submit(key, lambda: self.write_pending(pending))
+
+    def write_pending(self, pending: Dict[Tuple[Optional[Path], Optional[int]], TranslationPair]) -> None:
+        """ Appends the queued answers to the journals and syncs them. Runs on the writer thread. """
+
+        with self.lock:
+            pairs = list(pending.values())
+            pending.clear()
+        for pair in pairs:
+            self.journal.record(pair)
+        for journal in self.journal.journals.values():
+            journal.sync()
+
+    def start_generation(self) -> None:
+        """ Queues the answers given from now on behind the tasks queued so far. Called after capturing a snapshot. """
+
+        with self.lock:
+            self.generation += 1
+            self.pending = {}
+
+    def checkpoint(self, pending: Optional[int] = None) -> None:
+        """ Queues a checkpoint of every deck's journal, with the snapshots and pending counts captured now. """
+
+        captured = self.journal.capture_checkpoint(pending)
+        self.start_generation()
+        self.writer.submit((id(self), "checkpoint"), lambda: self.journal.checkpoint(captured=captured))
+
+    def compact(self) -> None:
+        """ Queues rewriting every deck's snapshot, captured now. """
+
+        snapshots = self.journal.capture()
+        self.start_generation()
+        self.writer.submit((id(self), "compact"), lambda: self.journal.compact(snapshots))
+
+    def reload_deck(self, file_path: Path, pairs: List[TranslationPair], version: DeckVersion) -> None:
+        """ Replaces the pairs of a reloaded deck and queues rewriting its snapshot, captured now. """
+
+        self.journal.replace_deck(file_path, pairs, version)
+        journal = self.journal.journals[file_path]
+        snapshot = journal.capture()
+        self.start_generation()
+        self.writer.submit((id(self), "reload", file_path), lambda: journal.compact(snapshot))
+
+    def close(self) -> None:
+        """ Writes the remaining answers, closes the journals and waits until everything is on disk. """
+
+        self.writer.submit((id(self), "close"), self.close_journal)
+        self.writer.flush()
+
+    def close_journal(self) -> None:
+        """ Appends the last queued answers and closes the journals. Runs on the writer thread. """
+
+        with self.lock:
+            pending = self.pending
+        self.write_pending(pending)
+        self.journal.close()
+
+Journal = Union[SessionJournal, BackgroundJournal]
+
+def open_session_journal(pairs: List[TranslationPair], files: List[Path], versions: Optional[Dict[Path, DeckVersion]] = None) -> Journal:
+    """ Starts journaling a session, on the background writer unless background saving is disabled.
+    The initial snapshots are captured now and written in the background, so the first question appears without waiting for the disk.
+    versions holds the content hash and entry count of each vocab file captured before its pairs were loaded. """
+
+    if not BACKGROUND_SAVE_ENABLED:
+        return open_progress_journal(pairs, files, versions)
+
+    journal = BackgroundJournal(SessionJournal(pairs, files, versions), get_background_writer())
+    journal.compact()
+    return journal
@@ -0,0 +1,98 @@
+""" Profiles a session: records every timing span and writes a Chrome trace (also readable by Perfetto) and a summary table.
+
+Enable it with `python main.py --profile [trace.json]` or VOCAB_TRAINER_PROFILE=trace.json.
+When profiling is off no recorder is installed, so every span is the shared no-op of core.timing. """
+
+from collections import defaultdict
+from json import dump
+from os import environ, getpid
+from pathlib import Path
+from statistics import quantiles
+from threading import get_ident
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.timing import set_span_recorder
+
+
+PROFILE_ENV = "VOCAB_TRAINER_PROFILE"
+DEFAULT_TRACE_PATH = Path("profile.trace.json")
+
+TraceEvent = Tuple[str, float, float, int]
+
+class TraceRecorder:
+    """ Collects every finished span with the thread it ran on. """
+
+    def __init__(self):
+        self.events: List[TraceEvent] = []
+
+    def __call__(self, name: str, start: float, duration: float) -> None:
+        self.events.append((name, start, duration, get_ident()))
+
+def get_trace_path(argv: Sequence[str]) -> Optional[Path]:
+    """ Returns where to write the trace: the argument following --profile, the default path after a bare --profile,
+    the path in VOCAB_TRAINER_PROFILE, or None if profiling is off. """
+
+    if "--profile" in argv:
+        i = list(argv).index("--profile")
+        following = argv[i + 1] if i + 1 < len(argv) else ""
+        return Path(following) if following and not following.startswith("-") else DEFAULT_TRACE_PATH
+    if environ.get(PROFILE_ENV):
+        return Path(environ[PROFILE_ENV])
+    return None
+
+def start_profiling() -> TraceRecorder:
+    """ Installs and returns a recorder receiving every span. """
+
+    recorder = TraceRecorder()
+    set_span_recorder(recorder)
+    return recorder
+
+def stop_profiling(recorder: TraceRecorder, trace_path: Path) -> None:
+    """ Removes the recorder, writes its trace file and prints the summary table. """
+
+    set_span_recorder(None)
+    write_chrome_trace(recorder.events, trace_path)
+    display_summary(summarize_events(recorder.events))
+    print(f"\nTrace written to {trace_path} (open it in chrome://tracing or ui.perfetto.dev).")
+
+def build_chrome_trace(events: List[TraceEvent]) -> Dict[str, Any]:
+    """ Converts spans into complete ('X') events of the Chrome trace format, in microseconds since the first span. """
+
+    origin = min((start for _, start, _, _ in events), default=0.0)
+    pid = getpid()
+    return {
+        "displayTimeUnit": "ms",
+        "traceEvents": [
+            {"name": name, "cat": "vocab", "ph": "X", "ts": round((start - origin) * 1e6, 3),
+             "dur": round(duration * 1e6, 3), "pid": pid, "tid": thread}
+            for name, start, duration, thread in events
+        ]
+    }
+
+def write_chrome_trace(events: List[TraceEvent], trace_path: Path) -> None:
+    """ Writes the spans as a Chrome trace JSON file. """
+
+    with Path(trace_path).open("w", encoding="utf-8") as f:
+        dump(build_chrome_trace(events), f)
+
+def summarize_events(events: List[TraceEvent]) -> Dict[str, Dict[str, float]]:
+    """ Returns count, total, mean, p95 and max in milliseconds for each span name, by decreasing total. """
+
+    durations: Dict[str, List[float]] = defaultdict(list)
+    for name, _, duration, _ in events:
+        durations[name].append(duration * 1000)
+
+    summary = {}
+    for name, values in sorted(durations.items(), key=lambda item: sum(item[1]), reverse=True):
+        p95 = quantiles(values, n=20, method="inclusive")[18] if len(values) > 1 else values[0]
+        summary[name] = {"count": len(values), "total_ms": sum(values), "mean_ms": sum(values) / len(values),
+                         "p95_ms": p95, "max_ms": max(values)}
+    return summary
+
+def display_summary(summary: Dict[str, Dict[str, float]]) -> None:
+    """ Prints the summary table. """
+
+    print(f"\n{'span':<32} {'count':>8} {'total ms':>12} {'mean ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for name, stats in summary.items():
+        print(f"{name:<32} {stats['count']:>8} {stats['total_ms']:>12.3f} {stats['mean_ms']:>10.3f} "
+              f"{stats['p95_ms']:>10.3f} {stats['max_ms']:>10.3f}")
@@ -0,0 +1,142 @@
+""" Encodes session progress as compact per-entry columns that reference the vocab file instead of copying its text. """
+
+from array import array
+from base64 import b64decode, b64encode
+from sys import byteorder
+from typing import Any, Dict, List, Optional
+
+from core.utils import TranslationPair
+
+
+PROGRESS_FORMAT = 2
+NOT_IN_SESSION = 255
+
+# The attempts column is packed as 4-byte unsigned integers, whatever the size of a C int or long on this platform
+UINT32 = next(typecode for typecode in "IL" if array(typecode).itemsize == 4)
+
+class ProgressSnapshot:
+    """ Progress of a session as one row per vocab entry: the prompt direction
+    (or NOT_IN_SESSION), the number of attempts and whether the entry was answered correctly.
+    The snapshot of a windowed session also holds its window state: the index of the next entry to pull
+    and the translation mode, see core.study_window. """
+
+    __slots__ = ("deck_hash", "directions", "attempts", "correct", "window")
+
+    def __init__(self, deck_hash: str, directions: bytearray, attempts: array, correct: bytearray,
+                 window: Optional[Dict[str, Any]] = None):
+        self.deck_hash = deck_hash
+        self.directions = directions
+        self.attempts = attempts
+        self.correct = correct
+        self.window = window
+
+def build_snapshot(pairs: List[TranslationPair], entry_count: int, deck_hash: str, base: Optional[ProgressSnapshot] = None) -> ProgressSnapshot:
+    """ Builds a snapshot of the given pairs for a deck with entry_count entries.
+    With a base snapshot, the rows of the pairs are written over a copy of it, window state included. """
+
+    if base is not None:
+        snapshot = ProgressSnapshot(deck_hash, bytearray(base.directions), array(UINT32, base.attempts), bytearray(base.correct),
+                                    dict(base.window) if base.window is not None else None)
+        write_pair_rows(snapshot, pairs)
+        return snapshot
+
+    snapshot = ProgressSnapshot(deck_hash, bytearray([NOT_IN_SESSION]) * entry_count, array(UINT32, bytes(4 * entry_count)), bytearray(entry_count))
+    write_pair_rows(snapshot, pairs)
+    return snapshot
+
+def write_pair_rows(snapshot: ProgressSnapshot, pairs: List[TranslationPair]) -> None:
+    """ Writes the direction, attempts and correctness of each pair to the row of its entry. """
+
+    for pair in pairs:
+        snapshot.directions[pair.entry_index] = pair.direction
+        snapshot.attempts[pair.entry_index] = pair.attempts
+        snapshot.correct[pair.entry_index] = pair.correct
+
+def encode_snapshot(snapshot: ProgressSnapshot) -> Dict[str, Any]:
+    """ Converts a snapshot into a JSON-serializable dictionary with base64-packed columns. """
+
+    data = {
+        "format": PROGRESS_FORMAT,
+        "deck_hash": snapshot.deck_hash,
+        "entries": len(snapshot.directions),
+        "directions": encode_bytes(bytes(snapshot.directions)),
+        "attempts": encode_bytes(to_little_endian(snapshot.attempts).tobytes()),
+        "correct": encode_bytes(pack_bits(snapshot.correct))
+    }
+    if snapshot.window is not None:
+        data["window"] = snapshot.window
+    return data
+
+def decode_snapshot(data: Dict[str, Any]) -> ProgressSnapshot:
+    """ Rebuilds a snapshot from the dictionary produced by encode_snapshot. """
+
+    return decode_snapshot_columns(data["deck_hash"], data["entries"], data["directions"], data["attempts"], data["correct"], data.get("window"))
+
+def decode_snapshot_columns(deck_hash: str, entry_count: int, directions: str, attempts: str, correct: str,
+                            window: Optional[Dict[str, Any]] = None) -> ProgressSnapshot:
+    """ Rebuilds a snapshot from the fields of an encoded snapshot, with its columns still base64-packed. """
+
+    attempts_column = array(UINT32)
+    attempts_column.frombytes(decode_bytes(attempts))
+    return ProgressSnapshot(
+        deck_hash,
+        bytearray(decode_bytes(directions)),
+        to_little_endian(attempts_column),
+        unpack_bits(decode_bytes(correct), entry_count),
+        window
+    )
+
+def is_snapshot_data(data: Any) -> bool:
+    """ Returns True if the decoded progress file uses the column format rather than the original list of pairs. """
+
+    return isinstance(data, dict) and data.get("format") == PROGRESS_FORMAT
+
+def apply_record(snapshot: ProgressSnapshot, record: Dict[str, int]) -> None:
+    """ Applies a journal record to the snapshot row of its entry. """
+
+    snapshot.attempts[record["i"]] = record["a"]
+    snapshot.correct[record["i"]] = record["c"]
+
+def count_pending_entries(snapshot: ProgressSnapshot) -> int:
+    """ Returns the number of entries in the session that are not answered correctly yet.
+    In a windowed session, the entries the window has not pulled yet are in the session too. """
+
+    end = snapshot.window["next"] if snapshot.window is not None else len(snapshot.directions)
+    pulled = sum(
+        1 for direction, correct in zip(snapshot.directions[:end], snapshot.correct[:end])
+        if direction != NOT_IN_SESSION and not correct
+    )
+    return pulled + len(snapshot.correct) - end - snapshot.correct.count(1, end)
+
+def pack_bits(flags: bytearray) -> bytes:
+    """ Packs one flag per byte into a bitset, least significant bit first. """
+
+    packed = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            packed[i >> 3] |= 1 << (i & 7)
+    return bytes(packed)
+
+def unpack_bits(packed: bytes, count: int) -> bytearray:
+    """ Unpacks a bitset produced by pack_bits into one flag per byte. """
+
+    return bytearray((packed[i >> 3] >> (i & 7)) & 1 for i in range(count))
+
+def to_little_endian(values: array) -> array:
+    """ Returns the array in little-endian byte order, so the packed form is portable.
+    On big-endian machines a copy is byte-swapped; the given array is never changed. """
+
+    if byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+def encode_bytes(data: bytes) -> str:
+    """ Encodes raw bytes as base64 text. """
+
+    return b64encode(data).decode("ascii")
+
+def decode_bytes(text: str) -> bytes:
+    """ Decodes base64 text into raw bytes. """
+
+    return b64decode(text)
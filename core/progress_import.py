@@ -0,0 +1,83 @@
+""" Imports the progress files of the JSON backend into the SQLite progress database.
+
+Usage:
+    python -m core.progress_import
+    python -m core.progress_import --remove
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List, Optional
+
+from core.catalog import get_deck_entry_count, get_deck_hash
+from core.loader import migrate_legacy_translations, open_vocab_stream, parse_translations, read_progress_files
+from core.progress_format import ProgressSnapshot
+from core.progress_store import close_connection, save_deck_progress, save_deck_snapshot
+from core.utils import build_journal_path, is_learner_progress_file
+
+
+DATA_DIR = Path("data")
+VOCAB_DIR = Path("vocab")
+
+PROGRESS_SUFFIX = "_progress.json"
+
+def find_progress_files() -> List[Path]:
+    """ Returns all progress files under the data directory, sorted, except those of quiz server learners. """
+
+    return sorted(file for file in DATA_DIR.rglob(f"*{PROGRESS_SUFFIX}") if not is_learner_progress_file(file))
+
+def get_vocab_file(progress_file: Path) -> Path:
+    """ Returns the vocabulary file a progress file belongs to. """
+
+    relative = progress_file.relative_to(DATA_DIR)
+    return VOCAB_DIR / relative.with_name(relative.name[:-len(PROGRESS_SUFFIX)] + ".json")
+
+def import_progress_file(vocab_file: Path) -> Optional[str]:
+    """ Stores the progress of a vocabulary file, journal included, in the progress database.
+    Progress in the original list format is migrated against the vocab file first.
+    Returns the reason the file was skipped, or None once it is imported. """
+
+    if not vocab_file.exists():
+        return "vocab file not found"
+
+    data = read_progress_files(vocab_file)
+    if isinstance(data, ProgressSnapshot):
+        save_deck_snapshot(vocab_file, data)
+        return None
+
+    pairs = migrate_legacy_translations(parse_translations(data), open_vocab_stream(vocab_file))
+    if not pairs:
+        return "vocab file changed since the progress was saved"
+    save_deck_progress(vocab_file, pairs, get_deck_entry_count(vocab_file), get_deck_hash(vocab_file))
+    return None
+
+def main() -> None:
+    """ Parses the command line and imports every progress file, optionally removing the imported files. """
+
+    parser = ArgumentParser(description="Import *_progress.json files into the SQLite progress database.")
+    parser.add_argument("--remove", action="store_true", help="delete progress files and journals once imported")
+    args = parser.parse_args()
+
+    imported = 0
+    for progress_file in find_progress_files():
+        vocab_file = get_vocab_file(progress_file)
+        try:
+            reason = import_progress_file(vocab_file)
+        except (OSError, ValueError, KeyError, IndexError) as error:
+            reason = f"unreadable ({error})"
+
+        if reason is not None:
+            print(f"⚠️ Skipped {progress_file}: {reason}")
+            continue
+
+        imported += 1
+        print(f"✅ Imported {progress_file}")
+        if args.remove:
+            progress_file.unlink()
+            build_journal_path(vocab_file).unlink(missing_ok=True)
+
+    close_connection()
+    print(f"\n{imported} progress file(s) imported.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+""" Stores the progress of all decks in a single SQLite database, as an optional alternative to one JSON file per deck.
+
+Enable it with VOCAB_TRAINER_PROGRESS_BACKEND=sqlite. Every pair of a session is a row keyed by deck and entry index,
+so the menu summary, pending counts, resuming and clearing are indexed queries instead of file scans. """
+
+from array import array
+from json import dumps, loads
+from os import environ
+from pathlib import Path
+from sqlite3 import connect, Connection
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.progress_format import count_pending_entries, NOT_IN_SESSION, ProgressSnapshot, UINT32
+from core.utils import get_deck_key, TranslationPair
+
+
+PROGRESS_BACKEND = environ.get("VOCAB_TRAINER_PROGRESS_BACKEND", "json")
+
+SQLITE_PROGRESS = PROGRESS_BACKEND == "sqlite"
+
+PROGRESS_DB_PATH = Path("data") / "progress.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    deck TEXT PRIMARY KEY,
+    deck_hash TEXT NOT NULL,
+    entries INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pairs (
+    deck TEXT NOT NULL REFERENCES decks(deck) ON DELETE CASCADE,
+    entry INTEGER NOT NULL,
+    direction INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (deck, entry)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pairs_pending ON pairs (deck, correct);
+CREATE TABLE IF NOT EXISTS windows (
+    deck TEXT PRIMARY KEY REFERENCES decks(deck) ON DELETE CASCADE,
+    state TEXT NOT NULL
+);
+"""
+
+_connection: Optional[Connection] = None
+
+def get_connection() -> Connection:
+    """ Returns the connection to the progress database, creating the database and its tables on first use.
+    The connection is shared with the background writer, which performs all writes during a session. """
+
+    global _connection
+    if _connection is None:
+        PROGRESS_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _connection = connect(PROGRESS_DB_PATH, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute("PRAGMA synchronous=NORMAL")
+        _connection.execute("PRAGMA foreign_keys=ON")
+        _connection.executescript(SCHEMA)
+    return _connection
+
+def close_connection() -> None:
+    """ Commits and closes the connection, if one is open. """
+
+    global _connection
+    if _connection is not None:
+        _connection.commit()
+        _connection.close()
+        _connection = None
+
+def save_deck_progress(file_path: Path, pairs: Iterable[TranslationPair], entry_count: int, deck_hash: str) -> None:
+    """ Replaces the stored progress of a deck with the given pairs, in one transaction. """
+
+    rows = ((pair.entry_index, pair.direction, pair.attempts, int(pair.correct)) for pair in pairs)
+    write_deck_rows(file_path, rows, entry_count, deck_hash)
+
+def save_deck_snapshot(file_path: Path, snapshot: ProgressSnapshot) -> None:
+    """ Replaces the stored progress of a deck with the entries of a snapshot that are in the session, and its window state. """
+
+    rows = (
+        (entry, direction, snapshot.attempts[entry], snapshot.correct[entry])
+        for entry, direction in enumerate(snapshot.directions)
+        if direction != NOT_IN_SESSION
+    )
+    write_deck_rows(file_path, rows, len(snapshot.directions), snapshot.deck_hash, snapshot.window)
+
+def write_deck_rows(file_path: Path, rows: Iterable[Tuple[int, int, int, int]], entry_count: int, deck_hash: str,
+                    window: Optional[Dict[str, Any]] = None) -> None:
+    """ Replaces the deck's row, its window state and all its pair rows of (entry, direction, attempts, correct), in one transaction. """
+
+    deck, now = get_deck_key(file_path), time()
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO decks (deck, deck_hash, entries, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (deck) DO UPDATE SET deck_hash = excluded.deck_hash, entries = excluded.entries, updated_at = excluded.updated_at",
+            (deck, deck_hash, entry_count, now)
+        )
+        connection.execute("DELETE FROM pairs WHERE deck = ?", (deck,))
+        connection.executemany(
+            "INSERT INTO pairs (deck, entry, direction, attempts, correct, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            ((deck, entry, direction, attempts, correct, now) for entry, direction, attempts, correct in rows)
+        )
+        connection.execute("DELETE FROM windows WHERE deck = ?", (deck,))
+        if window is not None:
+            connection.execute("INSERT INTO windows (deck, state) VALUES (?, ?)", (deck, dumps(window)))
+
+def record_pair(file_path: Path, pair: TranslationPair) -> None:
+    """ Updates the stored attempts and correctness of one pair, adding its row if a study window pulled it
+    after the deck was last saved. The change is committed by commit_progress. """
+
+    get_connection().execute(
+        "INSERT INTO pairs (deck, entry, direction, attempts, correct, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (deck, entry) DO UPDATE SET attempts = excluded.attempts, correct = excluded.correct, updated_at = excluded.updated_at",
+        (get_deck_key(file_path), pair.entry_index, pair.direction, pair.attempts, int(pair.correct), time())
+    )
+
+def commit_progress() -> None:
+    """ Commits the pending pair updates. """
+
+    get_connection().commit()
+
+def load_deck_progress(file_path: Path) -> Optional[ProgressSnapshot]:
+    """ Returns the stored progress of a deck as a snapshot, or None if the deck has no progress. """
+
+    connection = get_connection()
+    deck = get_deck_key(file_path)
+    row = connection.execute("SELECT deck_hash, entries FROM decks WHERE deck = ?", (deck,)).fetchone()
+    if row is None:
+        return None
+
+    deck_hash, entry_count = row
+    directions = bytearray([NOT_IN_SESSION]) * entry_count
+    attempts = array(UINT32, bytes(4 * entry_count))
+    correct = bytearray(entry_count)
+    for entry, direction, entry_attempts, entry_correct in connection.execute(
+        "SELECT entry, direction, attempts, correct FROM pairs WHERE deck = ?", (deck,)
+    ):
+        directions[entry] = direction
+        attempts[entry] = entry_attempts
+        correct[entry] = entry_correct
+    window = connection.execute("SELECT state FROM windows WHERE deck = ?", (deck,)).fetchone()
+    return ProgressSnapshot(deck_hash, directions, attempts, correct, loads(window[0]) if window is not None else None)
+
+def has_deck_progress(file_path: Path) -> bool:
+    """ Returns True if progress is stored for the deck. """
+
+    return get_connection().execute("SELECT 1 FROM decks WHERE deck = ?", (get_deck_key(file_path),)).fetchone() is not None
+
+def count_pending_pairs(file_path: Path) -> Optional[int]:
+    """ Returns the number of stored pairs of the deck not answered correctly yet, or None if the deck has no progress.
+    For a study window, the entries it has not pulled yet are counted too. """
+
+    if has_deck_window(file_path):
+        return count_pending_entries(load_deck_progress(file_path))
+    if not has_deck_progress(file_path):
+        return None
+    return get_connection().execute(
+        "SELECT COUNT(*) FROM pairs WHERE deck = ? AND correct = 0", (get_deck_key(file_path),)
+    ).fetchone()[0]
+
+def has_deck_window(file_path: Path) -> bool:
+    """ Returns True if the deck's progress belongs to a study window. """
+
+    return get_connection().execute("SELECT 1 FROM windows WHERE deck = ?", (get_deck_key(file_path),)).fetchone() is not None
+
+def list_decks_in_progress() -> List[str]:
+    """ Returns the names of all decks with stored progress, sorted. """
+
+    return [deck for deck, in get_connection().execute("SELECT deck FROM decks ORDER BY deck")]
+
+def clear_deck_progress(file_path: Path) -> None:
+    """ Deletes the stored progress of a deck. """
+
+    with get_connection() as connection:
+        connection.execute("DELETE FROM decks WHERE deck = ?", (get_deck_key(file_path),))
+
+def clear_all_progress() -> int:
+    """ Deletes the stored progress of every deck and returns the number of decks cleared. """
+
+    with get_connection() as connection:
+        return connection.execute("DELETE FROM decks").rowcount
@@ -0,0 +1,79 @@
+""" Renders styled text for the terminal: caches the styled form of each word and composes blocks of lines written at once.
+
+Colors are used when stdout is a terminal; when output is piped or redirected, plain text is written instead.
+Set VOCAB_TRAINER_COLOR to 'always' or 'never' to override the detection. """
+
+from functools import lru_cache
+from os import environ
+from sys import stdout
+from typing import List
+
+from colorama import Fore, Style
+
+from core.console import write_output
+from core.utils import convert_markdown_to_text
+
+
+COLOR_MODE = environ.get("VOCAB_TRAINER_COLOR", "auto")
+
+STYLED_TEXT_CACHE_SIZE = 65536
+
+def is_color_enabled() -> bool:
+    """ Returns True if output should be styled: always, never, or when stdout is a terminal. """
+
+    if COLOR_MODE in ("always", "never"):
+        return COLOR_MODE == "always"
+    return stdout.isatty()
+
+USE_COLOR = is_color_enabled()
+
+def color(name: str) -> str:
+    """ Returns the escape sequence of a colorama foreground color, or an empty string without colors. """
+
+    return getattr(Fore, name) if USE_COLOR else ""
+
+def reset() -> str:
+    """ Returns the escape sequence resetting all styles, or an empty string without colors. """
+
+    return Style.RESET_ALL if USE_COLOR else ""
+
+@lru_cache(maxsize=STYLED_TEXT_CACHE_SIZE)
+def render_markdown(text: str) -> str:
+    """ Returns the displayed form of a word: '*' sections in bright style, or with the markers removed without colors.
+    Word texts are interned and shown again and again, so each one is converted once. """
+
+    if not USE_COLOR:
+        return text.replace("*", "")
+    return convert_markdown_to_text(text)
+
+def render_words(texts: List[str]) -> str:
+    """ Returns the displayed form of a comma-separated list of words. """
+
+    return ", ".join(render_markdown(text) for text in texts)
+
+class OutputBlock:
+    """ Collects the lines of one question or result block, so they reach the output in a single write. """
+
+    __slots__ = ("lines",)
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def add(self, text: str = "") -> "OutputBlock":
+        """ Appends one line to the block. """
+
+        self.lines.append(text)
+        return self
+
+    def add_colored(self, color_name: str, text: str) -> "OutputBlock":
+        """ Appends one line in the given colorama foreground color. """
+
+        self.lines.append(f"{color(color_name)}{text}{reset()}")
+        return self
+
+    def flush(self) -> None:
+        """ Writes the collected lines at once and empties the block. """
+
+        if self.lines:
+            write_output("\n".join(self.lines))
+            self.lines.clear()
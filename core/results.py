@@ -1,74 +1,130 @@
 """ Processes and displays quiz results, including statistics and summary of user performance. """
 
-from colorama import Fore, Style
 from pathlib import Path
-from typing import List
+from time import perf_counter
+from typing import List, Optional, Sequence
 
-from core.utils import build_progress_path, convert_markdown_to_text, TranslationPair
+from core.catalog import record_pending_count
+from core.console import read_input, write_output
+from core.events import close_event_log, EVENT_LOG_ENABLED, rank_hard_pairs, record_answer
+from core.matching import NEAR_MISS_DISTANCE, normalize_answer
+from core.progress_store import clear_deck_progress, SQLITE_PROGRESS
+from core.render import color, OutputBlock, render_markdown, render_words, reset
+from core.session_state import get_pairs_with_attempts_over, get_session_statistics
+from core.timing import span
+from core.utils import build_journal_path, build_progress_path, TranslationPair, WordGroup
 
 
-def run_results(remaining_translations: List[TranslationPair], file_path: Path):
+def run_results(remaining_translations: List[TranslationPair], files: List[Path]):
     """ Handles the end-of-session results, including identifying failed translations,
-    offering review and retry options, and clearing progress files. """
+    offering review and retry options, and clearing the progress files of every vocab file in the session. """
     
+    display_session_statistics(remaining_translations)
     failed_translations = get_failed_translations(remaining_translations)
     if failed_translations:
-        print("Some words had multiple wrong attempts before being solved.")
+        write_output("Some words were hard for you: frequent mistakes or slow answers.")
         if prompt_yes_no("Do you want to review your mistakes?"):
             review_failed_translations(failed_translations)
-    clear_progress(file_path)
+            close_event_log()
+    for file_path in files:
+        clear_progress(file_path)
 
 def get_failed_translations(translations: List[TranslationPair]) -> List[TranslationPair]:
-    """ Returns a list of translations that had more than two failed attempts. """
+    """ Returns the hard translations, hardest first, ranked by their error rate and response times over all
+    recorded answers. Without the event log, returns the translations that had more than two failed attempts. """
     
-    return [t for t in translations if t.attempts > 2]
+    if EVENT_LOG_ENABLED:
+        return rank_hard_pairs(translations)
+    return get_pairs_with_attempts_over(translations, 2)
+
+def display_session_statistics(translations: List[TranslationPair]) -> None:
+    """ Displays how many entries were practiced, how many answers were given and the share right on the first try. """
+
+    statistics = get_session_statistics(translations)
+    if not statistics["pairs"]:
+        return
+    first_try = statistics["first_try"] / statistics["pairs"]
+    write_output(f"📊 {statistics['pairs']} entry(ies), {statistics['answers']} answer(s), {first_try:.0%} right on the first try.\n")
 
 def prompt_yes_no(message: str) -> bool:
     """ Prompts the user with a yes/no question and returns True for 'y', False otherwise. """
     
-    return input(f"{message} (y/n): ").strip().lower() == "y"
+    return read_input(f"{message} (y/n): ").strip().lower() == "y"
 
 def review_failed_translations(failed_translations: List[TranslationPair]) -> None:
     """ Displays failed translations and offers the user a chance to retry them manually. """
     
-    print(f"\n{Fore.YELLOW}Reviewing your mistakes:{Style.RESET_ALL}")
+    block = OutputBlock().add().add_colored("YELLOW", "Reviewing your mistakes:")
     for translation in failed_translations:
-        show_failed_translation(translation)
-    
-    print()
+        add_failed_translation(block, translation)
+    block.add().flush()
     if prompt_yes_no("Would you like to retry these manually?"):
         retry_failed_translations(failed_translations)
 
-def show_failed_translation(translation: TranslationPair) -> None:
-    """ Prints a single failed translation with its prompts, answers, and attempt count. """
+def add_failed_translation(block: OutputBlock, translation: TranslationPair) -> None:
+    """ Adds a single failed translation with its prompts, answers, and attempt count to the review block. """
     
-    prompts = convert_markdown_to_text(', '.join([word.text for word in translation.prompt.words]))
-    answers = convert_markdown_to_text(', '.join([word.text for word_group in translation.answers.groups for word in word_group.words]))
-    print(f"❌ {Fore.CYAN}{prompts} ➜ {answers}{Style.RESET_ALL} | Attempts: {translation.attempts}")
+    prompts = render_words([word.text for word in translation.prompt.words])
+    answers = render_words(get_answer_texts(translation))
+    block.add(f"❌ {color('CYAN')}{prompts} ➜ {answers}{reset()} | Attempts: {translation.attempts}")
+
+def get_answer_texts(translation: TranslationPair) -> List[str]:
+    """ Returns the texts of every answer of a translation, across all answer groups. """
+
+    return [word.text for word_group in translation.answers.groups for word in word_group.words]
 
 def retry_failed_translations(failed_translations: List[TranslationPair]) -> None:
-    """ Allows the user to manually retry each failed translation and provides feedback. """
+    """ Allows the user to manually retry each failed translation and provides feedback.
+    Every retry is recorded in the event log like a quiz answer. """
     
     for translation in failed_translations:
-        user_input = input(f"{', '.join([word.text for word in translation.prompt.words])} ➜ ").strip()
-        if is_correct_answer(user_input, [word.text for word_group in translation.answers.groups for word in word_group.words]):
-            print(f"{Fore.GREEN}✅ Correct!{Style.RESET_ALL}\n")
+        start = perf_counter()
+        user_input = read_input(f"{', '.join([word.text for word in translation.prompt.words])} ➜ ", translation.answers.groups[0]).strip()
+        response_time = perf_counter() - start
+        with span("check"):
+            correct = is_correct_answer(user_input, translation.answers.groups)
+            near_miss = None if correct else find_near_miss(user_input, translation.answers.groups)
+        record_answer(translation, response_time, correct or near_miss is not None, near_miss is not None)
+        if correct:
+            write_output(f"{color('GREEN')}✅ Correct!{reset()}\n")
+        elif near_miss is not None:
+            write_output(f"{color('YELLOW')}≈ Near miss, check the spelling: {render_markdown(near_miss)}{reset()}\n")
         else:
-            print(f"{Fore.RED}❌ Still incorrect. The answer(s) are: {', '.join([word.text for word_group in translation.answers.groups for word in word_group.words])}{Style.RESET_ALL}\n")
+            write_output(f"{color('RED')}❌ Still incorrect. The answer(s) are: {render_words(get_answer_texts(translation))}{reset()}\n")
 
-def is_correct_answer(user_input: str, answers: List[str]) -> bool:
-    """ Checks if the user's input matches any of the correct answers (case-insensitive, ignoring asterisks). """
+def is_correct_answer(user_input: str, answer_groups: Sequence[WordGroup]) -> bool:
+    """ Checks if the user's input matches any of the correct answers of any group
+    (case-insensitive, ignoring asterisks and repeated whitespace). """
     
-    normalized_answers = ["".join(answer.lower().split("*")) for answer in answers]
-    return user_input.lower() in normalized_answers
+    normalized_input = normalize_answer(user_input)
+    return any(normalized_input in group.match_index for group in answer_groups)
+
+def find_near_miss(user_input: str, answer_groups: Sequence[WordGroup], max_distance: int = NEAR_MISS_DISTANCE) -> Optional[str]:
+    """ Returns the answer of any group closest to the user's input within max_distance edits,
+    or None if near misses are disabled or none is close enough. """
+
+    if max_distance <= 0:
+        return None
+
+    normalized_input = normalize_answer(user_input)
+    near_misses = [group.find_near_miss(normalized_input, max_distance) for group in answer_groups]
+    return next((near_miss for near_miss in near_misses if near_miss is not None), None)
 
 def clear_progress(file_path: Path) -> None:
-    """ Removes the progress file and cleans up any empty parent directories up to the data root. """
+    """ Removes the progress file and its journal, and cleans up any empty parent directories up to the data root.
+    With the SQLite backend, deletes the deck's rows from the progress database instead. """
     
+    if SQLITE_PROGRESS:
+        clear_deck_progress(file_path)
+        write_output(f"{color('GREEN')}Progress cleared!{reset()}")
+        return
+
     progress_file = build_progress_path(file_path)
     progress_file.unlink(missing_ok=True)
+    build_journal_path(file_path).unlink(missing_ok=True)
     remove_empty_parent_dirs(progress_file)
-    print(f"{Fore.GREEN}Progress cleared!{Style.RESET_ALL}")
+    record_pending_count(file_path, None)
+    write_output(f"{color('GREEN')}Progress cleared!{reset()}")
 
 def remove_empty_parent_dirs(path: Path, root=Path("data")) -> None:
     """ Recursively deletes empty parent directories up to the specified root directory. """
@@ -1,48 +1,68 @@
 """ Saves user progress and failed translations to files for future review or session resumption. """
 
-from json import dump
+from os import replace
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from core.catalog import DeckVersion, get_deck_version, record_pending_count
+from core.json_codec import encode_json, JSON_PRETTY
+from core.progress_format import build_snapshot, count_pending_entries, encode_snapshot, ProgressSnapshot
+from core.progress_store import save_deck_progress, save_deck_snapshot, SQLITE_PROGRESS
+from core.timing import span
 from core.utils import build_progress_path, TranslationPair
 
 
-def serialize_translation(translation: TranslationPair) -> Dict[str, Any]:
-    """ Converts a TranslationPair object into a serializable dictionary. """
-    
-    return {
-        "prompts": {
-            "words": [word.text for word in translation.prompt.words],
-            "categorie": translation.prompt.categorie
-        },
-        "answers": [
-            {
-                "words": [word.text for word in word_group.words],
-                "categorie": word_group.categorie
-            }
-        for word_group in translation.answers.groups
-        ],
-        "attempts": translation.attempts,
-        "correct": translation.correct
-    }
-
 def ensure_directory_exists(path: Path) -> None:
     """ Ensures that the parent directory of the given path exists. """
     
     path.parent.mkdir(parents=True, exist_ok=True)
 
-def write_json_to_file(data: List[Dict[str, Any]], file_path: Path) -> None:
-    """ Writes a list of dictionaries to a file in JSON format. """
+def write_json_to_file(data: Dict[str, Any], file_path: Path, pretty: bool = JSON_PRETTY) -> None:
+    """ Writes a dictionary to a file in JSON format, compact unless pretty is True (VOCAB_TRAINER_JSON_PRETTY=1).
+    The data is written to a temporary file first and renamed over the target, so a crash never leaves a partial file. """
     
-    with file_path.open("w", encoding="utf-8") as f:
-        dump(data, f, ensure_ascii=False, indent=2)
+    temp_path = file_path.with_suffix(".tmp")
+    temp_path.write_bytes(encode_json(data, pretty))
+    replace(temp_path, file_path)
 
-def save_failed_translations(failed_translations: List[TranslationPair], original_file_path: Path) -> None:
+def save_failed_translations(failed_translations: List[TranslationPair], original_file_path: Path, base: Optional[ProgressSnapshot] = None,
+                             version: Optional[DeckVersion] = None) -> None:
     """ Saves the progress of failed translations to a JSON file.
-    Each TranslationPair object is serialized and written to a progress file
-    determined by the original file path. """
+    Only the deck's content hash and, per entry, the prompt direction, attempts and correctness are written;
+    the words themselves are read back from the vocab file on resume.
+    version is the content hash and entry count of the file the pairs were loaded from, captured by the session, so a deck
+    edited since then is not saved under its new hash; without it, they are read from the current file.
+    A study window passes the snapshot holding its retired entries and window state as base, and the pairs are written over it.
+    With the SQLite backend, the pairs replace the deck's rows in the progress database instead. """
     
-    progress_file = build_progress_path(original_file_path)
-    ensure_directory_exists(progress_file)
-    serialized_data = [serialize_translation(t) for t in failed_translations]
-    write_json_to_file(serialized_data, progress_file)
+    if SQLITE_PROGRESS and base is None:
+        deck_hash, entry_count = version if version is not None else get_deck_version(original_file_path)
+        with span("write_snapshot"):
+            save_deck_progress(original_file_path, failed_translations, entry_count, deck_hash)
+        return
+
+    save_progress_snapshot(build_progress_snapshot(failed_translations, original_file_path, base, version), original_file_path)
+
+def build_progress_snapshot(pairs: List[TranslationPair], original_file_path: Path, base: Optional[ProgressSnapshot] = None,
+                            version: Optional[DeckVersion] = None) -> ProgressSnapshot:
+    """ Builds the snapshot save_failed_translations writes for the pairs, over a copy of base if given.
+    The snapshot holds copies of the pairs' values, so it can be written later while the session goes on. """
+
+    if base is not None:
+        version = (base.deck_hash, len(base.directions))
+    deck_hash, entry_count = version if version is not None else get_deck_version(original_file_path)
+    return build_snapshot(pairs, entry_count, deck_hash, base)
+
+def save_progress_snapshot(snapshot: ProgressSnapshot, original_file_path: Path) -> None:
+    """ Atomically writes a snapshot as the progress file of a vocab file and records its pending count in the catalog.
+    With the SQLite backend, the snapshot replaces the deck's rows in the progress database instead. """
+
+    with span("write_snapshot"):
+        if SQLITE_PROGRESS:
+            save_deck_snapshot(original_file_path, snapshot)
+            return
+
+        progress_file = build_progress_path(original_file_path)
+        ensure_directory_exists(progress_file)
+        write_json_to_file(encode_snapshot(snapshot), progress_file)
+        record_pending_count(original_file_path, count_pending_entries(snapshot))
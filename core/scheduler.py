@@ -0,0 +1,80 @@
+""" Schedules quiz questions with Leitner boxes, keeping the active working set in a priority queue ordered by due time. """
+
+from heapq import heapify, heappop, heappush
+from random import shuffle
+from typing import List, Optional, Set, Tuple
+
+from core.utils import TranslationPair
+
+
+LEITNER_INTERVALS = (3, 8, 20)
+MASTERED_BOX = len(LEITNER_INTERVALS)
+
+Card = Tuple[int, int, int, TranslationPair]
+
+class LeitnerScheduler:
+    """ Picks the next due pair in O(log n) and tracks the number of remaining pairs in O(1).
+    Time is counted in answered questions. A wrong answer sends a pair back to the first box,
+    each correct answer moves it up one box, and a correct answer in the last box masters it.
+    Pairs that were never asked start in the last box, so a pair answered correctly the first time is mastered at once.
+    Pairs that were already asked without being mastered, e.g. in a resumed session, start in the first box,
+    since boxes are not saved with the progress. """
+
+    def __init__(self, pairs: List[TranslationPair]):
+        active = [pair for pair in pairs if not pair.correct]
+        shuffle(active)
+        self.step = 0
+        self.sequence = len(active)
+        self.queue: List[Card] = [(0, i, get_start_box(pair), pair) for i, pair in enumerate(active)]
+        heapify(self.queue)
+        self.remaining = len(active)
+        self.removed: Set[TranslationPair] = set()
+
+    def next_card(self) -> Optional[Card]:
+        """ Removes and returns the pair with the earliest due time, or None once every pair is mastered. """
+
+        while self.queue:
+            card = heappop(self.queue)
+            if card[-1] not in self.removed:
+                return card
+            self.removed.discard(card[-1])
+        return None
+
+    def add_pairs(self, pairs: List[TranslationPair]) -> None:
+        """ Queues new pairs as due now, in their starting box like the pairs the session started with. """
+
+        for pair in pairs:
+            if not pair.correct:
+                self.sequence += 1
+                heappush(self.queue, (self.step, self.sequence, get_start_box(pair), pair))
+                self.remaining += 1
+
+    def remove_pairs(self, pairs: List[TranslationPair]) -> None:
+        """ Drops pairs from the session. Their cards stay queued and are skipped when they come up. """
+
+        for pair in pairs:
+            if not pair.correct:
+                self.removed.add(pair)
+                self.remaining -= 1
+
+    def reschedule(self, card: Card, correct: bool) -> None:
+        """ Moves the pair of an answered card to its next box and queues it again,
+        or marks it correct and retires it if it was mastered. """
+
+        _, _, box, pair = card
+        self.step += 1
+        box = box + 1 if correct else 0
+
+        if box >= MASTERED_BOX:
+            pair.correct = True
+            self.remaining -= 1
+            return
+
+        pair.correct = False
+        self.sequence += 1
+        heappush(self.queue, (self.step + LEITNER_INTERVALS[box], self.sequence, box, pair))
+
+def get_start_box(pair: TranslationPair) -> int:
+    """ Returns the box a pair enters the schedule in: the last box if it was never asked, the first box otherwise. """
+
+    return MASTERED_BOX - 1 if pair.attempts == 0 else 0
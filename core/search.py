@@ -0,0 +1,264 @@
+""" Finds the decks containing a word through a persistent inverted index of every word of the vocab tree.
+
+The index maps each word, normalized the same way answers are checked, to its deck, entry and category, in a SQLite
+table ordered by word, so exact and prefix lookups are a single range scan. It is refreshed incrementally before each
+search: only decks whose size, modification time and content hash changed are indexed again. Decks are read from their
+deck cache when one was already compiled and from the vocab file otherwise; searching never compiles a deck. Usage:
+
+    python -m core.search bleu
+    python -m core.search blu --prefix --limit 50
+    python -m core.search blu --prefix --quiz 1
+"""
+
+from argparse import ArgumentParser
+from collections import defaultdict
+from json import dumps, loads
+from pathlib import Path
+from sqlite3 import connect, Connection
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from core.deck_cache import build_deck_cache_path, is_deck_cache_supported, MappedDeck, open_deck_cache
+from core.loader import iter_raw_vocab_entries, read_vocab_categories
+from core.matching import normalize_answer
+from core.trainer import run_quiz
+from core.utils import compute_file_hash, get_deck_key, VocabStream
+
+
+SEARCH_INDEX_PATH = Path("data") / ".search.sqlite3"
+VOCAB_DIR = Path("vocab")
+
+DEFAULT_LIMIT = 20
+CACHE_SIZE_KB = 64 * 1024
+PREFIX_END = chr(0x10FFFF)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id INTEGER PRIMARY KEY,
+    deck TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    deck_hash TEXT NOT NULL,
+    categories TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS words (
+    form TEXT NOT NULL,
+    deck_id INTEGER NOT NULL,
+    entry INTEGER NOT NULL,
+    category INTEGER NOT NULL,
+    PRIMARY KEY (form, deck_id, entry, category)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS words_deck ON words (deck_id);
+"""
+
+Hit = Dict[str, Any]
+
+def open_search_index() -> Connection:
+    """ Opens the search index, creating the database and its tables on first use. """
+
+    SEARCH_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    connection = connect(SEARCH_INDEX_PATH)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    connection.executescript(SCHEMA)
+    return connection
+
+def refresh_search_index(connection: Connection) -> Dict[str, int]:
+    """ Brings the index up to date with vocab/: indexes new decks, re-indexes decks whose content changed
+    and drops decks that were removed. A deck whose size or modification time changed but whose content hash
+    did not only has its recorded file state updated. The refresh is a single transaction.
+    Returns how many decks were indexed, unchanged and removed. """
+
+    indexed = {deck: (deck_id, mtime_ns, size, deck_hash) for deck_id, deck, mtime_ns, size, deck_hash in
+               connection.execute("SELECT id, deck, mtime_ns, size, deck_hash FROM decks")}
+    counts = {"indexed": 0, "unchanged": 0, "removed": 0}
+
+    with connection:
+        for file_path in sorted(VOCAB_DIR.rglob("*.json")):
+            if not file_path.is_file():
+                continue
+            deck = get_deck_key(file_path)
+            file_stat = file_path.stat()
+            previous = indexed.pop(deck, None)
+            if previous is not None and previous[1:3] == (file_stat.st_mtime_ns, file_stat.st_size):
+                counts["unchanged"] += 1
+                continue
+
+            deck_hash = compute_file_hash(file_path)
+            if previous is not None and previous[3] == deck_hash:
+                connection.execute("UPDATE decks SET mtime_ns = ?, size = ? WHERE id = ?", (file_stat.st_mtime_ns, file_stat.st_size, previous[0]))
+                counts["unchanged"] += 1
+                continue
+            index_deck(connection, file_path, deck, previous[0] if previous is not None else None,
+                       file_stat.st_mtime_ns, file_stat.st_size, deck_hash)
+            counts["indexed"] += 1
+
+        for deck_id, _, _, _ in indexed.values():
+            connection.execute("DELETE FROM words WHERE deck_id = ?", (deck_id,))
+            connection.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+            counts["removed"] += 1
+    return counts
+
+def index_deck(connection: Connection, file_path: Path, deck: str, deck_id: Optional[int], mtime_ns: int, size: int, deck_hash: str) -> None:
+    """ Replaces the postings of a deck with one row per distinct normalized word of each entry and category.
+    Postings are inserted in key order, which keeps inserting into the word index sequential.
+    A deck that cannot be read is recorded without words, so it is not read again until it changes. """
+
+    if deck_id is not None:
+        connection.execute("DELETE FROM words WHERE deck_id = ?", (deck_id,))
+        connection.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+
+    try:
+        vocab_data = read_deck(file_path)
+        categories = list(vocab_data.languages)
+        postings = sorted(set(iter_deck_postings(vocab_data)))
+    except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError):
+        categories, postings = [], []
+
+    deck_id = connection.execute(
+        "INSERT INTO decks (deck, mtime_ns, size, deck_hash, categories) VALUES (?, ?, ?, ?, ?)",
+        (deck, mtime_ns, size, deck_hash, dumps(categories, ensure_ascii=False))
+    ).lastrowid
+    connection.executemany("INSERT INTO words (form, deck_id, entry, category) VALUES (?, ?, ?, ?)",
+                           ((form, deck_id, entry, category) for form, entry, category in postings))
+
+def read_deck(file_path: Path) -> Union[MappedDeck, VocabStream]:
+    """ Opens a deck without compiling it: its deck cache if one was already compiled and is up to date,
+    otherwise a VocabStream reading the vocab file. """
+
+    if is_deck_cache_supported(file_path) and build_deck_cache_path(file_path).is_file():
+        deck = open_deck_cache(file_path)
+        if deck is not None:
+            return deck
+    return VocabStream(read_vocab_categories(file_path), lambda: iter_raw_vocab_entries(file_path), file_path)
+
+def iter_deck_postings(vocab_data: Union[MappedDeck, VocabStream]) -> Iterator[Tuple[str, int, int]]:
+    """ Yields the normalized form, entry index and category index of every word of a deck. """
+
+    if isinstance(vocab_data, MappedDeck):
+        return iter_mapped_postings(vocab_data)
+    return iter_raw_postings(vocab_data.languages, vocab_data.open_raw_entries())
+
+def iter_raw_postings(categories: List[str], raw_entries: Iterable[List[List[str]]]) -> Iterator[Tuple[str, int, int]]:
+    """ Yields the postings of a deck from the raw word lists of its entries, without building the entries.
+    Raises IndexError if an entry has more groups than the deck has categories. """
+
+    forms: Dict[str, str] = {}
+    for i, entry in enumerate(raw_entries):
+        if len(entry) > len(categories):
+            raise IndexError("entry has more groups than the deck has categories")
+        for category, group in enumerate(entry):
+            for word in group:
+                form = forms.get(word)
+                if form is None:
+                    form = forms[word] = normalize_answer(word)
+                if form:
+                    yield form, i, category
+
+def iter_mapped_postings(deck: MappedDeck) -> Iterator[Tuple[str, int, int]]:
+    """ Yields the postings of a compiled deck straight from its arrays, without building its entries.
+    Its string table stores each distinct word once, so each one is normalized once. """
+
+    forms: Dict[int, str] = {}
+    for i in range(deck.entry_count):
+        group_start, group_end = deck.entry_groups[i], deck.entry_groups[i + 1]
+        for g in range(group_start, group_end):
+            for w in range(deck.group_words[g], deck.group_words[g + 1]):
+                string_id = deck.word_strings[w]
+                form = forms.get(string_id)
+                if form is None:
+                    form = forms[string_id] = normalize_answer(deck.get_string(string_id))
+                if form:
+                    yield form, i, g - group_start
+
+def search_words(connection: Connection, query: str, prefix: bool = False, limit: int = DEFAULT_LIMIT) -> List[Hit]:
+    """ Returns the words matching the query, normalized like an answer, exactly or as a prefix,
+    ordered by word then deck, with their deck, entry index and category. """
+
+    form = normalize_answer(query)
+    if not form:
+        return []
+
+    if prefix:
+        condition, parameters = "w.form >= ? AND w.form < ?", (form, form + PREFIX_END)
+    else:
+        condition, parameters = "w.form = ?", (form,)
+    rows = connection.execute(
+        f"SELECT w.form, d.deck, w.entry, d.categories, w.category FROM words w JOIN decks d ON d.id = w.deck_id "
+        f"WHERE {condition} ORDER BY w.form, d.deck, w.entry, w.category LIMIT ?",
+        (*parameters, limit)
+    )
+    return [
+        {"form": form, "deck": deck, "entry": entry, "category": loads(categories)[category]}
+        for form, deck, entry, categories, category in rows
+    ]
+
+def add_entry_words(hits: List[Hit]) -> None:
+    """ Adds the words of each hit's entry, read from its deck, as one list per category.
+    Hits of a deck that can no longer be read keep no words. """
+
+    hits_by_deck: Dict[str, List[Hit]] = defaultdict(list)
+    for hit in hits:
+        hit["words"] = {}
+        hits_by_deck[hit["deck"]].append(hit)
+
+    for deck, deck_hits in hits_by_deck.items():
+        try:
+            found = get_entries(read_deck(VOCAB_DIR / f"{deck}.json").entries, {hit["entry"] for hit in deck_hits})
+        except (OSError, ValueError):
+            continue
+        for hit in deck_hits:
+            entry = found.get(hit["entry"])
+            if entry is not None:
+                hit["words"] = {group.categorie: [word.text.replace("*", "") for word in group.words] for group in entry.groups}
+
+def get_entries(entries: Any, wanted: Set[int]) -> Dict[int, Any]:
+    """ Returns the wanted entries by index: indexed directly in a compiled deck, read in one pass from a streamed one. """
+
+    if isinstance(entries, Sequence):
+        return {i: entries[i] for i in wanted if i < len(entries)}
+    return {i: entry for i, entry in enumerate(entries) if i in wanted}
+
+def display_hits(hits: List[Hit]) -> None:
+    """ Prints the hits, numbered, with the words of their entry. """
+
+    if not hits:
+        print("No matching word.")
+        return
+    for number, hit in enumerate(hits, 1):
+        words = " ➜ ".join(", ".join(texts) for texts in hit["words"].values())
+        print(f"[{number}] {hit['deck']} #{hit['entry']} ({hit['category']}): {words}")
+
+def main() -> None:
+    """ Parses the command line, refreshes the index, prints the hits and optionally starts a quiz on the deck of one of them. """
+
+    parser = ArgumentParser(description="Find the decks containing a word.")
+    parser.add_argument("query", help="word to search, compared like an answer (case, repeated spaces and '*' ignored)")
+    parser.add_argument("--prefix", action="store_true", help="match every word starting with the query")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="maximum number of hits")
+    parser.add_argument("--no-refresh", action="store_true", help="search the index as is, without checking vocab/ for changes")
+    parser.add_argument("--quiz", type=int, metavar="N", help="start a quiz session on the deck of hit N")
+    parser.add_argument("--json", action="store_true", help="print the hits as JSON")
+    args = parser.parse_args()
+
+    connection = open_search_index()
+    try:
+        if not args.no_refresh:
+            refresh_search_index(connection)
+        hits = search_words(connection, args.query, args.prefix, args.limit)
+    finally:
+        connection.close()
+    add_entry_words(hits)
+
+    if args.json:
+        print(dumps(hits, indent=2, ensure_ascii=False))
+    else:
+        display_hits(hits)
+
+    if args.quiz is not None:
+        if not 1 <= args.quiz <= len(hits):
+            parser.error(f"there is no hit {args.quiz}")
+        run_quiz([VOCAB_DIR / f"{hits[args.quiz - 1]['deck']}.json"])
+
+if __name__ == "__main__":
+    main()
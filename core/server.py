@@ -0,0 +1,543 @@
+""" Serves the quiz to many learners at once over HTTP/JSON on localhost, built on asyncio.
+
+Every deck is parsed once into a shared, read-only cache and reloaded only when its file changes.
+Each learner has their own progress namespace, data/learners/<learner>/, journaled by the background writer. Usage:
+
+    python -m core.server --port 8765
+
+Endpoints (request and response bodies are JSON):
+
+    GET    /decks                    the deck names inside vocab/
+    POST   /sessions                 {"learner": "ana", "decks": ["french/colors"], "mode": "random", "resume": true}
+                                     409 if the learner already has an open session on one of the decks
+    GET    /sessions/<id>            the current question
+    POST   /sessions/<id>/answer     {"answers": ["red"]}, one answer per expected language
+    DELETE /sessions/<id>            saves the learner's progress and ends the session
+"""
+
+from argparse import ArgumentParser
+from asyncio import Future, get_running_loop, IncompleteReadError, run, start_server, StreamReader, StreamWriter, to_thread
+from json import dumps, loads
+from os import stat_result
+from pathlib import Path
+from random import choice, shuffle
+from re import compile as compile_pattern
+from secrets import token_hex
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.journal import MIN_COMPACTION_RECORDS
+from core.json_codec import decode_progress
+from core.loader import load_vocab_data, read_journal_records, rehydrate_translations
+from core.persistence import flush_persistence, get_background_writer
+from core.progress_format import apply_record, build_snapshot, encode_snapshot, ProgressSnapshot
+from core.saver import ensure_directory_exists, write_json_to_file
+from core.session_state import build_session_pairs, get_incorrect_pairs
+from core.trainer import match_answer
+from core.translations_selector import generate_translation_pairs, get_common_languages, get_entry_digest
+from core.utils import build_translation_pair, compute_file_hash, get_deck_key, get_progress_filename, get_relative_vocab_path, TranslationPair, VocabData
+
+
+VOCAB_DIR = Path("vocab")
+LEARNERS_DIR = Path("data") / "learners"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CONNECTION_BACKLOG = 1024
+MAX_HEADER_LINES = 64
+MAX_BODY_SIZE = 64 * 1024
+SESSION_IDLE_TIMEOUT = 30 * 60
+
+LEARNER_PATTERN = compile_pattern(r"[A-Za-z0-9_-]{1,64}")
+STATUS_TEXTS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+class RequestError(ValueError):
+    """ A request that cannot be served, answered with the given HTTP status and the message as JSON. """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class CachedDeck:
+    """ A parsed deck shared by every session, with the file state it was parsed from
+    and the digest of each entry, used to merge decks without hashing their entries again for every session. """
+
+    __slots__ = ("vocab_data", "hash", "stat_key", "digests")
+
+    def __init__(self, vocab_data: VocabData, deck_hash: str, stat_key: Tuple[int, int]):
+        self.vocab_data = vocab_data
+        self.hash = deck_hash
+        self.stat_key = stat_key
+        self.digests = [get_entry_digest(build_translation_pair(entry, i, 0)) for i, entry in enumerate(vocab_data.entries)]
+
+    def iter_unique_pairs(self, pairs: Iterable[TranslationPair], seen: Set[bytes]) -> Iterator[TranslationPair]:
+        """ Yields the pairs of this deck whose entry was not seen yet, recording each entry's digest in seen. """
+
+        for pair in pairs:
+            digest = self.digests[pair.entry_index]
+            if digest not in seen:
+                seen.add(digest)
+                yield pair
+
+class DeckCache:
+    """ Parses each deck once, in a worker thread, and hands the same read-only VocabData to every session.
+    Sessions asking for a deck that is being parsed wait for that parse instead of starting their own. """
+
+    def __init__(self):
+        self.decks: Dict[str, CachedDeck] = {}
+        self.loading: Dict[str, Future] = {}
+
+    async def get(self, deck: str) -> CachedDeck:
+        """ Returns the cached deck, parsing it first if it is not cached or its file changed since. """
+
+        file_path = get_deck_file(deck)
+        stat_key = get_stat_key(file_path.stat())
+        cached = self.decks.get(deck)
+        if cached is not None and cached.stat_key == stat_key:
+            return cached
+
+        if deck in self.loading:
+            return await self.loading[deck]
+
+        future = get_running_loop().create_future()
+        self.loading[deck] = future
+        try:
+            cached = await to_thread(parse_deck, file_path, stat_key)
+            self.decks[deck] = cached
+            future.set_result(cached)
+            return cached
+        except BaseException as error:
+            future.set_exception(error)
+            future.exception()
+            raise
+        finally:
+            del self.loading[deck]
+
+def parse_deck(file_path: Path, stat_key: Tuple[int, int]) -> CachedDeck:
+    """ Parses a deck, hashes its file and digests its entries. Runs in a worker thread. """
+
+    return CachedDeck(load_vocab_data(str(file_path)), compute_file_hash(file_path), stat_key)
+
+def get_stat_key(file_stat: stat_result) -> Tuple[int, int]:
+    """ Returns the modification time and size identifying a version of a file. """
+
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+def get_deck_file(deck: str) -> Path:
+    """ Returns the vocab file of a deck name such as 'french/colors'.
+    Raises a RequestError for names leaving vocab/ and for missing decks. """
+
+    file_path = VOCAB_DIR / f"{deck}.json"
+    if ".." in Path(deck).parts or Path(deck).is_absolute() or not file_path.is_file():
+        raise RequestError(404, f"Unknown deck: {deck}")
+    return file_path
+
+def list_decks() -> List[str]:
+    """ Returns the names of every deck inside vocab/, sorted. """
+
+    return sorted(get_deck_key(file) for file in VOCAB_DIR.rglob("*.json") if file.is_file())
+
+def validate_learner(learner: Any) -> str:
+    """ Returns the learner name, which names their progress folder. Raises a RequestError if it is not a safe folder name. """
+
+    if not isinstance(learner, str) or not LEARNER_PATTERN.fullmatch(learner):
+        raise RequestError(400, "learner must be 1 to 64 letters, digits, '_' or '-'.")
+    return learner
+
+def build_learner_progress_path(learner: str, file_path: Path) -> Path:
+    """ Constructs the progress file path of a vocabulary file inside the learner's own progress folder. """
+
+    relative = get_relative_vocab_path(file_path)
+    return LEARNERS_DIR / learner / relative.with_suffix("").with_name(get_progress_filename(relative.stem))
+
+class LearnerProgress:
+    """ A learner's progress of one deck: a snapshot plus an append-only journal with one record per answer,
+    in the same record format as the trainer's journal. The journal is folded into the snapshot once it holds
+    more records than the snapshot has pairs, and when the session ends. Writes run on the background writer. """
+
+    def __init__(self, learner: str, deck: CachedDeck, pairs: List[TranslationPair]):
+        self.deck = deck
+        self.pairs = pairs
+        self.progress_path = build_learner_progress_path(learner, deck.vocab_data.source)
+        self.journal_path = self.progress_path.with_suffix(".journal")
+        self.lock = Lock()
+        self.pending: Dict[int, TranslationPair] = {}
+        self.records = 0
+
+    def record(self, pair: TranslationPair) -> None:
+        """ Queues the pair's answer for the journal. A pair answered again before the writer runs is written once. """
+
+        with self.lock:
+            self.pending[pair.entry_index] = pair
+        get_background_writer().submit((self, "record"), self.write_pending)
+
+    def write_pending(self) -> None:
+        """ Appends the queued answers to the journal, compacting it when it grew too large. """
+
+        with self.lock:
+            pairs, self.pending = list(self.pending.values()), {}
+        ensure_directory_exists(self.journal_path)
+        with self.journal_path.open("a", encoding="utf-8") as f:
+            f.writelines(dumps({"i": pair.entry_index, "a": pair.attempts, "c": int(pair.correct)}, separators=(",", ":")) + "\n" for pair in pairs)
+        self.records += len(pairs)
+        if self.records > max(MIN_COMPACTION_RECORDS, len(self.pairs)):
+            self.compact()
+
+    def compact(self) -> None:
+        """ Atomically rewrites the snapshot from the current pairs, then removes the journal. """
+
+        ensure_directory_exists(self.progress_path)
+        snapshot = build_snapshot(self.pairs, len(self.deck.vocab_data.entries), self.deck.hash)
+        write_json_to_file(encode_snapshot(snapshot), self.progress_path)
+        self.journal_path.unlink(missing_ok=True)
+        self.records = 0
+
+    def clear(self) -> None:
+        """ Removes the snapshot and the journal. """
+
+        self.progress_path.unlink(missing_ok=True)
+        self.journal_path.unlink(missing_ok=True)
+
+    def submit(self, name: str, task: Callable[[], None]) -> None:
+        """ Queues a snapshot task after the answers already queued. """
+
+        get_background_writer().submit((self, name), task)
+
+def load_learner_progress(learner: str, deck: CachedDeck) -> List[TranslationPair]:
+    """ Rebuilds a learner's saved pairs of a deck from the snapshot and its journal. Returns an empty list if there are none,
+    if the file is unreadable or if the deck changed since they were saved. """
+
+    progress_path = build_learner_progress_path(learner, deck.vocab_data.source)
+    try:
+        snapshot = decode_progress(progress_path.read_bytes())
+    except (OSError, ValueError):
+        return []
+    if not isinstance(snapshot, ProgressSnapshot) or snapshot.deck_hash != deck.hash:
+        return []
+
+    for record in read_journal_records(progress_path.with_suffix(".journal")):
+        apply_record(snapshot, record)
+    return rehydrate_translations(snapshot, deck.vocab_data)
+
+class QuizSession:
+    """ One learner's quiz over one or more decks, in rounds: every entry not answered correctly is asked once per round.
+    Each answer is journaled in the learner's progress of its deck by the background writer. """
+
+    def __init__(self, learner: str, decks: List[CachedDeck], pairs: List[TranslationPair]):
+        self.id = token_hex(8)
+        self.learner = learner
+        self.decks = {deck.vocab_data.source: deck for deck in decks}
+        self.pairs = pairs
+        pairs_by_deck: Dict[Path, List[TranslationPair]] = {source: [] for source in self.decks}
+        for pair in pairs:
+            pairs_by_deck[pair.source].append(pair)
+        self.progress = {source: LearnerProgress(learner, self.decks[source], deck_pairs) for source, deck_pairs in pairs_by_deck.items()}
+        for progress in self.progress.values():
+            progress.submit("compact", progress.compact)
+        self.queue: List[TranslationPair] = []
+        self.round = 0
+        self.current: Optional[TranslationPair] = None
+        self.prompt = ""
+        self.last_used = monotonic()
+        self.next_question()
+
+    def next_question(self) -> None:
+        """ Moves to the next question, starting a new round when the current one is over.
+        Leaves no current question once every entry is answered correctly. """
+
+        if not self.queue:
+            self.queue = get_incorrect_pairs(self.pairs)
+            shuffle(self.queue)
+            self.round += 1
+        self.current = self.queue.pop() if self.queue else None
+        self.prompt = choice(self.current.prompt.words).text if self.current is not None else ""
+
+    def describe(self) -> Dict[str, Any]:
+        """ Returns the session state sent to the client: the current question, or None once the quiz is over. """
+
+        question = None
+        if self.current is not None:
+            question = {
+                "categorie": self.current.prompt.categorie,
+                "prompt": self.prompt.replace("*", ""),
+                "answer_categories": [group.categorie for group in self.current.answers.groups]
+            }
+        return {"session": self.id, "round": self.round, "remaining": len(self.queue) + (self.current is not None), "question": question}
+
+    def answer(self, answers: Any) -> Dict[str, Any]:
+        """ Checks one answer per expected language against the current question, journals it and moves on. Returns the outcome together with the next question. """
+
+        pair = self.current
+        if pair is None:
+            raise RequestError(400, "The quiz is over.")
+        if not isinstance(answers, list) or len(answers) != len(pair.answers.groups) or not all(isinstance(a, str) for a in answers):
+            raise RequestError(400, f"answers must be a list of {len(pair.answers.groups)} string(s).")
+
+        matches = [match_answer(answer, group) for answer, group in zip(answers, pair.answers.groups)]
+        correct = all(accepted for accepted, _ in matches)
+        pair.attempts += 1
+        pair.correct = correct
+        self.progress[pair.source].record(pair)
+        self.next_question()
+        if self.current is None:
+            for progress in self.progress.values():
+                progress.submit("clear", progress.clear)
+
+        outcome = {
+            "correct": correct,
+            "near_misses": [near_miss for _, near_miss in matches],
+            "expected": [[word.text.replace("*", "") for word in group.words] for group in pair.answers.groups]
+        }
+        outcome.update(self.describe())
+        return outcome
+
+    def close(self) -> None:
+        """ Queues folding the journals into the snapshots, unless the quiz is over and the progress was cleared. """
+
+        if self.current is not None:
+            for progress in self.progress.values():
+                progress.submit("compact", progress.compact)
+
+def build_session(learner: str, decks: List[CachedDeck], resume: bool, mode: Optional[str]) -> QuizSession:
+    """ Builds a learner's session over the given decks. Saved progress is resumed unless resume is false;
+    the other decks get new pairs in the requested mode. Entries found in several decks are only asked once. """
+
+    seen: Set[bytes] = set()
+    pairs: List[TranslationPair] = []
+    new_decks = []
+    for deck in decks:
+        saved_pairs = load_learner_progress(learner, deck) if resume else []
+        if not saved_pairs:
+            new_decks.append(deck)
+        pairs.extend(deck.iter_unique_pairs(saved_pairs, seen))
+
+    if new_decks:
+        languages = get_common_languages([deck.vocab_data for deck in new_decks])
+        mode = mode or languages[0]
+        if mode != "random" and mode not in languages:
+            raise RequestError(400, f"mode must be one of: {', '.join(languages + ['random'])}.")
+        for deck in new_decks:
+            pairs.extend(deck.iter_unique_pairs(generate_translation_pairs(deck.vocab_data, mode), seen))
+
+    return QuizSession(learner, decks, build_session_pairs(pairs))
+
+class QuizServer:
+    """ Routes requests to the shared deck cache and the open sessions.
+    A learner has at most one open session per deck, since each one journals the learner's progress of its decks. """
+
+    def __init__(self):
+        self.decks = DeckCache()
+        self.sessions: Dict[str, QuizSession] = {}
+        self.claims: Dict[Tuple[str, str], Optional[str]] = {}
+
+    async def handle(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        """ Serves one request and returns the status and the JSON response. """
+
+        parts = path.strip("/").split("/")
+        if parts == ["decks"] and method == "GET":
+            return 200, {"decks": list_decks()}
+        if parts == ["sessions"] and method == "POST":
+            return 201, await self.create_session(body)
+        if len(parts) == 2 and parts[0] == "sessions" and method == "GET":
+            return 200, self.get_session(parts[1]).describe()
+        if len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+            self.close_session(parts[1])
+            return 200, {"closed": True}
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "answer" and method == "POST":
+            return 200, self.get_session(parts[1]).answer(body.get("answers"))
+        raise RequestError(404, f"No route for {method} {path}")
+
+    async def create_session(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """ Starts a session of a learner over the requested decks. The session is built in a worker thread,
+        so answers of other learners keep being served while a large deck is turned into pairs.
+        Raises a RequestError with status 409 if the learner already has a session on one of the decks. """
+
+        learner = validate_learner(body.get("learner"))
+        names = body.get("decks")
+        if not isinstance(names, list) or not names or not all(isinstance(name, str) for name in names):
+            raise RequestError(400, "decks must be a non-empty list of deck names.")
+
+        self.expire_sessions()
+        keys = list(dict.fromkeys((learner, get_deck_key(get_deck_file(name))) for name in names))
+        self.claim_decks(keys)
+        try:
+            decks = [await self.decks.get(deck) for _, deck in keys]
+            session = await to_thread(build_session, learner, decks, body.get("resume", True), body.get("mode"))
+        except BaseException:
+            self.release_decks(keys)
+            raise
+        self.claims.update(dict.fromkeys(keys, session.id))
+        self.sessions[session.id] = session
+        return session.describe()
+
+    def claim_decks(self, keys: List[Tuple[str, str]]) -> None:
+        """ Reserves (learner, deck) keys for a session being built. A finished session holding one of them is closed;
+        raises a RequestError if an open session or one being built holds one. """
+
+        for key in keys:
+            if key not in self.claims:
+                continue
+            session = self.sessions.get(self.claims[key])
+            if session is None or session.current is not None:
+                raise RequestError(409, f"Learner {key[0]} already has an open session on {key[1]}.")
+            self.close_session(session.id)
+        self.claims.update(dict.fromkeys(keys))
+
+    def release_decks(self, keys: Iterable[Tuple[str, str]]) -> None:
+        """ Frees (learner, deck) keys for new sessions. """
+
+        for key in keys:
+            self.claims.pop(key, None)
+
+    def get_session(self, session_id: str) -> QuizSession:
+        """ Returns an open session and marks it as used. Raises a RequestError if there is no such session. """
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise RequestError(404, f"Unknown session: {session_id}")
+        session.last_used = monotonic()
+        return session
+
+    def close_session(self, session_id: str) -> None:
+        """ Ends a session, queuing the save of its progress, and frees its decks for the learner's next session. """
+
+        session = self.get_session(session_id)
+        session.close()
+        del self.sessions[session_id]
+        self.release_decks([(session.learner, get_deck_key(source)) for source in session.decks])
+
+    def expire_sessions(self) -> None:
+        """ Ends the sessions left idle for longer than SESSION_IDLE_TIMEOUT. Their progress is saved. """
+
+        limit = monotonic() - SESSION_IDLE_TIMEOUT
+        for session_id in [session.id for session in self.sessions.values() if session.last_used < limit]:
+            self.close_session(session_id)
+
+    def close(self) -> None:
+        """ Ends every open session and waits until all progress is written. """
+
+        for session_id in list(self.sessions):
+            self.close_session(session_id)
+        flush_persistence()
+
+async def read_request(reader: StreamReader) -> Optional[Tuple[str, str, Dict[str, str], Any]]:
+    """ Reads one HTTP/1.1 request: method, path, lower-cased headers and decoded JSON body (an empty dict without body).
+    Returns None when the client closed the connection. """
+
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "Malformed request line.") from None
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise RequestError(400, "Too many headers.")
+
+    length = parse_content_length(headers.get("content-length", ""))
+    try:
+        body = loads(await reader.readexactly(length)) if length else {}
+    except ValueError:
+        raise RequestError(400, "The request body is not valid JSON.") from None
+    if not isinstance(body, dict):
+        raise RequestError(400, "The request body must be a JSON object.")
+    return method, path.split("?", 1)[0], headers, body
+
+def parse_content_length(value: str) -> int:
+    """ Returns the body length given by a Content-Length header, 0 without one.
+    Raises a RequestError for a value that is not a non-negative decimal integer, or that exceeds MAX_BODY_SIZE. """
+
+    if not value:
+        return 0
+    if not (value.isascii() and value.isdigit()):
+        raise RequestError(400, "Invalid Content-Length header.")
+    length = int(value)
+    if length > MAX_BODY_SIZE:
+        raise RequestError(413, "Request body too large.")
+    return length
+
+def build_response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    """ Encodes a JSON response with its status line and headers. """
+
+    body = dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {STATUS_TEXTS.get(status, '')}\r\nContent-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+async def serve_connection(server: QuizServer, reader: StreamReader, writer: StreamWriter) -> None:
+    """ Serves the requests of one connection, kept alive until the client closes it or asks to.
+    A malformed request closes the connection after its error response. Cancellation closes it and propagates. """
+
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except RequestError as error:
+                writer.write(build_response(error.status, {"error": str(error)}, False))
+                await writer.drain()
+                break
+            if request is None:
+                break
+
+            method, path, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+            status, payload = await respond(server, method, path, body)
+            writer.write(build_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def respond(server: QuizServer, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Any]:
+    """ Serves one request, turning errors into JSON error responses: RequestError with its status,
+    other ValueErrors (such as an invalid deck) as 400 and anything else as 500. """
+
+    try:
+        return await server.handle(method, path, body)
+    except RequestError as error:
+        return error.status, {"error": str(error)}
+    except ValueError as error:
+        return 400, {"error": str(error)}
+    except Exception as error:
+        return 500, {"error": f"{type(error).__name__}: {error}"}
+
+async def serve(host: str, port: int) -> None:
+    """ Listens for clients until interrupted, then saves the progress of every open session. """
+
+    server = QuizServer()
+    listener = await start_server(lambda reader, writer: serve_connection(server, reader, writer), host, port, backlog=CONNECTION_BACKLOG)
+    print(f"Serving the quiz on http://{host}:{port} (Ctrl-C to stop).", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+def main() -> None:
+    """ Parses the command line and runs the server. """
+
+    parser = ArgumentParser(description="Serve the quiz to many learners over HTTP/JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on (localhost by default)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    args = parser.parse_args()
+
+    try:
+        run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
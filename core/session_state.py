@@ -0,0 +1,265 @@
+""" Keeps the per-pair state of a session in columns, so counts, filters and statistics run over packed arrays instead of objects.
+
+The attempts, correctness, prompt direction and entry index of every pair live in `array`/`bytearray` columns.
+Each TranslationPair of the session becomes a ColumnarPair, a view reading and writing its own row.
+NumPy is used for the vectorized operations when it is installed; the standard library is used otherwise.
+Set VOCAB_TRAINER_COLUMNAR=0 to keep plain TranslationPair objects. """
+
+from array import array
+from itertools import compress
+from os import environ
+from random import choices as sample_with_replacement, getrandbits
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.progress_format import UINT32
+from core.utils import AnswerGroups, TranslationPair, WordGroup
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+COLUMNAR_SESSION_ENABLED = environ.get("VOCAB_TRAINER_COLUMNAR", "1") != "0"
+
+NOT_CORRECT = bytes([1]) + bytes(255)
+
+# Stored in place of the entry index or direction of a pair that has none, such as a pair of the original progress format
+NO_ENTRY = 0xFFFFFFFF
+NO_DIRECTION = 0xFF
+
+def to_entry_cell(entry_index: Optional[int]) -> int:
+    """ Returns the value stored in the entries column for an entry index. """
+
+    return NO_ENTRY if entry_index is None else entry_index
+
+def to_direction_cell(direction: Optional[int]) -> int:
+    """ Returns the value stored in the directions column for a prompt direction. """
+
+    return NO_DIRECTION if direction is None else direction
+
+class SessionColumns:
+    """ The attempts, correctness, direction and entry index of every pair of a session, one row per pair. """
+
+    __slots__ = ("attempts", "correct", "directions", "entries")
+
+    def __init__(self):
+        self.attempts = array(UINT32)
+        self.correct = bytearray()
+        self.directions = bytearray()
+        self.entries = array(UINT32)
+
+    def append(self, entry_index: Optional[int], direction: Optional[int], attempts: int, correct: bool) -> int:
+        """ Adds a row and returns its index. """
+
+        self.entries.append(to_entry_cell(entry_index))
+        self.directions.append(to_direction_cell(direction))
+        self.attempts.append(attempts)
+        self.correct.append(correct)
+        return len(self.correct) - 1
+
+    def write(self, row: int, entry_index: Optional[int], direction: Optional[int], attempts: int, correct: bool) -> None:
+        """ Overwrites a row. """
+
+        self.entries[row] = to_entry_cell(entry_index)
+        self.directions[row] = to_direction_cell(direction)
+        self.attempts[row] = attempts
+        self.correct[row] = correct
+
+    def pop(self) -> None:
+        """ Removes the last row. """
+
+        self.entries.pop()
+        self.directions.pop()
+        self.attempts.pop()
+        self.correct.pop()
+
+class ColumnarPair(TranslationPair):
+    """ A translation pair whose attempts, correctness, direction and entry index are a row of the session columns. """
+
+    __slots__ = ("columns", "row")
+
+    def __init__(self, prompt: WordGroup, answers: AnswerGroups, columns: SessionColumns, row: int, source: Any = None):
+        self.prompt = prompt
+        self.answers = answers
+        self.source = source
+        self.columns = columns
+        self.row = row
+
+    @property
+    def attempts(self) -> int:
+        return self.columns.attempts[self.row]
+
+    @attempts.setter
+    def attempts(self, value: int) -> None:
+        self.columns.attempts[self.row] = value
+
+    @property
+    def correct(self) -> bool:
+        return bool(self.columns.correct[self.row])
+
+    @correct.setter
+    def correct(self, value: bool) -> None:
+        self.columns.correct[self.row] = bool(value)
+
+    @property
+    def direction(self) -> Optional[int]:
+        direction = self.columns.directions[self.row]
+        return None if direction == NO_DIRECTION else direction
+
+    @direction.setter
+    def direction(self, value: Optional[int]) -> None:
+        self.columns.directions[self.row] = to_direction_cell(value)
+
+    @property
+    def entry_index(self) -> Optional[int]:
+        entry_index = self.columns.entries[self.row]
+        return None if entry_index == NO_ENTRY else entry_index
+
+    @entry_index.setter
+    def entry_index(self, value: Optional[int]) -> None:
+        self.columns.entries[self.row] = to_entry_cell(value)
+
+    def detach(self) -> None:
+        """ Moves the pair's state out of the session columns into columns of its own, so its row can be reused. """
+
+        columns = SessionColumns()
+        columns.append(self.entry_index, self.direction, self.attempts, self.correct)
+        self.columns, self.row = columns, 0
+
+class SessionPairs(list):
+    """ The pairs of a session as a list of ColumnarPair views, with vectorized queries over their columns. """
+
+    def __init__(self, pairs: Iterable[TranslationPair] = ()):
+        super().__init__()
+        pairs = list(pairs)
+        columns = self.columns = SessionColumns()
+        columns.entries.extend([to_entry_cell(pair.entry_index) for pair in pairs])
+        columns.directions.extend([to_direction_cell(pair.direction) for pair in pairs])
+        columns.attempts.extend([pair.attempts for pair in pairs])
+        columns.correct.extend([pair.correct for pair in pairs])
+        self.extend([ColumnarPair(pair.prompt, pair.answers, columns, row, pair.source) for row, pair in enumerate(pairs)])
+
+    def replace_pairs(self, removed: List[TranslationPair], added: List[TranslationPair]) -> List[TranslationPair]:
+        """ Removes pairs of this session and adds new ones, reusing the rows of removed pairs first.
+        A freed row is filled with the last row, so removing does not renumber the rows in between.
+        Removed pairs are detached and keep their state. Returns the views of the added pairs. """
+
+        columns = self.columns
+        rows = [pair.row for pair in removed]
+        for pair in removed:
+            pair.detach()
+
+        views = []
+        for pair in added:
+            if rows:
+                row = rows.pop()
+                columns.write(row, pair.entry_index, pair.direction, pair.attempts, pair.correct)
+                self[row] = ColumnarPair(pair.prompt, pair.answers, columns, row, pair.source)
+            else:
+                row = columns.append(pair.entry_index, pair.direction, pair.attempts, pair.correct)
+                self.append(ColumnarPair(pair.prompt, pair.answers, columns, row, pair.source))
+            views.append(self[row])
+
+        for row in sorted(rows, reverse=True):
+            last = len(self) - 1
+            if row != last:
+                moved = self[row] = self[last]
+                columns.write(row, moved.entry_index, moved.direction, moved.attempts, moved.correct)
+                moved.row = row
+            self.pop()
+            columns.pop()
+        return views
+
+    def count_correct(self) -> int:
+        """ Returns the number of pairs answered correctly. """
+
+        return self.columns.correct.count(1)
+
+    def count_incorrect(self) -> int:
+        """ Returns the number of pairs not answered correctly yet. """
+
+        return len(self) - self.count_correct()
+
+    def get_incorrect_pairs(self) -> List[TranslationPair]:
+        """ Returns the pairs not answered correctly yet, in session order. """
+
+        return list(compress(self, self.columns.correct.translate(NOT_CORRECT)))
+
+    def get_pairs_with_attempts_over(self, threshold: int) -> List[TranslationPair]:
+        """ Returns the pairs that needed more than threshold attempts, in session order. """
+
+        if numpy is not None:
+            return list(compress(self, numpy.frombuffer(self.columns.attempts, dtype=numpy.uint32) > threshold))
+        return list(compress(self, (attempts > threshold for attempts in self.columns.attempts)))
+
+    def get_statistics(self) -> Dict[str, int]:
+        """ Returns the number of pairs, answers given, pairs answered correctly and pairs right on the first try. """
+
+        if numpy is not None:
+            attempts = numpy.frombuffer(self.columns.attempts, dtype=numpy.uint32)
+            correct = numpy.frombuffer(self.columns.correct, dtype=numpy.uint8)
+            first_try = int(numpy.count_nonzero((attempts == 1) & (correct == 1)))
+            answers = int(attempts.sum())
+        else:
+            first_try = sum(1 for attempts, correct in zip(self.columns.attempts, self.columns.correct) if attempts == 1 and correct)
+            answers = sum(self.columns.attempts)
+        return {"pairs": len(self), "answers": answers, "correct": self.count_correct(), "first_try": first_try}
+
+def build_session_pairs(pairs: Iterable[TranslationPair]) -> List[TranslationPair]:
+    """ Returns the pairs as SessionPairs, or as a plain list when columnar sessions are disabled. """
+
+    if COLUMNAR_SESSION_ENABLED:
+        return SessionPairs(pairs)
+    return list(pairs)
+
+def replace_session_pairs(pairs: List[TranslationPair], removed: List[TranslationPair], added: List[TranslationPair]) -> List[TranslationPair]:
+    """ Removes pairs from the session and adds new ones, in place. Returns the added pairs as the session holds them. """
+
+    if isinstance(pairs, SessionPairs):
+        return pairs.replace_pairs(removed, added)
+    removed_pairs = set(removed)
+    pairs[:] = [pair for pair in pairs if pair not in removed_pairs]
+    pairs.extend(added)
+    return added
+
+def count_incorrect_pairs(pairs: List[TranslationPair]) -> int:
+    """ Returns the number of pairs not answered correctly yet, from the columns when there are some. """
+
+    if isinstance(pairs, SessionPairs):
+        return pairs.count_incorrect()
+    return sum(1 for pair in pairs if not pair.correct)
+
+def get_incorrect_pairs(pairs: List[TranslationPair]) -> List[TranslationPair]:
+    """ Returns the pairs not answered correctly yet, from the columns when there are some. """
+
+    if isinstance(pairs, SessionPairs):
+        return pairs.get_incorrect_pairs()
+    return [pair for pair in pairs if not pair.correct]
+
+def get_pairs_with_attempts_over(pairs: List[TranslationPair], threshold: int) -> List[TranslationPair]:
+    """ Returns the pairs that needed more than threshold attempts, from the columns when there are some. """
+
+    if isinstance(pairs, SessionPairs):
+        return pairs.get_pairs_with_attempts_over(threshold)
+    return [pair for pair in pairs if pair.attempts > threshold]
+
+def get_session_statistics(pairs: List[TranslationPair]) -> Dict[str, int]:
+    """ Returns the number of pairs, answers given, pairs answered correctly and pairs right on the first try. """
+
+    if isinstance(pairs, SessionPairs):
+        return pairs.get_statistics()
+    return {
+        "pairs": len(pairs),
+        "answers": sum(pair.attempts for pair in pairs),
+        "correct": sum(1 for pair in pairs if pair.correct),
+        "first_try": sum(1 for pair in pairs if pair.attempts == 1 and pair.correct)
+    }
+
+def generate_random_directions(count: int, choices: int) -> bytes:
+    """ Returns count random prompt directions between 0 and choices - 1, drawn in one vectorized call.
+    The draw is seeded from the random module, so random.seed() makes it reproducible. """
+
+    if numpy is not None:
+        return numpy.random.default_rng(getrandbits(64)).integers(0, choices, size=count, dtype=numpy.uint8).tobytes()
+    return bytes(sample_with_replacement(range(choices), k=count))
@@ -0,0 +1,187 @@
+""" Studies huge decks through a bounded window of pairs: only a fixed number of entries are in play at once,
+and the next entries of the decks are pulled in as earlier ones are mastered.
+
+Mastered pairs are retired: their attempts and correctness are written to the progress snapshot of their deck, which
+also records how far the window got and its translation mode, and the pairs are dropped from the session. Resuming
+rebuilds the entries that were in the window and carries on from there. Set VOCAB_TRAINER_STUDY_WINDOW to the number
+of entries of the window to enable it. """
+
+from itertools import compress
+from os import environ
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Set, Tuple, Union
+
+from core.catalog import get_deck_entry_count, get_deck_hash
+from core.deck_cache import MappedDeck
+from core.loader import load_progress_snapshot, open_vocab_stream
+from core.progress_format import build_snapshot, NOT_IN_SESSION, ProgressSnapshot, write_pair_rows
+from core.session_state import SessionPairs
+from core.translations_selector import get_common_languages, get_entry_digest, get_translation_mode, random_direction
+from core.utils import build_translation_pair, TranslationPair, VocabData, VocabEntry, VocabStream
+
+
+STUDY_WINDOW_SIZE = int(environ.get("VOCAB_TRAINER_STUDY_WINDOW", "0"))
+
+PairChanges = Tuple[List[TranslationPair], List[TranslationPair]]
+
+class WindowDeck:
+    """ One deck of a study window: its progress snapshot, holding the rows of retired entries and the window state,
+    the pairs it has in the window, in no particular order, and the entries it has not pulled yet. """
+
+    def __init__(self, file_path: Path, vocab_data: Union[MappedDeck, VocabData, VocabStream], snapshot: ProgressSnapshot):
+        self.file_path = file_path
+        self.languages = vocab_data.languages
+        self.snapshot = snapshot
+        self.pairs: List[TranslationPair] = []
+        self.positions: Dict[TranslationPair, int] = {}
+        self.entries = iter_window_entries(vocab_data.entries, snapshot)
+
+    def pull(self, count: int, seen: Set[bytes]) -> List[TranslationPair]:
+        """ Returns pairs for up to count of the next entries, skipping mastered entries and entries already seen in the session.
+        Saved attempts and prompt directions are kept; other entries are asked in the window's translation mode. """
+
+        snapshot, window = self.snapshot, self.snapshot.window
+        pairs = []
+        while len(pairs) < count:
+            item = next(self.entries, None)
+            if item is None:
+                break
+            i, entry = item
+            window["next"] = max(window["next"], i + 1)
+            if snapshot.correct[i]:
+                continue
+
+            direction = snapshot.directions[i]
+            if direction == NOT_IN_SESSION or direction >= len(entry.groups):
+                direction = get_mode_direction(window["mode"], self.languages, entry)
+            pair = build_translation_pair(entry, i, direction, snapshot.attempts[i], False, self.file_path)
+            digest = get_entry_digest(pair)
+            if digest in seen:
+                continue
+            seen.add(digest)
+            snapshot.directions[i] = direction
+            pairs.append(pair)
+        return pairs
+
+    def add_pairs(self, pairs: List[TranslationPair]) -> None:
+        """ Adds pairs of the session to the deck. """
+
+        for pair in pairs:
+            self.positions[pair] = len(self.pairs)
+            self.pairs.append(pair)
+
+    def retire(self, pair: TranslationPair) -> None:
+        """ Writes the pair's row to the snapshot, then drops the pair from the deck.
+        The last pair of the deck takes its place, so retiring does not shift the others. """
+
+        write_pair_rows(self.snapshot, [pair])
+        position = self.positions.pop(pair)
+        last = self.pairs.pop()
+        if last is not pair:
+            self.pairs[position] = last
+            self.positions[last] = position
+
+class StudyWindow(SessionPairs):
+    """ The pairs of a windowed session: at most size pairs of the selected decks, filled deck after deck.
+    Statistics include the pairs retired during the session. """
+
+    def __init__(self, decks: List[WindowDeck], size: int):
+        super().__init__()
+        self.decks = decks
+        self.size = size
+        self.seen: Set[bytes] = set()
+        self.retired = {"pairs": 0, "answers": 0, "correct": 0, "first_try": 0}
+        self.advance()
+
+    def advance(self) -> PairChanges:
+        """ Retires the mastered pairs of the window and fills the freed places with the next entries.
+        Returns the pairs added to and retired from the session. """
+
+        decks = {deck.file_path: deck for deck in self.decks}
+        mastered = list(compress(self, self.columns.correct))
+        for pair in mastered:
+            decks[pair.source].retire(pair)
+            self.retired["pairs"] += 1
+            self.retired["answers"] += pair.attempts
+            self.retired["correct"] += 1
+            self.retired["first_try"] += pair.attempts == 1
+
+        added: List[TranslationPair] = []
+        for deck in self.decks:
+            room = self.size - len(self) + len(mastered) - len(added)
+            if room <= 0:
+                break
+            added.extend(deck.pull(room, self.seen))
+
+        added = self.replace_pairs(mastered, added)
+        for pair in added:
+            decks[pair.source].add_pairs([pair])
+        return added, mastered
+
+    def get_statistics(self) -> Dict[str, int]:
+        """ Returns the statistics of the pairs in the window plus those of the pairs retired during the session. """
+
+        statistics = super().get_statistics()
+        return {key: value + self.retired[key] for key, value in statistics.items()}
+
+def open_study_window(use_saved: bool, selected_files: List[Path], size: int = STUDY_WINDOW_SIZE) -> StudyWindow:
+    """ Returns the study window of the selected files, filled with its first pairs.
+    If use_saved is True, each file with saved progress carries on where its window stopped; the translation mode
+    is prompted once for the other files. """
+
+    decks: Dict[Path, WindowDeck] = {}
+    new_decks = []
+    for file in selected_files:
+        vocab_data = open_vocab_stream(file)
+        snapshot = load_progress_snapshot(file, vocab_data) if use_saved else None
+        if snapshot is None:
+            new_decks.append((file, vocab_data))
+        else:
+            decks[file] = WindowDeck(file, vocab_data, snapshot)
+
+    if new_decks:
+        mode = get_translation_mode(get_common_languages([vocab_data for _, vocab_data in new_decks]))
+        for file, vocab_data in new_decks:
+            decks[file] = WindowDeck(file, vocab_data, build_window_snapshot(file, mode))
+
+    return StudyWindow([decks[file] for file in selected_files], max(size, 1))
+
+def build_window_snapshot(file_path: Path, mode: str) -> ProgressSnapshot:
+    """ Returns the snapshot of a deck no entry of which was pulled yet. """
+
+    snapshot = build_snapshot([], get_deck_entry_count(file_path), get_deck_hash(file_path))
+    snapshot.window = {"next": 0, "mode": mode}
+    return snapshot
+
+def iter_window_entries(entries: Any, snapshot: ProgressSnapshot) -> Iterator[Tuple[int, VocabEntry]]:
+    """ Yields, with their index, the entries that were in the window when it was saved, then the entries it did not reach.
+    A compiled deck is indexed directly, so the entries before the window's position are not read. """
+
+    start = snapshot.window["next"]
+    active = [i for i in range(start) if snapshot.directions[i] != NOT_IN_SESSION and not snapshot.correct[i]]
+
+    if isinstance(entries, Sequence):
+        yield from ((i, entries[i]) for i in active)
+        yield from ((i, entries[i]) for i in range(start, len(entries)))
+        return
+
+    active_entries = set(active)
+    for i, entry in enumerate(entries):
+        if i >= start or i in active_entries:
+            yield i, entry
+
+def get_mode_direction(mode: str, languages: List[str], entry: VocabEntry) -> int:
+    """ Returns the prompt direction of an entry in the given translation mode: a language, or a random one. """
+
+    direction = languages.index(mode) if mode in languages else None
+    if direction is None or direction >= len(entry.groups):
+        return random_direction(entry)
+    return direction
+
+def advance_window(pairs: List[TranslationPair]) -> PairChanges:
+    """ Retires the mastered pairs of a study window and pulls in the next entries; does nothing for other sessions.
+    Returns the pairs added to and retired from the session. """
+
+    if isinstance(pairs, StudyWindow):
+        return pairs.advance()
+    return [], []
@@ -0,0 +1,42 @@
+""" Times named stages of a session when a recorder is installed; when none is, a span is a shared no-op. """
+
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Callable, ContextManager, Optional
+
+
+SpanRecorder = Callable[[str, float, float], None]
+
+NULL_SPAN = nullcontext()
+
+_recorder: Optional[SpanRecorder] = None
+
+class TimedSpan:
+    """ Measures the time spent inside a with block and reports it to the installed recorder. """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "TimedSpan":
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if _recorder is not None:
+            _recorder(self.name, self.start, perf_counter() - self.start)
+
+def span(name: str) -> ContextManager:
+    """ Returns a context manager timing the named stage, or a shared no-op if no recorder is installed. """
+
+    if _recorder is None:
+        return NULL_SPAN
+    return TimedSpan(name)
+
+def set_span_recorder(recorder: Optional[SpanRecorder]) -> None:
+    """ Installs the function receiving (name, start, duration) for every finished span, or removes it with None. """
+
+    global _recorder
+    _recorder = recorder
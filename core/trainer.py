@@ -1,116 +1,261 @@
 """ Runs the vocabulary quiz logic, manages quiz rounds, and tracks correctness and attempts for each translation. """
 
-from colorama import Fore, Style
 from pathlib import Path
 from random import choice, shuffle
-from typing import List
-
-from core.saver import save_failed_translations
-from core.utils import convert_markdown_to_text, PromptGroup, TranslationPair, WordGroup
+from time import perf_counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.catalog import DeckVersion, get_deck_version
+from core.console import read_input, write_output
+from core.deck_watch import DeckWatcher, open_deck_watcher
+from core.events import close_event_log, record_answer
+from core.loader import should_resume_previous_session
+from core.matching import NEAR_MISS_DISTANCE, normalize_answer
+from core.persistence import Journal, open_session_journal
+from core.render import color, OutputBlock, render_markdown, render_words, reset
+from core.results import run_results
+from core.scheduler import LeitnerScheduler
+from core.session_state import count_incorrect_pairs, get_incorrect_pairs
+from core.study_window import advance_window, open_study_window, STUDY_WINDOW_SIZE
+from core.timing import span
+from core.translations_selector import select_translations
+from core.utils import TranslationPair, WordGroup
 
 
 PROGRESS_DIR = Path("data")
+SESSION_MODES = ["rounds", "leitner"]
+LEITNER_CHECKPOINT_INTERVAL = 50
+
+def select_session_mode() -> str:
+    """ Prompts the user to select a session mode: rounds (ask every remaining entry each round)
+    or leitner (spaced repetition with Leitner boxes). Returns the selected mode as a string. """
+
+    mode = read_input(f"Session? ({' / '.join(SESSION_MODES)}): ").strip().lower()
+    if mode not in SESSION_MODES:
+        write_output(f"Invalid session mode. Defaulting to {SESSION_MODES[0]}.")
+        return SESSION_MODES[0]
+    return mode
+
+def run_quiz(selected_files: List[Path]) -> None:
+    """ Runs a whole session on the selected vocab files: offers to resume saved progress, selects the pairs,
+    through a study window when VOCAB_TRAINER_STUDY_WINDOW is set, then runs the quiz in the chosen session mode
+    and shows the results. """
+
+    with span("should_resume_previous_session"):
+        use_saved = should_resume_previous_session(selected_files)
+    deck_versions = {file: get_deck_version(file) for file in selected_files}
+    with span("select_translations"):
+        if STUDY_WINDOW_SIZE > 0:
+            selected_translations = open_study_window(use_saved, selected_files)
+        else:
+            selected_translations = select_translations(use_saved, selected_files)
+    session_mode = select_session_mode()
+    with span("run_vocabulary_quiz"):
+        run_vocabulary_quiz(selected_translations, selected_files, session_mode, deck_versions)
+    with span("run_results"):
+        run_results(selected_translations, selected_files)
+
+def run_vocabulary_quiz(pairs: List[TranslationPair], files: List[Path], session_mode: str = "rounds",
+                        deck_versions: Optional[Dict[Path, DeckVersion]] = None) -> None:
+    """ Runs the vocabulary quiz until all entries are answered correctly, in the given session mode.
+    Every answer is appended to the progress journal of its vocab file, which is synced and,
+    when large enough, compacted at each checkpoint. Writing happens on the background writer,
+    and everything is on disk when this returns, even after Ctrl-C.
+    deck_versions holds the content hash and entry count of each vocab file captured before the pairs were loaded,
+    which the saves record. When deck watching is enabled, changes to the vocab files are merged into the pairs between questions. """
+
+    journal = open_session_journal(pairs, files, deck_versions)
+
+    try:
+        watcher = open_deck_watcher(pairs, files, journal)
+        if session_mode == "leitner":
+            run_leitner_session(pairs, journal, watcher)
+        else:
+            run_round_session(pairs, journal, watcher)
+    finally:
+        journal.close()
+        close_event_log()
+
+    display_completion_message()
 
-def run_vocabulary_quiz(pairs: List[TranslationPair], file_path: Path) -> None:
-    """ Runs the vocabulary quiz until all entries are answered correctly.
-    Displays progress after each round and saves progress to file. """
+def run_round_session(pairs: List[TranslationPair], journal: Journal, watcher: Optional[DeckWatcher] = None) -> None:
+    """ Asks every remaining entry once per round until all are answered correctly.
+    A study window retires its mastered entries and pulls in new ones between rounds.
+    Displays progress and checkpoints the journal after each round. """
 
     round_number = 1
 
     while has_incorrect_answers(pairs):
         entries_left = count_incorrect(pairs)
         display_round_header(round_number, entries_left)
-        pairs = conduct_quiz_round(pairs)
-        save_failed_translations(pairs, file_path)
+        pairs = conduct_quiz_round(pairs, journal, watcher)
+        advance_window(pairs)
+        with span("save"):
+            journal.checkpoint()
         round_number += 1
 
-    display_completion_message()
+def run_leitner_session(pairs: List[TranslationPair], journal: Journal, watcher: Optional[DeckWatcher] = None) -> None:
+    """ Asks the next due entry from the Leitner scheduler until every entry is mastered.
+    Displays progress and checkpoints the journal every LEITNER_CHECKPOINT_INTERVAL answers.
+    Pairs added or removed by a deck reload join or leave the scheduler, and a study window pulls in
+    a new entry each time one is mastered. """
+
+    scheduler = LeitnerScheduler(pairs)
+    display_remaining_header(scheduler.remaining)
+
+    while True:
+        if watcher is not None:
+            added, removed = watcher.poll()
+            scheduler.remove_pairs(removed)
+            scheduler.add_pairs(added)
+        with span("schedule"):
+            card = scheduler.next_card()
+        if card is None:
+            break
+
+        pair = card[-1]
+        scheduler.reschedule(card, ask_translation_question(pair))
+        with span("save"):
+            journal.record(pair)
+        if pair.correct:
+            scheduler.add_pairs(advance_window(pairs)[0])
+
+        if scheduler.step % LEITNER_CHECKPOINT_INTERVAL == 0:
+            with span("save"):
+                journal.checkpoint(scheduler.remaining)
+            display_remaining_header(scheduler.remaining)
 
 def has_incorrect_answers(pairs: List[TranslationPair]) -> bool:
     """ Returns True if there are entries not answered correctly. """
 
-    return any(not pair.correct for pair in pairs)
+    return count_incorrect_pairs(pairs) > 0
 
 def count_incorrect(pairs: List[TranslationPair]) -> int:
     """ Counts the number of entries not answered correctly. """
 
-    return sum(1 for pair in pairs if not pair.correct)
+    return count_incorrect_pairs(pairs)
 
 def display_round_header(round_number: int, entries_left: int) -> None:
     """ Displays the header for the current quiz round. """
 
-    print(f"\n--- {Fore.YELLOW}Round {round_number}{Style.RESET_ALL}: {entries_left} entry(ies) to review ---\n")
+    write_output(f"\n--- {color('YELLOW')}Round {round_number}{reset()}: {entries_left} entry(ies) to review ---\n")
 
-def conduct_quiz_round(pairs: List[TranslationPair]) -> List[TranslationPair]:
-    """ Conducts a single round of the quiz, asking questions for each entry.
+def display_remaining_header(entries_left: int) -> None:
+    """ Displays how many entries are left to master in a Leitner session. """
+
+    write_output(f"\n--- {color('YELLOW')}Leitner{reset()}: {entries_left} entry(ies) left to master ---\n")
+
+def conduct_quiz_round(pairs: List[TranslationPair], journal: Journal, watcher: Optional[DeckWatcher] = None) -> List[TranslationPair]:
+    """ Conducts a single round of the quiz, asking questions for each entry in random order
+    and journaling every answer. The list itself keeps its order.
+    Pairs removed by a deck reload are skipped; pairs it adds are asked from the next round.
     Returns the updated list of pairs. """
 
-    shuffle(pairs)
-    for pair in pairs:
+    order = get_incorrect_pairs(pairs)
+    shuffle(order)
+    removed: Set[TranslationPair] = set()
+    for pair in order:
+        if watcher is not None:
+            removed.update(watcher.poll()[1])
+            if pair in removed:
+                continue
         ask_translation_question(pair)
+        with span("save"):
+            journal.record(pair)
     return pairs
 
-def ask_translation_question(pair: TranslationPair) -> None:
+def ask_translation_question(pair: TranslationPair) -> bool:
     """ Asks the user a question for the given entry.
-    Updates the entry's correctness and attempts. """
+    Updates the entry's correctness and attempts, records the answer and its response time in the event log,
+    and returns True if every answer was correct. """
 
     if pair.correct:
-        return
+        return True
 
-    prompt_text = select_prompt(pair.prompt)
-    print(f"{pair.prompt.categorie} ➜ {Fore.CYAN}{convert_markdown_to_text(prompt_text)}{Style.RESET_ALL}")
-    print("----------")
+    with span("select"):
+        prompt_text = select_prompt(pair.prompt)
+    display_question(pair.prompt.categorie, prompt_text)
 
     user_inputs: List[tuple[str, WordGroup]] = []
 
+    start = perf_counter()
     for answer_group in pair.answers.groups:
-        print(f"{answer_group.categorie} ➜ ", end="")
-        user_input = input().strip()
+        user_input = read_input(f"{answer_group.categorie} ➜ ", answer_group).strip()
         user_inputs.append((user_input, answer_group))
+    response_time = perf_counter() - start
 
-    incorrect_groups: List[WordGroup] = []
-    correct = True
-    for user_input, answer_group in user_inputs:
-        if not is_correct_answer(user_input, answer_group):
-            correct = False
-            incorrect_groups.append(answer_group)
+    with span("check"):
+        matches = [(answer_group, match_answer(user_input, answer_group)) for user_input, answer_group in user_inputs]
+    incorrect_groups = [answer_group for answer_group, (accepted, _) in matches if not accepted]
+    correct = not incorrect_groups
 
+    block = OutputBlock()
     if correct:
-        display_correct_message()
+        add_correct_message(block)
+        for answer_group, (_, near_miss) in matches:
+            if near_miss is not None:
+                add_near_miss_message(block, answer_group, near_miss)
         pair.correct = True
     else:
-        display_incorrect_message()
+        add_incorrect_message(block)
         for group in incorrect_groups:
-            correct_answers = ', '.join([word.text for word in group.words])
-            print(f"{Fore.RED}Correct answer(s): {group.categorie} ➜ {convert_markdown_to_text(correct_answers)}{Style.RESET_ALL}")
+            add_correct_answers(block, group)
 
     pair.attempts += 1
-    print()
+    block.add().flush()
+    record_answer(pair, response_time, correct, any(near_miss is not None for _, (_, near_miss) in matches))
+    return correct
+
+def display_question(categorie: str, prompt_text: str) -> None:
+    """ Displays the prompt of a question and its separator in a single write. """
 
-def select_prompt(prompt_group: PromptGroup) -> str:
+    OutputBlock().add(f"{categorie} ➜ {color('CYAN')}{render_markdown(prompt_text)}{reset()}").add("----------").flush()
+
+def select_prompt(prompt_group: WordGroup) -> str:
     """ Selects a prompt from the entry's prompt group. """
 
     return choice(prompt_group.words).text
 
 def is_correct_answer(user_input: str, answer_group: WordGroup) -> bool:
     """ Checks if the user's input matches any of the correct answers.
-    Ignores case and asterisks. """
+    Ignores case, asterisks and repeated whitespace, using the group's precomputed match index. """
+
+    return normalize_answer(user_input) in answer_group.match_index
+
+def match_answer(user_input: str, answer_group: WordGroup, max_distance: int = NEAR_MISS_DISTANCE) -> Tuple[bool, Optional[str]]:
+    """ Checks the user's input against the group's answers, accepting near misses within max_distance edits.
+    Returns whether the input is accepted and, for a near miss, the answer it was taken for. """
+
+    normalized_input = normalize_answer(user_input)
+    if normalized_input in answer_group.match_index:
+        return True, None
+    if max_distance > 0:
+        near_miss = answer_group.find_near_miss(normalized_input, max_distance)
+        if near_miss is not None:
+            return True, near_miss
+    return False, None
+
+def add_correct_message(block: OutputBlock) -> None:
+    """ Adds the message for a correct answer to the result block. """
+
+    block.add_colored("GREEN", "✅ Correct!")
+
+def add_near_miss_message(block: OutputBlock, answer_group: WordGroup, near_miss: str) -> None:
+    """ Adds the correct spelling of an answer accepted as a near miss to the result block. """
 
-    normalized_input = user_input.lower().replace("*", "")
-    normalized_answers = ["".join(word.text.lower().split("*")) for word in answer_group.words]
-    return normalized_input in normalized_answers
+    block.add_colored("YELLOW", f"≈ Near miss, check the spelling: {answer_group.categorie} ➜ {render_markdown(near_miss)}")
 
-def display_correct_message() -> None:
-    """ Displays a message for a correct answer. """
+def add_incorrect_message(block: OutputBlock) -> None:
+    """ Adds the message for an incorrect answer to the result block. """
 
-    print(f"{Fore.GREEN}✅ Correct!{Style.RESET_ALL}")
+    block.add_colored("RED", "❌ Incorrect !!")
 
-def display_incorrect_message() -> None:
-    """ Displays a message for an incorrect answer, showing the correct answers. """
+def add_correct_answers(block: OutputBlock, group: WordGroup) -> None:
+    """ Adds the correct answers of a group that was answered incorrectly to the result block. """
 
-    print(f"{Fore.RED}❌ Incorrect !!{Style.RESET_ALL}")
+    block.add_colored("RED", f"Correct answer(s): {group.categorie} ➜ {render_words([word.text for word in group.words])}")
 
 def display_completion_message() -> None:
     """ Displays a message when all entries are answered correctly. """
 
-    print(f"{Fore.GREEN}🎉 All entries answered correctly!{Style.RESET_ALL}\n")
+    write_output(f"{color('GREEN')}🎉 All entries answered correctly!{reset()}\n")
@@ -1,60 +1,105 @@
 """ Allows the user to select which translations to practice from the loaded vocabulary set. """
 
+from hashlib import blake2b
 from pathlib import Path
 from random import randint
-from typing import List
+from typing import Iterable, Iterator, List, Sequence, Set
 
-from core.loader import load_vocab_data, load_translations_progress
-from core.utils import AnswerGroup, AnswerGroups, PromptGroup, TranslationPair, VocabData, VocabEntry
+from core.console import read_input, write_output
+from core.loader import load_translations_progress, open_vocab_stream
+from core.matching import normalize_answer
+from core.session_state import build_session_pairs, generate_random_directions
+from core.timing import span
+from core.utils import build_translation_pair, TranslationPair, VocabData, VocabEntry, VocabStream
 
 
-def select_translations(use_saved: bool, selected_file: Path) -> List[TranslationPair]:
-    """ Returns a list of Translation objects based on user selection.
-    If use_saved is True, loads saved progress. Otherwise, prompts for mode and generates translation pairs. """
+def select_translations(use_saved: bool, selected_files: List[Path]) -> List[TranslationPair]:
+    """ Returns a list of Translation objects for all selected files, merged into one session.
+    If use_saved is True, loads the saved progress of each file that has some. For the other files,
+    prompts for mode once and streams their pairs deck by deck. Entries found in several decks are only kept once.
+    The pairs are returned as views over columnar session state, see core.session_state. """
     
-    if use_saved:
-        return load_translations_progress(selected_file)
-    
-    vocab_data = load_vocab_data(selected_file)
-    mode = get_translation_mode(vocab_data)
-    pairs = generate_translation_pairs(vocab_data, mode)
+    seen: Set[bytes] = set()
+    pairs: List[TranslationPair] = []
+    new_files = []
+
+    for file in selected_files:
+        saved_pairs = load_translations_progress(file) if use_saved else []
+        if not saved_pairs:
+            new_files.append(file)
+        pairs.extend(iter_unique_pairs(saved_pairs, seen))
+
+    if new_files:
+        streams = [open_vocab_stream(file) for file in new_files]
+        mode = get_translation_mode(get_common_languages(streams))
+        with span("generate_pairs"):
+            for vocab_data in streams:
+                pairs.extend(iter_unique_pairs(generate_translation_pairs(vocab_data, mode), seen))
+
+    return build_session_pairs(pairs)
+
+def get_common_languages(decks: List[VocabStream]) -> List[str]:
+    """ Returns the languages shared by all decks, in the order of the first deck. """
 
-    return [TranslationPair(prompt, answers) for prompt, answers in pairs]
+    shared = set(decks[0].languages).intersection(*(deck.languages for deck in decks[1:]))
+    return [language for language in decks[0].languages if language in shared]
 
-def get_translation_mode(vocab_data: VocabData) -> str:
-    """ Prompts the user to select a translation mode: lang1, lang2, or random.
+def iter_unique_pairs(pairs: Iterable[TranslationPair], seen: Set[bytes]) -> Iterator[TranslationPair]:
+    """ Yields the pairs whose entry was not seen yet, recording each entry's digest in seen. """
+
+    for pair in pairs:
+        digest = get_entry_digest(pair)
+        if digest not in seen:
+            seen.add(digest)
+            yield pair
+
+def get_entry_digest(pair: TranslationPair) -> bytes:
+    """ Returns a short hash identifying the pair's entry regardless of the prompt direction and the order of
+    languages and synonyms, so the same card from different decks gets the same digest. """
+
+    groups = [pair.prompt] + list(pair.answers.groups)
+    key = sorted((group.categorie, sorted(normalize_answer(word.text) for word in group.words)) for group in groups)
+    return blake2b(repr(key).encode("utf-8"), digest_size=8).digest()
+
+def get_translation_mode(languages: List[str]) -> str:
+    """ Prompts the user to select a translation mode: one of the languages, or random.
     Returns the selected mode as a string. """
     
-    options = vocab_data.languages + ["random"]
-    mode = input(f"Mode? ({' / '.join(options)}): ").strip().lower()
+    options = languages + ["random"]
+    default = options[0]
+    mode = read_input(f"Mode? ({' / '.join(options)}): ").strip().lower()
     if mode not in options:
-        print(f"Invalid mode. Defaulting to {vocab_data.languages[0]}.")
-        return vocab_data.languages[0]
+        write_output(f"Invalid mode. Defaulting to {default}.")
+        return default
     return mode
 
-def generate_translation_pairs(vocab_data: VocabData, mode: str):
-    """ Builds translation pairs based on the selected mode.
+def generate_translation_pairs(vocab_data: VocabData, mode: str) -> Iterator[TranslationPair]:
+    """ Lazily builds translation pairs based on the selected mode.
     If mode is 'random', generates pairs with randomly selected prompt languages.
-    Otherwise, generates pairs with the specified prompt language. """
+    Otherwise, generates pairs with the specified prompt language.
+    Accepts a VocabData, a compiled MappedDeck or a VocabStream, whose entries are consumed one at a time. """
 
     if mode == "random":
-        return [random_pair(entry, vocab_data.languages) for entry in vocab_data.entries]
+        return generate_random_pairs(vocab_data)
     
     idx = vocab_data.languages.index(mode)
-    return [forward_pair(entry, idx, vocab_data.languages) for entry in vocab_data.entries]
+    return (build_translation_pair(entry, i, idx, source=vocab_data.source) for i, entry in enumerate(vocab_data.entries))
+
+def generate_random_pairs(vocab_data: VocabData) -> Iterator[TranslationPair]:
+    """ Builds translation pairs with random prompt languages. Decks with a known size draw every direction at once;
+    streamed decks, and entries with fewer groups than the deck has languages, draw one direction per entry. """
 
-def forward_pair(entry: VocabEntry, idx: int, languages: List[str]):
-    """ Constructs a translation pair for a specific language index. """
+    entries = vocab_data.entries
+    if not isinstance(entries, Sequence):
+        return (build_translation_pair(entry, i, random_direction(entry), source=vocab_data.source) for i, entry in enumerate(entries))
 
-    prompt_group = PromptGroup(entry.groups[idx].words, languages[idx])
-    answer_groups = AnswerGroups([
-        AnswerGroup(entry.groups[i].words, languages[i])
-        for i in range(len(entry.groups)) if i != idx
-    ])
-    return (prompt_group, answer_groups)
+    directions = generate_random_directions(len(entries), len(vocab_data.languages))
+    return (
+        build_translation_pair(entry, i, direction if direction < len(entry.groups) else random_direction(entry), source=vocab_data.source)
+        for i, (entry, direction) in enumerate(zip(entries, directions))
+    )
 
-def random_pair(entry: VocabEntry, languages: List[str]):
-    """ Constructs a translation pair with a randomly selected prompt language. """
+def random_direction(entry: VocabEntry) -> int:
+    """ Returns a randomly selected prompt language index for the entry. """
 
-    idx = randint(0, len(entry.groups) - 1)
-    return forward_pair(entry, idx, languages)
+    return randint(0, len(entry.groups) - 1)
@@ -1,66 +1,128 @@
 """ Provides utility functions and data structures (such as translation objects and markdown conversion) used across modules. """
 
-from colorama import init, Style
+from colorama import Style
+from hashlib import sha1
 from pathlib import Path
-from typing import Any, Dict, List
+from sys import intern
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence
 
+from core.fuzzy import BKTree, build_near_miss_index
+from core.matching import build_match_index
 
-init(autoreset=True)
+try:
+    from colorama import just_fix_windows_console
+except ImportError:
+    from colorama import init as just_fix_windows_console
+
+
+just_fix_windows_console()
 
 class VocabData:
-    def __init__(self, data_json: Dict[str, List[Any]]):
-        self.languages: List[str] = data_json["categories"]
+    def __init__(self, data_json: Dict[str, List[Any]], source: Optional[Path] = None):
+        self.source = source
+        self.languages: List[str] = [intern(language) for language in data_json["categories"]]
         self.entries: List[VocabEntry] = [
-            VocabEntry([
-                WordGroup([
-                    Word(word)
-                    for word in group
-                ], self.languages[i])
-                for i, group in enumerate(entry)
-            ])
+            build_vocab_entry(entry, self.languages)
             for entry in data_json["vocab"]
         ]
 
+class VocabStream:
+    """ Vocabulary data whose entries are built lazily, one at a time, each time they are iterated. """
+
+    def __init__(self, languages: List[str], open_raw_entries: Callable[[], Iterable[List[List[str]]]], source: Optional[Path] = None):
+        self.source = source
+        self.languages = [intern(language) for language in languages]
+        self.open_raw_entries = open_raw_entries
+
+    @property
+    def entries(self) -> Iterator["VocabEntry"]:
+        return (build_vocab_entry(entry, self.languages) for entry in self.open_raw_entries())
+
+def build_vocab_entry(raw_entry: List[List[str]], languages: List[str]) -> "VocabEntry":
+    """ Builds a VocabEntry from the raw word lists of one entry of the vocab JSON.
+    Groups and words are stored in tuples, and categories are expected to be interned already. """
+
+    return VocabEntry(tuple(
+        WordGroup(tuple(
+            Word(word)
+            for word in group
+        ), languages[i])
+        for i, group in enumerate(raw_entry)
+    ))
+
 class Word:
+    __slots__ = ("text",)
+
     def __init__(self, text: str):
-        self.text = text
+        self.text = intern(text)
 
 class WordGroup:
-    def __init__(self, words: List[Word], categorie: str):
+    __slots__ = ("words", "categorie", "_match_index", "_near_miss_index")
+
+    def __init__(self, words: Sequence[Word], categorie: str):
         self.words = words
-        self.categorie = categorie
+        self.categorie = intern(categorie)
+        self._match_index: Optional[FrozenSet[str]] = None
+        self._near_miss_index: Optional[BKTree] = None
 
-class VocabEntry:
-    def __init__(self, groups: List[WordGroup]):
-        self.groups = groups
+    @property
+    def match_index(self) -> FrozenSet[str]:
+        """ Normalized forms of the group's words, built once on first use. """
 
-class Prompt(Word):
-    pass
+        if self._match_index is None:
+            self._match_index = build_match_index(word.text for word in self.words)
+        return self._match_index
 
-class PromptGroup(WordGroup):
-    pass
+    def find_near_miss(self, normalized_input: str, max_distance: int) -> Optional[str]:
+        """ Returns the word closest to the normalized input within max_distance edits, or None.
+        The BK-tree of the group's words is built once on first use. """
 
-class Answer(Word):
-    pass
+        if self._near_miss_index is None:
+            self._near_miss_index = build_near_miss_index(word.text for word in self.words)
+        matches = self._near_miss_index.search(normalized_input, max_distance)
+        return matches[0][1] if matches else None
 
-class AnswerGroup(WordGroup):
-    pass
+class VocabEntry:
+    __slots__ = ("groups",)
+
+    def __init__(self, groups: Sequence[WordGroup]):
+        self.groups = groups
 
 class AnswerGroups(VocabEntry):
-    pass
+    __slots__ = ()
 
 class TranslationPair:
-    def __init__(self, prompt: PromptGroup, answers: AnswerGroups, attempts: int = 0, correct: bool = False):
+    __slots__ = ("prompt", "answers", "attempts", "correct", "entry_index", "direction", "source")
+
+    def __init__(self, prompt: WordGroup, answers: AnswerGroups, attempts: int = 0, correct: bool = False,
+                 entry_index: Optional[int] = None, direction: Optional[int] = None, source: Optional[Path] = None):
         self.prompt = prompt
         self.answers = answers
         self.attempts = attempts
         self.correct = correct
+        self.entry_index = entry_index
+        self.direction = direction
+        self.source = source
+
+def build_translation_pair(entry: VocabEntry, entry_index: int, direction: int, attempts: int = 0, correct: bool = False,
+                           source: Optional[Path] = None) -> TranslationPair:
+    """ Builds the pair that prompts with the entry's group at the given direction and expects every other group.
+    The pair references the entry's own word groups instead of copying them; source is the vocab file of the entry. """
+
+    groups = entry.groups
+    answers = AnswerGroups(groups[:direction] + groups[direction + 1:])
+    return TranslationPair(groups[direction], answers, attempts, correct, entry_index, direction, source)
 
 def get_relative_vocab_path(file_path: Path) -> Path:
     """ Returns the relative path of the vocabulary file with respect to the 'vocab' directory. """
 
     return file_path.relative_to("vocab")
 
+def get_deck_key(file_path: Path) -> str:
+    """ Returns the name a vocabulary file is stored and reported under: its path inside vocab/, without extension. """
+
+    return get_relative_vocab_path(Path(file_path)).with_suffix("").as_posix()
+
 def get_progress_filename(stem: str) -> str:
     """ Returns the progress filename for a given stem. """
 
@@ -73,6 +135,25 @@ def build_progress_path(file_path: Path) -> Path:
     progress_filename = get_progress_filename(relative.stem)
     return Path("data") / relative.with_suffix('').with_name(progress_filename)
 
+def is_learner_progress_file(progress_file: Path) -> bool:
+    """ Returns True if the progress file belongs to a learner of the quiz server, in data/learners/, rather than to the trainer. """
+
+    return Path(progress_file).parts[:2] == ("data", "learners")
+
+def build_journal_path(file_path: Path) -> Path:
+    """ Constructs the path of the progress journal that accompanies the progress file of a vocabulary file. """
+
+    return build_progress_path(file_path).with_suffix(".journal")
+
+def compute_file_hash(file_path: Path) -> str:
+    """ Returns the SHA-1 hex digest of a file's content, used to detect when a vocab file changed. """
+
+    digest = sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 def convert_markdown_to_text(markdown: str) -> str:
     """ Converts markdown text with asterisks to styled text using colorama styles.
     Alternates between normal and bright styles for each section split by '*'. """
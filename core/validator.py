@@ -0,0 +1,153 @@
+""" Checks every vocabulary file of the vocab tree across a process pool and prints a consolidated report.
+
+Usage:
+    python -m core.validator
+    python -m core.validator vocab/french --jobs 4 --json
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from json import dumps, loads
+from os import cpu_count
+from pathlib import Path
+from sys import exit
+from typing import Any, Dict, List, Tuple
+
+from core.matching import normalize_answer
+
+
+VOCAB_DIR = Path("vocab")
+
+MAX_PROBLEMS_PER_FILE = 50
+
+def validate_vocab_file(file_path: str) -> List[str]:
+    """ Returns the problems found in a vocabulary file, or an empty list if it is valid. """
+
+    try:
+        data = loads(Path(file_path).read_bytes())
+    except OSError as error:
+        return [f"cannot be read: {error.strerror}"]
+    except ValueError as error:
+        return [f"is not valid JSON: {error}"]
+
+    problems = validate_schema(data)
+    if problems:
+        return problems
+
+    problems = []
+    seen: Dict[Tuple[Tuple[str, ...], ...], int] = {}
+    for i, entry in enumerate(data["vocab"]):
+        problems.extend(validate_entry(entry, i, len(data["categories"])))
+        key = get_entry_key(entry)
+        if key is None:
+            continue
+        if key in seen:
+            problems.append(f"entry {i} duplicates entry {seen[key]}")
+        else:
+            seen[key] = i
+
+    if len(problems) > MAX_PROBLEMS_PER_FILE:
+        problems = problems[:MAX_PROBLEMS_PER_FILE] + [f"... and {len(problems) - MAX_PROBLEMS_PER_FILE} more problems"]
+    return problems
+
+def validate_schema(data: Any) -> List[str]:
+    """ Checks the top level of a deck: an object with a list of distinct category names and a list of entries. """
+
+    if not isinstance(data, dict):
+        return ["top level must be an object"]
+    if "categories" not in data or "vocab" not in data:
+        return ["must contain 'categories' and 'vocab' keys"]
+
+    categories = data["categories"]
+    if not isinstance(categories, list) or len(categories) < 2:
+        return ["'categories' must be a list of at least two languages"]
+    if not all(isinstance(categorie, str) and categorie for categorie in categories):
+        return ["'categories' must only contain non-empty strings"]
+    if len(set(categories)) != len(categories):
+        return ["'categories' contains the same language twice"]
+    if not isinstance(data["vocab"], list):
+        return ["'vocab' must be a list of entries"]
+    return []
+
+def validate_entry(entry: Any, index: int, group_count: int) -> List[str]:
+    """ Checks one entry: one group per category, each a non-empty list of non-empty words with balanced '*' markers. """
+
+    if not isinstance(entry, list):
+        return [f"entry {index} must be a list of groups"]
+    if len(entry) != group_count:
+        return [f"entry {index} has {len(entry)} groups but there are {group_count} categories"]
+
+    problems = []
+    for g, group in enumerate(entry):
+        if not isinstance(group, list) or not group:
+            problems.append(f"entry {index}, group {g} must be a non-empty list of words")
+            continue
+        for word in group:
+            if not isinstance(word, str) or not word.strip():
+                problems.append(f"entry {index}, group {g} contains an empty or non-text word")
+            elif word.count("*") % 2:
+                problems.append(f"entry {index}, group {g}: unbalanced '*' in {word!r}")
+    return problems
+
+def get_entry_key(entry: Any) -> Any:
+    """ Returns the entry's words in normalized form, ignoring synonym order, or None if the entry is malformed. """
+
+    try:
+        return tuple(tuple(sorted(normalize_answer(word) for word in group)) for group in entry)
+    except (TypeError, AttributeError):
+        return None
+
+def find_vocab_files(root: Path) -> List[Path]:
+    """ Returns all .json files under root, sorted. """
+
+    return sorted(file for file in root.rglob("*.json") if file.is_file())
+
+def validate_vocab_tree(files: List[Path], jobs: int) -> Dict[str, List[str]]:
+    """ Validates the files across jobs worker processes, in chunks so that small files do not cost one task each.
+    Returns the problems of every invalid file, keyed by path. """
+
+    paths = [file.as_posix() for file in files]
+    if jobs <= 1 or len(paths) < 2:
+        results = map(validate_vocab_file, paths)
+        return {path: problems for path, problems in zip(paths, results) if problems}
+
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(validate_vocab_file, paths, chunksize=chunksize)
+        return {path: problems for path, problems in zip(paths, results) if problems}
+
+def display_report(report: Dict[str, List[str]], file_count: int) -> None:
+    """ Prints the problems of every invalid file followed by a summary line. """
+
+    for path, problems in report.items():
+        print(f"❌ {path}")
+        for problem in problems:
+            print(f"   - {problem}")
+
+    if report:
+        print(f"\n{len(report)} of {file_count} file(s) have problems.")
+    else:
+        print(f"✅ All {file_count} file(s) are valid.")
+
+def main() -> None:
+    """ Parses the command line, validates the vocab tree and exits with status 1 if any file is invalid. """
+
+    parser = ArgumentParser(description="Check every vocabulary file of the vocab tree.")
+    parser.add_argument("root", type=Path, nargs="?", default=VOCAB_DIR, help="folder to check (defaults to vocab/)")
+    parser.add_argument("--jobs", type=int, default=cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    files = find_vocab_files(args.root)
+    report = validate_vocab_tree(files, args.jobs)
+
+    if args.json:
+        print(dumps({"files": len(files), "invalid": report}, indent=2, ensure_ascii=False))
+    else:
+        display_report(report, len(files))
+
+    if report:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
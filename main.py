@@ -1,18 +1,32 @@
-from core.file_selector import select_vocab_file
-from core.loader import should_resume_previous_session
+from sys import argv
+
+from core.file_selector import select_vocab_files
 from core.menu import main_menu
-from core.results import run_results
-from core.trainer import run_vocabulary_quiz
-from core.translations_selector import select_translations
+from core.profiler import get_trace_path, start_profiling, stop_profiling
+from core.timing import span
+from core.trainer import run_quiz
 
 
 def main():
-    main_menu()
-    selected_file = select_vocab_file()
-    use_saved = should_resume_previous_session(selected_file)
-    selected_translations = select_translations(use_saved, selected_file)
-    run_vocabulary_quiz(selected_translations, selected_file)
-    run_results(selected_translations, selected_file)
+    trace_path = get_trace_path(argv[1:])
+    if trace_path is None:
+        run_session()
+        return
+
+    recorder = start_profiling()
+    try:
+        run_session()
+    finally:
+        stop_profiling(recorder, trace_path)
+
+def run_session():
+    with span("main_menu"):
+        main_menu()
+    with span("select_vocab_files"):
+        selected_files = select_vocab_files()
+    if not selected_files:
+        return
+    run_quiz(selected_files)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,122 @@
+""" Tests for the on-disk catalog of vocabulary files. """
+
+from hashlib import sha1
+from os import stat, utime
+from pathlib import Path
+
+import pytest
+
+from core import catalog
+from core.catalog import CATALOG_PATH, forget_catalog, get_deck_version, read_catalog_file, refresh_catalog
+
+
+DECK = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue"], ["bleu"]]]}'
+
+@pytest.fixture
+def vocab(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab/fr").mkdir(parents=True)
+    Path("vocab/fr/colors.json").write_text(DECK, encoding="utf-8")
+    forget_catalog()
+    yield Path("vocab/fr/colors.json")
+    forget_catalog()
+
+@pytest.fixture
+def described(monkeypatch):
+    """ Records the files the catalog parses. """
+
+    files = []
+    describe = catalog.describe_vocab_file
+    monkeypatch.setattr(catalog, "describe_vocab_file", lambda file, file_stat: files.append(file) or describe(file, file_stat))
+    return files
+
+def test_refresh_describes_each_file_and_writes_the_catalog(vocab):
+    entries = refresh_catalog([vocab])
+
+    entry = entries["vocab/fr/colors.json"]
+    assert (entry["words"], entry["languages"], entry["pending"]) == (2, ["en", "fr"], None)
+    assert entry["hash"] == sha1(DECK.encode("utf-8")).hexdigest()
+    assert "invalid" not in entry
+    assert read_catalog_file() == entries
+    assert get_deck_version(vocab) == (entry["hash"], 2)
+
+def test_unchanged_file_is_not_parsed_again(vocab, described):
+    refresh_catalog([vocab])
+    forget_catalog()
+
+    refresh_catalog([vocab])
+
+    assert described == [vocab]
+
+def test_changed_modification_time_invalidates_the_entry(vocab, described):
+    refresh_catalog([vocab])
+    file_stat = stat(vocab)
+    utime(vocab, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10**9))
+
+    entry = refresh_catalog([vocab])["vocab/fr/colors.json"]
+
+    assert described == [vocab, vocab]
+    assert entry["mtime"] == file_stat.st_mtime_ns + 10**9 and entry["words"] == 2
+
+def test_changed_size_invalidates_the_entry(vocab, described):
+    refresh_catalog([vocab])
+    file_stat = stat(vocab)
+    vocab.write_text(DECK.replace('[["blue"], ["bleu"]]', '[["blue"], ["bleu"]], [["green"], ["vert"]]'), encoding="utf-8")
+    utime(vocab, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+
+    entry = refresh_catalog([vocab])["vocab/fr/colors.json"]
+
+    assert len(described) == 2
+    assert entry["words"] == 3 and entry["size"] == stat(vocab).st_size
+
+def test_removed_files_are_dropped(vocab):
+    other = Path("vocab/fr/other.json")
+    other.write_text(DECK, encoding="utf-8")
+    refresh_catalog([vocab, other])
+
+    assert list(refresh_catalog([vocab])) == ["vocab/fr/colors.json"]
+    assert list(read_catalog_file()) == ["vocab/fr/colors.json"]
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    '{"vocab": []}',
+    '["categories", "vocab"]',
+    '{"categories": ["en"], "vocab": 3}',
+    '{"categories": "en", "vocab": []}'
+])
+def test_unparsable_files_are_marked_invalid(vocab, content):
+    vocab.write_text(content, encoding="utf-8")
+
+    entry = refresh_catalog([vocab])["vocab/fr/colors.json"]
+
+    assert entry["invalid"] is True
+    assert (entry["words"], entry["languages"]) == (0, [])
+
+def test_unreadable_file_is_marked_invalid(vocab):
+    unreadable = Path("vocab/fr/folder.json")
+    unreadable.mkdir()
+
+    entry = refresh_catalog([vocab, unreadable])["vocab/fr/folder.json"]
+
+    assert entry["invalid"] is True and entry["hash"] == ""
+
+def test_catalog_is_replaced_atomically(vocab, monkeypatch):
+    refresh_catalog([vocab])
+    before = CATALOG_PATH.read_bytes()
+
+    def fail(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(catalog, "replace", fail)
+    vocab.write_text(DECK.replace("rouge", "carmin"), encoding="utf-8")
+    with pytest.raises(OSError):
+        refresh_catalog([vocab])
+
+    assert CATALOG_PATH.read_bytes() == before
+
+def test_unreadable_catalog_file_starts_empty(vocab):
+    CATALOG_PATH.parent.mkdir(parents=True)
+    CATALOG_PATH.write_text("{truncated", encoding="utf-8")
+
+    assert read_catalog_file() == {}
+    assert refresh_catalog([vocab])["vocab/fr/colors.json"]["words"] == 2
@@ -0,0 +1,118 @@
+""" Tests for compiling decks into the binary cache and mapping them back. """
+
+from os import stat, utime
+from pathlib import Path
+from struct import unpack_from
+
+import pytest
+
+from core import deck_cache
+from core.deck_cache import build_deck_cache_path, HEADER, open_deck_cache, write_deck_cache
+from core.utils import compute_file_hash
+
+
+LANGUAGES = ["en", "fr", "de"]
+RAW_ENTRIES = [[["red"], ["rouge"], ["rot"]], [["the *blue* sky", "blue"], ["bleu", "l'été"], []], [["red"], ["rouge"], ["Rot"]]]
+
+@pytest.fixture
+def vocab_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = Path("vocab/colors.json")
+    path.parent.mkdir()
+    path.write_text('{"categories": ["en", "fr", "de"], "vocab": []}', encoding="utf-8")
+    return path
+
+def read_words(deck) -> list:
+    return [[[word.text for word in group.words] for group in entry.groups] for entry in deck.entries]
+
+def test_compiled_deck_round_trips(vocab_file):
+    write_deck_cache(vocab_file, LANGUAGES, iter(RAW_ENTRIES))
+
+    deck = open_deck_cache(vocab_file)
+
+    assert deck.languages == LANGUAGES
+    assert len(deck.entries) == 3
+    assert read_words(deck) == RAW_ENTRIES
+    assert [group.categorie for group in deck.entries[1].groups] == ["en", "fr", "de"]
+    assert deck.entries[-1].groups[2].words[0].text == "Rot"
+    assert deck.hash == compute_file_hash(vocab_file)
+    assert list(deck.iter_raw_entries()) == RAW_ENTRIES
+    deck.close()
+
+def test_empty_deck_round_trips(vocab_file):
+    write_deck_cache(vocab_file, LANGUAGES, [])
+
+    deck = open_deck_cache(vocab_file)
+
+    assert deck.languages == LANGUAGES and list(deck.entries) == []
+    with pytest.raises(IndexError):
+        deck.entries[0]
+    deck.close()
+
+def test_changed_vocab_file_invalidates_cache(vocab_file):
+    write_deck_cache(vocab_file, LANGUAGES, RAW_ENTRIES)
+    vocab_file.write_text('{"categories": ["en", "fr", "de"], "vocab": [1]}', encoding="utf-8")
+
+    assert open_deck_cache(vocab_file) is None
+
+def test_same_size_edit_invalidates_cache(vocab_file):
+    write_deck_cache(vocab_file, LANGUAGES, RAW_ENTRIES)
+    file_stat = stat(vocab_file)
+    vocab_file.write_text(vocab_file.read_text(encoding="utf-8").replace("en", "es"), encoding="utf-8")
+    utime(vocab_file, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1_000_000_000))
+
+    assert open_deck_cache(vocab_file) is None
+
+def test_touched_file_keeps_cache_and_records_new_mtime(vocab_file):
+    write_deck_cache(vocab_file, LANGUAGES, RAW_ENTRIES)
+    cache_path = build_deck_cache_path(vocab_file)
+    cache_path.chmod(0o444)
+    new_mtime = stat(vocab_file).st_mtime_ns + 5_000_000_000
+    utime(vocab_file, ns=(new_mtime, new_mtime))
+
+    deck = open_deck_cache(vocab_file)
+
+    assert read_words(deck) == RAW_ENTRIES
+    assert unpack_from(HEADER, cache_path.read_bytes())[3] == new_mtime
+    assert not cache_path.with_name(cache_path.name + ".tmp").exists()
+    deck.close()
+
+def test_touched_file_keeps_old_mapping_when_cache_cannot_be_written(vocab_file, monkeypatch):
+    write_deck_cache(vocab_file, LANGUAGES, RAW_ENTRIES)
+    new_mtime = stat(vocab_file).st_mtime_ns + 5_000_000_000
+    utime(vocab_file, ns=(new_mtime, new_mtime))
+
+    def fail_to_write(*args):
+        raise PermissionError("read-only")
+    monkeypatch.setattr(deck_cache, "write_deck_cache", fail_to_write)
+    deck = open_deck_cache(vocab_file)
+
+    assert read_words(deck) == RAW_ENTRIES
+    deck.close()
+
+def test_replacing_cache_closes_the_old_mapping_first(vocab_file):
+    write_deck_cache(vocab_file, LANGUAGES, RAW_ENTRIES)
+    old = open_deck_cache(vocab_file)
+
+    write_deck_cache(vocab_file, LANGUAGES, RAW_ENTRIES[:1], old)
+
+    assert old.buffer.closed
+    deck = open_deck_cache(vocab_file)
+    assert read_words(deck) == RAW_ENTRIES[:1]
+    deck.close()
+
+@pytest.mark.parametrize("keep", [0, 10, 60, 80, -40, -1])
+def test_truncated_cache_is_not_mapped(vocab_file, keep):
+    write_deck_cache(vocab_file, LANGUAGES, RAW_ENTRIES)
+    cache_path = build_deck_cache_path(vocab_file)
+    data = cache_path.read_bytes()
+    cache_path.write_bytes(data[:keep])
+
+    assert open_deck_cache(vocab_file) is None
+
+def test_cache_with_other_magic_is_not_mapped(vocab_file):
+    write_deck_cache(vocab_file, LANGUAGES, RAW_ENTRIES)
+    cache_path = build_deck_cache_path(vocab_file)
+    cache_path.write_bytes(b"XXXX" + cache_path.read_bytes()[4:])
+
+    assert open_deck_cache(vocab_file) is None
@@ -0,0 +1,93 @@
+""" Tests for diffing the entry digests of a reloaded deck. """
+
+from random import Random
+
+import pytest
+
+from core.deck_watch import diff_entry_digests, get_raw_entry_digest
+
+
+def digests(*words: str) -> list:
+    return [get_raw_entry_digest([[word], [word.upper()]]) for word in words]
+
+def apply_diff(old: list, new: list):
+    """ Checks that the diff accounts for every entry once and returns the new index of each kept old entry. """
+
+    moved, added, removed = diff_entry_digests(old, new)
+    kept = {i: moved.get(i, i) for i in range(len(old)) if i not in set(removed)}
+
+    assert len(set(removed)) == len(removed)
+    assert sorted(list(kept.values()) + added) == list(range(len(new)))
+    assert all(old[i] == new[j] for i, j in kept.items())
+    assert not set(moved) & set(removed)
+    return kept, added, removed
+
+def test_identical_decks_have_no_changes():
+    old = digests("a", "b", "c")
+
+    assert diff_entry_digests(old, list(old)) == ({}, [], [])
+
+def test_insert_at_start_moves_every_entry():
+    kept, added, removed = apply_diff(digests("a", "b", "c"), digests("new", "a", "b", "c"))
+
+    assert added == [0] and removed == []
+    assert kept == {0: 1, 1: 2, 2: 3}
+
+def test_insert_in_middle_only_moves_the_tail():
+    moved, added, removed = diff_entry_digests(digests("a", "b", "c", "d"), digests("a", "b", "new", "c", "d"))
+
+    assert added == [2] and removed == []
+    assert moved == {2: 3, 3: 4}
+
+def test_delete_in_middle():
+    moved, added, removed = diff_entry_digests(digests("a", "b", "c", "d"), digests("a", "c", "d"))
+
+    assert removed == [1] and added == []
+    assert moved == {2: 1, 3: 2}
+
+def test_edit_is_a_removal_and_an_addition_at_the_same_place():
+    moved, added, removed = diff_entry_digests(digests("a", "b", "c"), digests("a", "edited", "c"))
+
+    assert (moved, added, removed) == ({}, [1], [1])
+
+def test_reorder_keeps_every_entry():
+    kept, added, removed = apply_diff(digests("a", "b", "c", "d"), digests("d", "b", "a", "c"))
+
+    assert added == [] and removed == []
+    assert kept == {0: 2, 1: 1, 2: 3, 3: 0}
+
+def test_duplicate_entries_are_matched_in_order():
+    kept, added, removed = apply_diff(digests("x", "a", "x", "b"), digests("a", "x", "b", "x", "x"))
+
+    assert removed == [] and len(added) == 1
+    assert kept[0] < kept[2]
+
+def test_removing_one_of_two_duplicates():
+    kept, added, removed = apply_diff(digests("x", "a", "x"), digests("x", "a"))
+
+    assert added == [] and len(removed) == 1
+
+def test_empty_decks():
+    assert diff_entry_digests([], digests("a", "b")) == ({}, [0, 1], [])
+    moved, added, removed = diff_entry_digests(digests("a", "b"), [])
+    assert (moved, added, sorted(removed)) == ({}, [], [0, 1])
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_edits_account_for_every_entry(seed):
+    rng = Random(seed)
+    old = digests(*(rng.choice("abcdefgh") + str(rng.randrange(4)) for _ in range(rng.randrange(30))))
+    new = list(old)
+    for _ in range(rng.randrange(6)):
+        operation = rng.randrange(4)
+        if operation == 0 or not new:
+            new.insert(rng.randrange(len(new) + 1), digests(f"new{rng.random()}")[0])
+        elif operation == 1:
+            del new[rng.randrange(len(new))]
+        elif operation == 2:
+            new.insert(rng.randrange(len(new) + 1), new.pop(rng.randrange(len(new))))
+        else:
+            new[rng.randrange(len(new))] = rng.choice(old or new)
+
+    kept, added, removed = apply_diff(old, new)
+
+    assert len(kept) == len(old) - len(removed)
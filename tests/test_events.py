@@ -0,0 +1,127 @@
+""" Tests for the answer event log and the per-word statistics kept from it. """
+
+from json import loads
+from pathlib import Path
+
+import pytest
+
+from core import events
+from core.events import (apply_event, build_report, close_event_log, estimate_percentile, EVENT_LOG_PATH, EVENT_STATS_PATH,
+                         get_pair_word_id, get_trend, new_word_stats, parse_word_id, rank_hard_pairs, record_answer,
+                         RESPONSE_BUCKETS_MS, update_event_stats)
+from core.loader import open_vocab_stream
+from core.translations_selector import generate_translation_pairs
+
+
+DECK = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue"], ["bleu"]], [["green"], ["vert"]]]}'
+
+@pytest.fixture
+def deck(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(events, "EVENT_LOG_ENABLED", True)
+    Path("vocab/fr").mkdir(parents=True)
+    Path("vocab/fr/colors.json").write_text(DECK, encoding="utf-8")
+    yield Path("vocab/fr/colors.json")
+    close_event_log()
+
+def load_pairs(file_path: Path, mode: str = "en") -> list:
+    return list(generate_translation_pairs(open_vocab_stream(file_path), mode))
+
+def event(ms: int = 1000, correct: bool = True, near_miss: bool = False, t: float = 0.0) -> dict:
+    return {"t": t, "d": "fr/colors", "e": "0123456789abcdef", "p": "en", "ms": ms, "c": int(correct), "n": int(near_miss)}
+
+def word_after(*answers: dict) -> dict:
+    stats = {}
+    for answer in answers:
+        apply_event(stats, answer)
+    return stats["fr/colors#0123456789abcdef:en"]
+
+def test_histogram_percentiles_report_bucket_upper_bounds():
+    word = word_after(*(event(ms) for ms in [100, 300, 300, 600, 900, 1200, 1800, 2500, 5000, 70000]))
+
+    assert word["hist"][0] == 1 and word["hist"][-1] == 1
+    assert estimate_percentile(word["hist"], 0.5) == 1000
+    assert estimate_percentile(word["hist"], 0.95) == RESPONSE_BUCKETS_MS[-1]
+    assert estimate_percentile(word["hist"], 0.1) == 250
+    assert estimate_percentile([0] * len(word["hist"]), 0.5) == 0
+
+def test_recent_error_is_an_exponential_moving_average():
+    word = word_after(event(correct=False), event(), event())
+
+    assert word["recent_error"] == pytest.approx((1 - events.TREND_SMOOTHING) ** 2)
+    assert word["errors"] == 1 and word["n"] == 3
+
+def test_trend_compares_recent_and_overall_error_rates():
+    assert get_trend(word_after(*(event(correct=False) for _ in range(5)), *(event() for _ in range(4)))) == "better"
+    assert get_trend(word_after(*(event() for _ in range(5)), *(event(correct=False) for _ in range(4)))) == "worse"
+    assert get_trend(word_after(event(), event())) == "steady"
+
+def test_answers_are_keyed_by_entry_words_and_prompt_language(deck):
+    pairs = load_pairs(deck)
+    record_answer(pairs[1], 1.5, False, False)
+    close_event_log()
+
+    logged = loads(EVENT_LOG_PATH.read_text(encoding="utf-8"))
+    assert (logged["d"], logged["p"], logged["ms"], logged["c"]) == ("fr/colors", "en", 1500, 0)
+    assert parse_word_id(get_pair_word_id(pairs[1])) == ("fr/colors", logged["e"], "en")
+    assert list(update_event_stats()) == [get_pair_word_id(pairs[1])]
+
+def test_history_follows_an_entry_moved_by_an_edit(deck):
+    for _ in range(3):
+        record_answer(load_pairs(deck)[2], 12.0, False, False)
+    close_event_log()
+
+    deck.write_text(DECK.replace('"vocab": [', '"vocab": [[["black"], ["noir"]], '), encoding="utf-8")
+    pairs = load_pairs(deck)
+
+    assert [pair.prompt.words[0].text for pair in rank_hard_pairs(pairs)] == ["green"]
+    assert [row["prompt"] for row in build_report(None, 5)] == ["green"]
+
+def test_report_names_prompt_language_and_drops_removed_entries(deck):
+    record_answer(load_pairs(deck, "fr")[0], 2.0, False, True)
+    record_answer(load_pairs(deck)[1], 2.0, False, False)
+    close_event_log()
+    deck.write_text(DECK.replace('[["blue"], ["bleu"]], ', ""), encoding="utf-8")
+
+    rows = {row["language"]: row for row in build_report("fr/colors", 10)}
+
+    assert rows["fr"]["prompt"] == "rouge" and rows["fr"]["near_misses"] == 1
+    assert rows["en"]["prompt"] == ""
+
+def test_statistics_are_updated_incrementally(deck, monkeypatch):
+    pairs = load_pairs(deck)
+    record_answer(pairs[0], 1.0, True, False)
+    close_event_log()
+    update_event_stats()
+    offset = loads(EVENT_STATS_PATH.read_text(encoding="utf-8"))["offset"]
+    assert offset == EVENT_LOG_PATH.stat().st_size
+
+    applied = []
+    apply = events.apply_event
+    monkeypatch.setattr(events, "apply_event", lambda stats, answer: applied.append(answer) or apply(stats, answer))
+    record_answer(pairs[1], 1.0, True, False)
+    close_event_log()
+    with EVENT_LOG_PATH.open("a", encoding="utf-8") as f:
+        f.write('{"t":1,"d":"fr/colors"')
+
+    stats = update_event_stats()
+
+    assert len(applied) == 1 and len(stats) == 2
+    assert loads(EVENT_STATS_PATH.read_text(encoding="utf-8"))["offset"] == EVENT_LOG_PATH.stat().st_size - len('{"t":1,"d":"fr/colors"')
+
+def test_replaced_log_and_old_statistics_are_rebuilt(deck):
+    EVENT_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    EVENT_STATS_PATH.write_text('{"offset": 5, "words": {"fr/colors#0:0": {}}}', encoding="utf-8")
+    EVENT_LOG_PATH.write_text('{"t":1.0,"d":"fr/colors","i":0,"r":0,"ms":900,"c":0,"n":0}\n', encoding="utf-8")
+
+    assert update_event_stats() == {}
+
+    record_answer(load_pairs(deck)[0], 1.0, True, False)
+    close_event_log()
+    assert len(update_event_stats()) == 1
+
+    EVENT_LOG_PATH.write_text("", encoding="utf-8")
+    assert update_event_stats() == {}
+
+def test_new_word_has_one_bucket_past_the_last_bound():
+    assert len(new_word_stats()["hist"]) == len(RESPONSE_BUCKETS_MS) + 1
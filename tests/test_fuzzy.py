@@ -0,0 +1,58 @@
+""" Tests for the edit distance and the BK-tree used to find near misses. """
+
+from random import Random
+
+import pytest
+
+from core.fuzzy import BKTree, build_near_miss_index, levenshtein
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("", "", 0),
+    ("", "abc", 3),
+    ("chat", "chat", 0),
+    ("chat", "chats", 1),
+    ("chat", "char", 1),
+    ("chien", "chine", 2),
+    ("kitten", "sitting", 3),
+    ("été", "ete", 2)
+])
+def test_levenshtein(a, b, distance):
+    assert levenshtein(a, b) == distance == levenshtein(b, a)
+
+def test_empty_tree_finds_nothing():
+    tree = BKTree()
+
+    assert tree.root is None
+    assert tree.search("chat", 5) == []
+
+def test_search_respects_the_distance_threshold():
+    tree = BKTree((word, word) for word in ["chat", "chats", "char", "chien", "cheval"])
+
+    assert tree.search("chat", 0) == [(0, "chat")]
+    assert tree.search("chat", 1) == [(0, "chat"), (1, "char"), (1, "chats")]
+    assert [value for _, value in tree.search("chat", 2)] == ["chat", "char", "chats"]
+    assert tree.search("chat", 3)[3:] == [(3, "cheval"), (3, "chien")]
+
+def test_duplicate_keys_keep_the_first_value():
+    tree = BKTree([("rouge", "Rouge"), ("rouge", "*rouge*"), ("rouges", "rouges")])
+
+    assert tree.search("rouge", 1) == [(0, "Rouge"), (1, "rouges")]
+    assert len(tree.root.children) == 1
+
+def test_near_miss_index_maps_normalized_forms_to_original_texts():
+    tree = build_near_miss_index(["*Bonjour*", "bonjour", "Bon  soir"])
+
+    assert tree.search("bonjur", 1) == [(1, "*Bonjour*")]
+    assert tree.search("bon soir", 0) == [(0, "Bon  soir")]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_search_matches_a_linear_scan(seed):
+    rng = Random(seed)
+    words = ["".join(rng.choice("abcd") for _ in range(rng.randrange(1, 7))) for _ in range(rng.randrange(40))]
+    tree = BKTree((word, word) for word in words)
+    query, max_distance = "".join(rng.choice("abcd") for _ in range(rng.randrange(1, 7))), rng.randrange(4)
+
+    expected = sorted({(levenshtein(query, word), word) for word in words if levenshtein(query, word) <= max_distance})
+
+    assert tree.search(query, max_distance) == expected
@@ -0,0 +1,49 @@
+""" Tests for running headless sessions without touching the learner's saved data. """
+
+from os import getcwd
+from pathlib import Path
+
+import pytest
+
+from core.headless import run_headless_session, ScriptedAnswers, SimulatedLearner
+
+
+DECK = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue"], ["bleu"]], [["green"], ["vert"]]]}'
+SAVED_FILES = {
+    "data/fr/colors_progress.json": '{"format": 2}',
+    "data/fr/colors_progress.journal": '{"i":0,"a":1,"c":0}\n',
+    "data/.events.log": '{"t":1.0,"d":"fr/colors","i":0,"r":0,"ms":900,"c":0,"n":0}\n',
+    "data/.catalog.json": "{}"
+}
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab/fr").mkdir(parents=True)
+    Path("vocab/fr/colors.json").write_text(DECK, encoding="utf-8")
+    for name, content in SAVED_FILES.items():
+        Path(name).parent.mkdir(parents=True, exist_ok=True)
+        Path(name).write_text(content, encoding="utf-8")
+    return tmp_path
+
+def read_data_dir() -> dict:
+    return {path.as_posix(): path.read_bytes() for path in sorted(Path("data").rglob("*")) if path.is_file()}
+
+@pytest.mark.parametrize("session_mode", ["rounds", "leitner"])
+def test_headless_session_leaves_data_dir_byte_identical(workspace, session_mode):
+    before = read_data_dir()
+
+    report = run_headless_session(Path("vocab/fr/colors.json"), SimulatedLearner(0.5, seed=3), session_mode=session_mode)
+
+    assert report["completed"] and report["questions"] >= 3
+    assert read_data_dir() == before
+    assert Path(getcwd()) == workspace
+
+def test_headless_session_stopped_early_leaves_data_dir_byte_identical(workspace):
+    before = read_data_dir()
+
+    report = run_headless_session(Path("vocab/fr/colors.json"), ScriptedAnswers(["rouge"]), mode="fr")
+
+    assert not report["completed"]
+    assert read_data_dir() == before
+    assert Path(getcwd()) == workspace
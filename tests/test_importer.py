@@ -0,0 +1,76 @@
+""" Tests for the CSV importer's handling of decks that already exist. """
+
+from json import loads
+from pathlib import Path
+
+import pytest
+
+from core.importer import import_word_list
+
+
+HAND_WRITTEN = '{"categories": ["en", "es"], "vocab": [[["mine"], ["mío"]]]}'
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab/es").mkdir(parents=True)
+    return tmp_path
+
+def write_csv(rows: int) -> Path:
+    path = Path("w.csv")
+    path.write_text("en,es\n" + "".join(f"word{i},palabra{i}\n" for i in range(rows)), encoding="utf-8")
+    return path
+
+def read_words(path: Path) -> list:
+    return [entry[0][0] for entry in loads(path.read_text(encoding="utf-8"))["vocab"]]
+
+def test_sharded_import_keeps_hand_written_deck_of_the_same_stem(workspace):
+    Path("vocab/es/w.json").write_text(HAND_WRITTEN, encoding="utf-8")
+
+    report = import_word_list(write_csv(5), "es", shard_size=2)
+
+    assert report["decks"] == ["vocab/es/w_0001.json", "vocab/es/w_0002.json", "vocab/es/w_0003.json"]
+    assert Path("vocab/es/w.json").read_text(encoding="utf-8") == HAND_WRITTEN
+
+def test_import_refuses_to_overwrite_existing_deck(workspace):
+    Path("vocab/es/w.json").write_text(HAND_WRITTEN, encoding="utf-8")
+
+    with pytest.raises(ValueError, match="--force"):
+        import_word_list(write_csv(3), "es")
+
+    assert Path("vocab/es/w.json").read_text(encoding="utf-8") == HAND_WRITTEN
+
+def test_sharded_import_refuses_to_overwrite_existing_shard(workspace):
+    Path("vocab/es/w_0002.json").write_text(HAND_WRITTEN, encoding="utf-8")
+
+    with pytest.raises(ValueError, match="w_0002.json"):
+        import_word_list(write_csv(5), "es", shard_size=2)
+
+    assert not Path("vocab/es/w_0001.json").exists()
+    assert Path("vocab/es/w_0002.json").read_text(encoding="utf-8") == HAND_WRITTEN
+
+def test_force_overwrites_existing_deck(workspace):
+    Path("vocab/es/w.json").write_text(HAND_WRITTEN, encoding="utf-8")
+
+    import_word_list(write_csv(3), "es", force=True)
+
+    assert read_words(Path("vocab/es/w.json")) == ["word0", "word1", "word2"]
+
+def test_reimport_replaces_its_own_decks_and_removes_stale_shards(workspace):
+    import_word_list(write_csv(6), "es", shard_size=2)
+    Path("vocab/es/other.json").write_text(HAND_WRITTEN, encoding="utf-8")
+
+    report = import_word_list(write_csv(3), "es", shard_size=2)
+
+    assert report["decks"] == ["vocab/es/w_0001.json", "vocab/es/w_0002.json"]
+    assert not Path("vocab/es/w_0003.json").exists()
+    assert read_words(Path("vocab/es/w_0002.json")) == ["word2"]
+    assert Path("vocab/es/other.json").exists()
+
+def test_switching_to_unsharded_import_removes_previous_shards(workspace):
+    import_word_list(write_csv(4), "es", shard_size=2)
+
+    import_word_list(write_csv(4), "es")
+
+    assert sorted(path.name for path in Path("vocab/es").glob("*.json")) == ["w.json"]
+    assert loads(Path("vocab/es/.w.import").read_text(encoding="utf-8")) == ["w.json"]
@@ -0,0 +1,96 @@
+""" Tests for journaling answers and folding the journal into the progress snapshot. """
+
+from pathlib import Path
+
+import pytest
+
+from core.catalog import forget_catalog, get_deck_version
+from core.journal import MIN_COMPACTION_RECORDS, ProgressJournal
+from core.json_codec import decode_progress
+from core.loader import load_translations_progress, open_vocab_stream
+from core.session_state import build_session_pairs
+from core.translations_selector import generate_translation_pairs
+from core.utils import build_journal_path, build_progress_path
+
+
+DECK = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue"], ["bleu"]], [["green"], ["vert"]]]}'
+
+@pytest.fixture
+def deck(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab").mkdir()
+    Path("vocab/colors.json").write_text(DECK, encoding="utf-8")
+    forget_catalog()
+    yield Path("vocab/colors.json")
+    forget_catalog()
+
+def open_journal(file_path: Path):
+    pairs = build_session_pairs(generate_translation_pairs(open_vocab_stream(file_path), "en"))
+    journal = ProgressJournal(pairs, file_path, version=get_deck_version(file_path))
+    journal.compact()
+    return pairs, journal
+
+def answer(journal: ProgressJournal, pair, correct: bool) -> None:
+    pair.attempts += 1
+    pair.correct = correct
+    journal.record(pair)
+
+def saved_state(file_path: Path) -> dict:
+    return {pair.entry_index: (pair.attempts, pair.correct) for pair in load_translations_progress(file_path)}
+
+def test_replay_after_crash_ignores_torn_last_record(deck):
+    pairs, journal = open_journal(deck)
+    answer(journal, pairs[0], False)
+    answer(journal, pairs[0], True)
+    answer(journal, pairs[2], False)
+    journal.sync()
+    with build_journal_path(deck).open("a", encoding="utf-8") as f:
+        f.write('{"i":1,"a":')
+
+    assert saved_state(deck) == {0: (2, True), 1: (0, False), 2: (1, False)}
+
+def test_replay_of_repeated_records_keeps_the_last_values(deck):
+    pairs, journal = open_journal(deck)
+    for correct in (False, False, True):
+        answer(journal, pairs[1], correct)
+    journal.close()
+
+    assert saved_state(deck)[1] == (3, True)
+
+def test_journal_is_compacted_once_it_holds_more_than_min_compaction_records(deck):
+    pairs, journal = open_journal(deck)
+    for _ in range(MIN_COMPACTION_RECORDS):
+        answer(journal, pairs[0], False)
+
+    assert journal.capture_checkpoint() == (len(pairs), None)
+    journal.checkpoint()
+    assert build_journal_path(deck).exists()
+
+    answer(journal, pairs[0], True)
+    pending, snapshot = journal.capture_checkpoint()
+    assert pending is None and snapshot.attempts[0] == MIN_COMPACTION_RECORDS + 1
+
+    journal.checkpoint()
+    assert not build_journal_path(deck).exists() and journal.records == 0
+    assert saved_state(deck)[0] == (MIN_COMPACTION_RECORDS + 1, True)
+
+def test_compaction_records_the_deck_version_the_pairs_came_from(deck):
+    pairs, journal = open_journal(deck)
+    version = journal.version
+    answer(journal, pairs[0], True)
+    deck.write_text(DECK.replace("vert", "verte"), encoding="utf-8")
+
+    journal.compact()
+
+    snapshot = decode_progress(build_progress_path(deck).read_bytes())
+    assert (snapshot.deck_hash, len(snapshot.directions)) == version
+    assert snapshot.deck_hash != get_deck_version(deck)[0]
+
+def test_replay_against_changed_deck_discards_the_progress(deck, capsys):
+    pairs, journal = open_journal(deck)
+    answer(journal, pairs[0], True)
+    journal.close()
+    deck.write_text(DECK.replace("vert", "verte"), encoding="utf-8")
+
+    assert load_translations_progress(deck) == []
+    assert "changed" in capsys.readouterr().out
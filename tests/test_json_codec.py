@@ -0,0 +1,74 @@
+""" Tests that every available JSON backend reads and writes the same documents as the standard library. """
+
+import json
+from array import array
+
+import pytest
+
+from core import json_codec
+from core.json_codec import decode_json, decode_progress, decode_vocab, encode_json
+from core.progress_format import encode_snapshot, NOT_IN_SESSION, ProgressSnapshot, UINT32
+
+
+BACKENDS = [
+    pytest.param("msgspec", marks=pytest.mark.skipif(json_codec.msgspec is None, reason="msgspec is not installed")),
+    pytest.param("orjson", marks=pytest.mark.skipif(json_codec.orjson is None, reason="orjson is not installed")),
+    "json"
+]
+
+DOCUMENT = {
+    "categories": ["fr", "de", "ja"],
+    "vocab": [[["été", "*l'été*"], ["Sommer"], ["夏"]], [["œuf"], ["Ei"], ["卵 🥚"]]],
+    "nested": {"empty": [], "number": 42, "flag": True, "none": None, "quote": "\"\\\n"}
+}
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setattr(json_codec, "JSON_BACKEND", request.param)
+    return request.param
+
+def test_decode_matches_the_standard_library(backend):
+    text = json.dumps(DOCUMENT, ensure_ascii=False)
+    escaped = json.dumps(DOCUMENT)
+
+    assert decode_json(text.encode("utf-8")) == json.loads(text) == DOCUMENT
+    assert decode_json(text) == DOCUMENT
+    assert decode_json(escaped.encode("ascii")) == DOCUMENT
+
+def test_encode_matches_the_standard_library(backend):
+    compact = json.dumps(DOCUMENT, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    pretty = json.dumps(DOCUMENT, ensure_ascii=False, indent=2).encode("utf-8")
+
+    assert encode_json(DOCUMENT) == compact
+    assert encode_json(DOCUMENT, pretty=True) == pretty
+    assert "夏".encode("utf-8") in encode_json(DOCUMENT)
+
+@pytest.mark.parametrize("content", [b"{", b"", b"[1,]", b"\xff"])
+def test_invalid_json_raises_value_error(backend, content):
+    with pytest.raises(ValueError):
+        decode_json(content)
+
+def test_decode_vocab(backend):
+    languages, vocab = decode_vocab(json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8"))
+
+    assert languages == ["fr", "de", "ja"]
+    assert vocab == DOCUMENT["vocab"]
+    with pytest.raises(ValueError):
+        decode_vocab(b'{"vocab": []}')
+
+def test_progress_snapshot_round_trip(backend):
+    snapshot = ProgressSnapshot("abc", bytearray([0, NOT_IN_SESSION, 1]), array(UINT32, [3, 0, 70000]), bytearray([1, 0, 0]),
+                                {"next": 3, "mode": "fr"})
+
+    decoded = decode_progress(encode_json(encode_snapshot(snapshot)))
+
+    assert decoded.deck_hash == "abc" and decoded.window == {"next": 3, "mode": "fr"}
+    assert (decoded.directions, list(decoded.attempts), decoded.correct) == (snapshot.directions, [3, 0, 70000], snapshot.correct)
+
+def test_legacy_progress_is_returned_as_a_list(backend):
+    legacy = [{"prompts": {"words": ["été"], "categorie": "fr"}, "answers": [{"words": ["Sommer"], "categorie": "de"}],
+               "attempts": 1, "correct": False}]
+
+    assert decode_progress(json.dumps(legacy, ensure_ascii=False).encode("utf-8")) == legacy
+    with pytest.raises(ValueError):
+        decode_progress(b'{"format": 99}')
@@ -0,0 +1,97 @@
+""" Tests for the incremental JSON reader, mostly with chunks small enough to split every token. """
+
+from io import StringIO
+from json import dumps, JSONDecodeError
+
+import pytest
+
+from core.json_stream import iter_array_items, iter_object_keys, JsonStreamReader
+
+
+CHUNK_SIZES = [1, 2, 3, 7, 64]
+
+DOCUMENT = {
+    "name": "deck \"quoted\" \\ with escapes",
+    "categories": ["en", "fr"],
+    "empty": [],
+    "nested": {"deep": [[1, [2, [3]]], {"k": None}]},
+    "vocab": [
+        [["the media"], ["les médias"]],
+        [["emoji 😀", "é́"], ["12345", "-1.5e10"]],
+        [[" spaced "], ["tab\tnew\nline"]]
+    ],
+    "number": 123456789,
+    "flags": [True, False, None]
+}
+
+def read_document(text: str, chunk_size: int) -> dict:
+    """ Reads an object key by key, walking arrays item by item, and returns it rebuilt. """
+
+    reader = JsonStreamReader(StringIO(text), chunk_size)
+    result = {}
+    for key in iter_object_keys(reader):
+        if reader.peek() == "[":
+            result[key] = list(iter_array_items(reader))
+        else:
+            result[key] = reader.read_value()
+    return result
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_reads_document_split_at_every_chunk_size(chunk_size, indent):
+    text = dumps(DOCUMENT, ensure_ascii=False, indent=indent)
+
+    assert read_document(text, chunk_size) == DOCUMENT
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_escaped_surrogate_pairs_survive_chunk_boundaries(chunk_size):
+    text = dumps({"vocab": [["😀", "é"]]})
+    assert "\\ud83d\\ude00" in text
+
+    assert read_document(text, chunk_size) == {"vocab": [["😀", "é"]]}
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_numbers_split_across_chunks_are_read_whole(chunk_size):
+    reader = JsonStreamReader(StringIO("[1234567, 89, -0.25e3]"), chunk_size)
+
+    assert list(iter_array_items(reader)) == [1234567, 89, -250.0]
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_skip_value_skips_nested_arrays_and_objects(chunk_size):
+    text = '{"skip": [[1, [2]], {"a": [3]}, "]"], "other": {"x": "}"}, "keep": [4]}'
+    reader = JsonStreamReader(StringIO(text), chunk_size)
+
+    kept = {}
+    for key in iter_object_keys(reader):
+        if key == "keep":
+            kept[key] = reader.read_value()
+        else:
+            reader.skip_value()
+    assert kept == {"keep": [4]}
+
+def test_empty_object_and_array():
+    assert list(iter_object_keys(JsonStreamReader(StringIO("  { } ")))) == []
+    assert list(iter_array_items(JsonStreamReader(StringIO("\n[\t]")))) == []
+
+def test_peek_returns_empty_string_at_end_of_file():
+    reader = JsonStreamReader(StringIO("[1]  \n"), 1)
+    list(iter_array_items(reader))
+
+    assert reader.peek() == ""
+
+@pytest.mark.parametrize("text", ['[1, 2', '[1 2]', '{"a": 1 "b": 2}', '{"a" 1}', '[1, ]'])
+def test_malformed_documents_raise_value_error(text):
+    reader = JsonStreamReader(StringIO(text), 2)
+
+    with pytest.raises(ValueError):
+        if text.startswith("{"):
+            for _ in iter_object_keys(reader):
+                reader.read_value()
+        else:
+            list(iter_array_items(reader))
+
+def test_truncated_string_raises_decode_error():
+    reader = JsonStreamReader(StringIO('["unterminated'), 3)
+
+    with pytest.raises(JSONDecodeError):
+        list(iter_array_items(reader))
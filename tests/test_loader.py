@@ -0,0 +1,57 @@
+""" Tests for opening vocab files through the deck cache or as a stream. """
+
+from pathlib import Path
+
+import pytest
+
+from core import deck_cache, loader
+from core.deck_cache import build_deck_cache_path, MappedDeck
+from core.loader import open_vocab_stream
+from core.utils import VocabStream
+
+
+DECK = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue", "navy"], ["bleu"]], [["", "red"], ["rouge"]]]}'
+
+@pytest.fixture
+def vocab_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = Path("vocab/colors.json")
+    path.parent.mkdir()
+    path.write_text(DECK, encoding="utf-8")
+    return path
+
+def read_words(vocab_data) -> list:
+    return [[[word.text for word in group.words] for group in entry.groups] for entry in vocab_data.entries]
+
+def test_first_open_compiles_the_deck_from_streamed_entries(vocab_file, monkeypatch):
+    def decode_whole_file(content):
+        raise AssertionError("the vocab file was decoded as a whole")
+    monkeypatch.setattr(loader, "decode_vocab", decode_whole_file)
+
+    vocab_data = open_vocab_stream(vocab_file)
+
+    assert isinstance(vocab_data, MappedDeck)
+    assert build_deck_cache_path(vocab_file).exists()
+    assert vocab_data.languages == ["en", "fr"]
+    assert read_words(vocab_data) == [[["red"], ["rouge"]], [["blue", "navy"], ["bleu"]], [["", "red"], ["rouge"]]]
+    vocab_data.close()
+
+def test_deck_that_cannot_be_written_is_streamed(vocab_file, monkeypatch):
+    def fail_to_write(*args):
+        raise PermissionError("read-only")
+    monkeypatch.setattr(loader, "write_deck_cache", fail_to_write)
+
+    vocab_data = open_vocab_stream(vocab_file)
+
+    assert isinstance(vocab_data, VocabStream)
+    assert read_words(vocab_data) == read_words(vocab_data)
+    assert read_words(vocab_data)[1] == [["blue", "navy"], ["bleu"]]
+
+def test_disabled_cache_streams_entries(vocab_file, monkeypatch):
+    monkeypatch.setattr(deck_cache, "DECK_CACHE_ENABLED", False)
+
+    vocab_data = open_vocab_stream(vocab_file)
+
+    assert isinstance(vocab_data, VocabStream)
+    assert not build_deck_cache_path(vocab_file).exists()
+    assert len(read_words(vocab_data)) == 3
@@ -0,0 +1,72 @@
+""" Tests for normalizing answers and checking them against the match index of a word group. """
+
+import pytest
+
+from core.matching import build_match_index, normalize_answer
+from core.results import is_correct_answer as is_correct_retry
+from core.trainer import is_correct_answer, match_answer
+from core.utils import Word, WordGroup
+
+
+def group(*texts: str) -> WordGroup:
+    return WordGroup(tuple(Word(text) for text in texts), "fr")
+
+@pytest.mark.parametrize("text, expected", [
+    ("Rouge", "rouge"),
+    ("  ROUGE  ", "rouge"),
+    ("*rouge*", "rouge"),
+    ("le *chat*  noir", "le chat noir"),
+    ("pomme\tde\n terre", "pomme de terre"),
+    ("***", ""),
+    ("Été", "été")
+])
+def test_normalize_answer(text, expected):
+    assert normalize_answer(text) == expected
+
+def test_accents_are_significant():
+    assert normalize_answer("été") != normalize_answer("ete")
+    assert not is_correct_answer("ete", group("été"))
+
+def test_decomposed_accents_match_only_with_unicode_folding():
+    composed, decomposed = "\u00e9t\u00e9", "e\u0301te\u0301"
+
+    assert normalize_answer(decomposed, unicode_folding=True) == normalize_answer(composed, unicode_folding=True)
+    assert normalize_answer(decomposed, unicode_folding=False) != normalize_answer(composed, unicode_folding=False)
+    assert normalize_answer("ＡＢ", unicode_folding=True) == "ab"
+
+def test_match_index_holds_normalized_forms():
+    words = group("*Rouge*", "Pomme de  terre", "rouge")
+
+    assert words.match_index == build_match_index(["rouge", "pomme de terre"]) == frozenset({"rouge", "pomme de terre"})
+    assert words.match_index is words.match_index
+
+@pytest.mark.parametrize("user_input", ["ROUGE", " rouge ", "rouge*", "*Rouge*"])
+def test_case_spaces_and_asterisks_are_ignored(user_input):
+    assert is_correct_answer(user_input, group("*rouge*"))
+
+def test_multi_word_answers():
+    words = group("pomme de terre", "le *chat* noir")
+
+    assert is_correct_answer("Pomme  de   terre", words)
+    assert is_correct_answer("le chat noir", words)
+    assert not is_correct_answer("pommedeterre", words)
+    assert not is_correct_answer("pomme", words)
+    assert not is_correct_answer("terre de pomme", words)
+
+def test_empty_input_is_not_correct():
+    assert not is_correct_answer("", group("rouge"))
+    assert not is_correct_answer("  * ", group("rouge"))
+
+def test_match_answer_reports_near_misses_only_when_enabled():
+    words = group("*Bonjour*")
+
+    assert match_answer("bonjour", words, max_distance=1) == (True, None)
+    assert match_answer("bonjur", words, max_distance=1) == (True, "*Bonjour*")
+    assert match_answer("bonjur", words, max_distance=0) == (False, None)
+    assert match_answer("bonsoir", words, max_distance=1) == (False, None)
+
+def test_retry_checks_every_answer_group():
+    groups = [group("rouge"), WordGroup((Word("red"),), "en")]
+
+    assert is_correct_retry("RED", groups)
+    assert not is_correct_retry("rot", groups)
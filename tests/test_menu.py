@@ -0,0 +1,44 @@
+""" Tests for clearing all saved progress from the main menu. """
+
+from pathlib import Path
+
+import pytest
+
+from core.console import reset_console, set_output_sink
+from core.menu import delete_progress_data
+
+
+LEARNER_FILES = ["data/learners/ana/french/colors_progress.json", "data/learners/ana/french/colors_progress.journal"]
+KEPT_FILES = ["data/.events.log", "data/.events.stats.json", "data/.search.sqlite3", "data/.decks/french/colors.deck"]
+PROGRESS_FILES = ["data/.catalog.json", "data/french/colors_progress.json", "data/french/colors_progress.journal",
+                  "data/japanese/verbs/basic_progress.json"]
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    set_output_sink(lambda text: None)
+    for name in LEARNER_FILES + KEPT_FILES + PROGRESS_FILES:
+        Path(name).parent.mkdir(parents=True, exist_ok=True)
+        Path(name).write_text("{}")
+    yield tmp_path
+    reset_console()
+
+def test_clearing_progress_deletes_progress_files_journals_and_catalog(data_dir):
+    delete_progress_data()
+
+    assert not Path("data/french/colors_progress.json").exists()
+    assert not Path("data/french/colors_progress.journal").exists()
+    assert not Path("data/japanese").exists()
+    assert not Path("data/.catalog.json").exists()
+
+def test_clearing_progress_keeps_history_search_index_and_compiled_decks(data_dir):
+    delete_progress_data()
+
+    for name in KEPT_FILES:
+        assert Path(name).exists(), name
+
+def test_clearing_progress_keeps_quiz_server_learners(data_dir):
+    delete_progress_data()
+
+    for name in LEARNER_FILES:
+        assert Path(name).exists(), name
@@ -0,0 +1,166 @@
+""" Tests for the background writer and the journal it writes on its thread. """
+
+from pathlib import Path
+from threading import Event
+
+import pytest
+
+from core.json_codec import decode_progress
+from core.loader import load_translations_progress, open_vocab_stream
+from core.journal import SessionJournal
+from core.persistence import BackgroundJournal, BackgroundWriter
+from core.progress_format import NOT_IN_SESSION, ProgressSnapshot
+from core.session_state import build_session_pairs
+from core.translations_selector import generate_translation_pairs
+from core.utils import build_journal_path, build_progress_path
+
+
+DECK = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue"], ["bleu"]], [["green"], ["vert"]]]}'
+
+@pytest.fixture
+def writer():
+    return BackgroundWriter()
+
+@pytest.fixture
+def deck(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab").mkdir()
+    Path("vocab/colors.json").write_text(DECK, encoding="utf-8")
+    return Path("vocab/colors.json")
+
+def block(writer: BackgroundWriter) -> Event:
+    """ Occupies the writer thread until the returned event is set, so the tasks queued meanwhile wait. """
+
+    started, release = Event(), Event()
+    writer.submit("block", lambda: (started.set(), release.wait()))
+    started.wait()
+    return release
+
+def open_session(file_path: Path, writer: BackgroundWriter):
+    vocab_data = open_vocab_stream(file_path)
+    pairs = build_session_pairs(generate_translation_pairs(vocab_data, "en"))
+    return pairs, BackgroundJournal(SessionJournal(pairs, [file_path]), writer)
+
+def read_snapshot(file_path: Path) -> ProgressSnapshot:
+    return decode_progress(build_progress_path(file_path).read_bytes())
+
+def answer(pair, correct: bool) -> None:
+    pair.attempts += 1
+    pair.correct = correct
+
+def test_task_queued_again_runs_once_in_its_first_place(writer):
+    calls = []
+    release = block(writer)
+
+    writer.submit("a", lambda: calls.append("a1"))
+    writer.submit("b", lambda: calls.append("b"))
+    writer.submit("a", lambda: calls.append("a2"))
+    release.set()
+
+    assert writer.flush(timeout=5)
+    assert calls == ["a2", "b"]
+
+def test_flush_raises_task_error_once(writer):
+    writer.submit("fail", lambda: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        writer.flush(timeout=5)
+    assert writer.flush(timeout=5)
+
+class RecordingJournal:
+    """ Stands in for a SessionJournal and records the order in which the writer thread calls it. """
+
+    def __init__(self):
+        self.calls = []
+        self.journals = {}
+
+    def record(self, pair):
+        self.calls.append(("record", pair.entry_index, pair.attempts))
+
+    def capture_checkpoint(self, pending=None):
+        return {}
+
+    def checkpoint(self, pending=None, captured=None):
+        self.calls.append(("checkpoint",))
+
+    def close(self):
+        self.calls.append(("close",))
+
+def test_flush_runs_record_then_checkpoint_then_close(writer, deck):
+    pairs, _ = open_session(deck, writer)
+    recording = RecordingJournal()
+    journal = BackgroundJournal(recording, writer)
+    release = block(writer)
+
+    answer(pairs[0], False)
+    journal.record(pairs[0])
+    journal.checkpoint()
+    answer(pairs[0], True)
+    journal.record(pairs[0])
+    release.set()
+    journal.close()
+
+    assert recording.calls == [("record", 0, 1), ("checkpoint",), ("record", 0, 2), ("close",)]
+
+def test_answers_are_queued_as_copies(writer, deck):
+    pairs, _ = open_session(deck, writer)
+    recording = RecordingJournal()
+    journal = BackgroundJournal(recording, writer)
+    release = block(writer)
+
+    answer(pairs[1], False)
+    journal.record(pairs[1])
+    answer(pairs[1], True)
+    release.set()
+    journal.close()
+
+    assert recording.calls == [("record", 1, 1), ("close",)]
+
+def test_resume_replays_journal_written_by_writer_thread(writer, deck):
+    pairs, journal = open_session(deck, writer)
+    journal.compact()
+    for pair, correct in zip(pairs, [True, False, True]):
+        answer(pair, correct)
+        journal.record(pair)
+    writer.flush(timeout=5)
+
+    assert build_journal_path(deck).read_text(encoding="utf-8").count("\n") == 3
+    resumed = load_translations_progress(deck)
+    assert [(pair.entry_index, pair.attempts, pair.correct) for pair in resumed] == [(0, 1, True), (1, 1, False), (2, 1, True)]
+    journal.close()
+
+def test_compaction_writes_pairs_as_they_were_when_queued(writer, deck):
+    pairs, journal = open_session(deck, writer)
+    release = block(writer)
+
+    answer(pairs[0], False)
+    journal.record(pairs[0])
+    journal.compact()
+    answer(pairs[0], True)
+    answer(pairs[2], True)
+    journal.record(pairs[0])
+    journal.record(pairs[2])
+    release.set()
+    writer.flush(timeout=5)
+
+    assert list(read_snapshot(deck).attempts) == [1, 0, 0]
+    resumed = load_translations_progress(deck)
+    assert [(pair.attempts, pair.correct) for pair in resumed] == [(2, True), (0, False), (1, True)]
+    journal.close()
+
+def test_reloaded_deck_is_captured_on_the_calling_thread(writer, deck):
+    pairs, journal = open_session(deck, writer)
+    release = block(writer)
+
+    reloaded = list(pairs[:2])
+    journal.reload_deck(deck, reloaded, ("hash", 3))
+    reloaded.pop()
+    answer(pairs[0], True)
+    release.set()
+    writer.flush(timeout=5)
+
+    snapshot = read_snapshot(deck)
+    assert snapshot.deck_hash == "hash"
+    assert list(snapshot.directions[:2]) == [0, 0] and snapshot.directions[2] == NOT_IN_SESSION
+    assert list(snapshot.attempts) == [0, 0, 0]
+    journal.close()
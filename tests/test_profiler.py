@@ -0,0 +1,86 @@
+""" Tests for recording spans and writing them as a Chrome trace. """
+
+from json import loads
+from os import getpid
+from pathlib import Path
+from threading import get_ident, Thread
+
+import pytest
+
+from core.profiler import DEFAULT_TRACE_PATH, get_trace_path, start_profiling, stop_profiling, summarize_events
+from core.timing import NULL_SPAN, set_span_recorder, span
+
+
+@pytest.fixture(autouse=True)
+def no_recorder():
+    set_span_recorder(None)
+    yield
+    set_span_recorder(None)
+
+def time_worker() -> None:
+    with span("worker"):
+        pass
+
+def test_enabled_span_writes_a_valid_chrome_trace(tmp_path, capsys):
+    trace_path = tmp_path / "trace.json"
+    recorder = start_profiling()
+    with span("outer"):
+        with span("inner"):
+            pass
+    worker = Thread(target=time_worker)
+    worker.start()
+    worker.join()
+
+    stop_profiling(recorder, trace_path)
+
+    trace = loads(trace_path.read_text(encoding="utf-8"))
+    events = {event["name"]: event for event in trace["traceEvents"]}
+    assert trace["displayTimeUnit"] == "ms"
+    assert [event["name"] for event in trace["traceEvents"]] == ["inner", "outer", "worker"]
+    for event in events.values():
+        assert event["ph"] == "X" and event["cat"] == "vocab" and event["pid"] == getpid()
+        assert event["ts"] >= 0 and event["dur"] >= 0
+    assert events["outer"]["ts"] <= events["inner"]["ts"]
+    assert events["inner"]["ts"] + events["inner"]["dur"] <= events["outer"]["ts"] + events["outer"]["dur"] + 1e-3
+    assert events["outer"]["tid"] == get_ident() != events["worker"]["tid"]
+    assert "outer" in capsys.readouterr().out
+    assert span("after") is NULL_SPAN
+
+def test_disabled_span_records_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("VOCAB_TRAINER_PROFILE", raising=False)
+
+    assert get_trace_path([]) is None
+    with span("ignored") as timed:
+        assert timed is None
+    assert span("ignored") is NULL_SPAN
+    assert list(tmp_path.iterdir()) == []
+
+def test_empty_trace_is_valid(tmp_path, capsys):
+    stop_profiling(start_profiling(), tmp_path / "trace.json")
+
+    assert loads((tmp_path / "trace.json").read_text(encoding="utf-8")) == {"displayTimeUnit": "ms", "traceEvents": []}
+
+@pytest.mark.parametrize("argv, environment, expected", [
+    (["--profile"], None, DEFAULT_TRACE_PATH),
+    (["--profile", "out.json"], None, Path("out.json")),
+    (["--profile", "--other"], None, DEFAULT_TRACE_PATH),
+    ([], "env.json", Path("env.json")),
+    (["--profile", "arg.json"], "env.json", Path("arg.json"))
+])
+def test_trace_path(argv, environment, expected, monkeypatch):
+    if environment is None:
+        monkeypatch.delenv("VOCAB_TRAINER_PROFILE", raising=False)
+    else:
+        monkeypatch.setenv("VOCAB_TRAINER_PROFILE", environment)
+
+    assert get_trace_path(argv) == expected
+
+def test_summary_orders_spans_by_total_time():
+    events = [("a", 0.0, 0.001, 1), ("b", 0.0, 0.004, 1), ("a", 0.0, 0.002, 1)]
+
+    summary = summarize_events(events)
+
+    assert list(summary) == ["b", "a"]
+    assert summary["a"]["count"] == 2 and summary["a"]["total_ms"] == pytest.approx(3.0)
+    assert summary["b"]["p95_ms"] == pytest.approx(4.0) == summary["b"]["max_ms"]
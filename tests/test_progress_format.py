@@ -0,0 +1,140 @@
+""" Round-trip tests for the packed per-entry progress columns (progress format 2). """
+
+from array import array
+from base64 import b64decode
+from json import dumps, loads
+
+import pytest
+
+from core.json_codec import decode_progress, encode_json
+from core import progress_format
+from core.progress_format import (
+    apply_record, build_snapshot, count_pending_entries, decode_snapshot, encode_snapshot, is_snapshot_data,
+    NOT_IN_SESSION, pack_bits, PROGRESS_FORMAT, ProgressSnapshot, unpack_bits
+)
+from core.utils import build_translation_pair, build_vocab_entry
+
+
+LANGUAGES = ["en", "fr", "de"]
+
+def make_pairs(rows):
+    """ Returns pairs for (entry index, direction, attempts, correct) rows of a three-language deck. """
+
+    return [
+        build_translation_pair(build_vocab_entry([[f"en{i}"], [f"fr{i}"], [f"de{i}"]], LANGUAGES), i, direction, attempts, correct)
+        for i, direction, attempts, correct in rows
+    ]
+
+def round_trip(snapshot: ProgressSnapshot) -> ProgressSnapshot:
+    """ Encodes a snapshot, passes it through JSON text and decodes it back. """
+
+    return decode_snapshot(loads(dumps(encode_snapshot(snapshot))))
+
+def assert_same_snapshot(left: ProgressSnapshot, right: ProgressSnapshot):
+    assert left.deck_hash == right.deck_hash
+    assert left.directions == right.directions
+    assert list(left.attempts) == list(right.attempts)
+    assert left.correct == right.correct
+    assert left.window == right.window
+
+@pytest.mark.parametrize("count", [0, 1, 7, 8, 9, 16, 17, 1000])
+def test_pack_bits_round_trips_every_length(count):
+    flags = bytearray((i * 7 + 3) % 5 < 2 for i in range(count))
+
+    packed = pack_bits(flags)
+
+    assert len(packed) == (count + 7) // 8
+    assert unpack_bits(packed, count) == flags
+
+def test_pack_bits_is_least_significant_bit_first():
+    assert pack_bits(bytearray([1, 0, 0, 0, 0, 0, 0, 0, 0, 1])) == bytes([0b00000001, 0b00000010])
+
+def test_snapshot_round_trips_through_json():
+    pairs = make_pairs([(0, 0, 1, True), (2, 2, 70000, False), (4, 1, 0, False), (9, 0, 3, True)])
+    snapshot = build_snapshot(pairs, 10, "abc123")
+
+    decoded = round_trip(snapshot)
+
+    assert_same_snapshot(decoded, snapshot)
+    assert decoded.directions[1] == NOT_IN_SESSION
+    assert decoded.attempts[2] == 70000
+    assert list(decoded.correct) == [1, 0, 0, 0, 0, 0, 0, 0, 0, 1]
+
+def test_encoded_fields_are_base64_columns():
+    snapshot = build_snapshot(make_pairs([(1, 2, 5, True)]), 3, "hash")
+
+    data = encode_snapshot(snapshot)
+
+    assert data["format"] == PROGRESS_FORMAT and data["entries"] == 3 and data["deck_hash"] == "hash"
+    assert b64decode(data["directions"]) == bytes([NOT_IN_SESSION, 2, NOT_IN_SESSION])
+    assert b64decode(data["attempts"]) == b"".join(value.to_bytes(4, "little") for value in (0, 5, 0))
+    assert b64decode(data["correct"]) == bytes([0b010])
+    assert "window" not in data
+
+def test_window_state_round_trips():
+    snapshot = build_snapshot(make_pairs([(0, 1, 2, False)]), 5, "hash")
+    snapshot.window = {"next": 3, "mode": "fr"}
+
+    decoded = round_trip(snapshot)
+
+    assert_same_snapshot(decoded, snapshot)
+
+def test_empty_deck_round_trips():
+    snapshot = build_snapshot([], 0, "empty")
+
+    assert_same_snapshot(round_trip(snapshot), snapshot)
+
+def test_base_snapshot_is_copied_not_shared():
+    base = build_snapshot(make_pairs([(0, 0, 4, True)]), 3, "hash")
+    base.window = {"next": 2, "mode": "random"}
+
+    snapshot = build_snapshot(make_pairs([(1, 1, 2, False)]), 3, "hash", base)
+    snapshot.window["next"] = 3
+
+    assert list(snapshot.attempts) == [4, 2, 0]
+    assert base.directions[1] == NOT_IN_SESSION
+    assert base.window["next"] == 2
+
+def test_journal_records_replay_over_decoded_snapshot():
+    snapshot = round_trip(build_snapshot(make_pairs([(0, 0, 1, False), (1, 1, 1, False)]), 2, "hash"))
+
+    apply_record(snapshot, {"i": 1, "a": 2, "c": 1})
+
+    assert list(snapshot.attempts) == [1, 2]
+    assert list(snapshot.correct) == [0, 1]
+    assert count_pending_entries(snapshot) == 1
+
+def test_pending_entries_include_entries_a_window_did_not_reach():
+    snapshot = build_snapshot(make_pairs([(0, 0, 1, True), (1, 0, 1, False)]), 6, "hash")
+    snapshot.window = {"next": 3, "mode": "en"}
+    snapshot.correct[4] = 1
+
+    assert count_pending_entries(snapshot) == 1 + 2
+
+def test_is_snapshot_data_tells_formats_apart():
+    assert is_snapshot_data(encode_snapshot(build_snapshot([], 1, "hash")))
+    assert not is_snapshot_data([{"attempts": 1, "correct": False}])
+    assert not is_snapshot_data({"format": PROGRESS_FORMAT + 1})
+
+def test_codec_decodes_snapshot_like_decode_snapshot():
+    snapshot = build_snapshot(make_pairs([(0, 2, 3, False), (1, 0, 1, True)]), 4, "hash")
+    snapshot.window = {"next": 2, "mode": "de"}
+
+    assert_same_snapshot(decode_progress(encode_json(encode_snapshot(snapshot))), snapshot)
+
+def test_encoding_on_big_endian_host_leaves_attempts_column_alone(monkeypatch):
+    monkeypatch.setattr(progress_format, "byteorder", "big")
+    snapshot = build_snapshot(make_pairs([(0, 0, 1, False), (1, 1, 258, True)]), 2, "hash")
+
+    first = encode_snapshot(snapshot)
+    second = encode_snapshot(snapshot)
+
+    assert list(snapshot.attempts) == [1, 258]
+    assert first == second
+    assert b64decode(first["attempts"]) == bytes([0, 0, 0, 1, 0, 0, 1, 2])
+
+def test_attempts_column_is_four_bytes_wide():
+    snapshot = build_snapshot(make_pairs([(0, 0, 3, False)]), 2, "hash")
+
+    assert snapshot.attempts.itemsize == 4
+    assert round_trip(snapshot).attempts.itemsize == 4
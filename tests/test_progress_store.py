@@ -0,0 +1,135 @@
+""" Tests for the SQLite progress backend and for importing JSON progress into it. """
+
+from array import array
+from json import dumps
+from pathlib import Path
+from sqlite3 import connect
+
+import pytest
+
+from core.catalog import forget_catalog, get_deck_version
+from core.journal import ProgressJournal
+from core.loader import open_vocab_stream
+from core.progress_format import NOT_IN_SESSION, ProgressSnapshot, UINT32
+from core.progress_import import import_progress_file, main as import_main
+from core.progress_store import (clear_all_progress, clear_deck_progress, close_connection, commit_progress, count_pending_pairs,
+                                 list_decks_in_progress, load_deck_progress, PROGRESS_DB_PATH, record_pair, save_deck_progress,
+                                 save_deck_snapshot)
+from core.translations_selector import generate_translation_pairs
+from core.utils import build_journal_path, build_progress_path, TranslationPair
+
+
+DECK = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue"], ["bleu"]], [["green"], ["vert"]]]}'
+
+@pytest.fixture
+def deck(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab/fr").mkdir(parents=True)
+    Path("vocab/fr/colors.json").write_text(DECK, encoding="utf-8")
+    forget_catalog()
+    yield Path("vocab/fr/colors.json")
+    close_connection()
+    forget_catalog()
+
+def pair(entry_index: int, direction: int = 0, attempts: int = 0, correct: bool = False) -> TranslationPair:
+    return TranslationPair(None, None, attempts, correct, entry_index, direction)
+
+def rows(snapshot: ProgressSnapshot) -> list:
+    return list(zip(snapshot.directions, snapshot.attempts, snapshot.correct))
+
+def test_saved_pairs_load_back_as_a_snapshot(deck):
+    save_deck_progress(deck, [pair(0, 1, 2, True), pair(2, 0, 1)], 3, "hash")
+
+    snapshot = load_deck_progress(deck)
+
+    assert snapshot.deck_hash == "hash" and snapshot.window is None
+    assert rows(snapshot) == [(1, 2, 1), (NOT_IN_SESSION, 0, 0), (0, 1, 0)]
+    assert count_pending_pairs(deck) == 1
+    assert list_decks_in_progress() == ["fr/colors"]
+
+def test_saving_again_replaces_every_row(deck):
+    save_deck_progress(deck, [pair(0), pair(1), pair(2)], 3, "old")
+    save_deck_progress(deck, [pair(1, 1, 4)], 3, "new")
+
+    snapshot = load_deck_progress(deck)
+
+    assert snapshot.deck_hash == "new"
+    assert rows(snapshot) == [(NOT_IN_SESSION, 0, 0), (1, 4, 0), (NOT_IN_SESSION, 0, 0)]
+
+def test_snapshot_round_trip_keeps_the_window(deck):
+    snapshot = ProgressSnapshot("hash", bytearray([0, NOT_IN_SESSION, 1]), array(UINT32, [3, 0, 1]), bytearray([1, 0, 0]), {"next": 3, "mode": "en"})
+
+    save_deck_snapshot(deck, snapshot)
+    loaded = load_deck_progress(deck)
+
+    assert rows(loaded) == rows(snapshot) and loaded.window == {"next": 3, "mode": "en"}
+    assert count_pending_pairs(deck) == 1
+
+def test_recorded_answers_are_visible_once_committed(deck):
+    save_deck_progress(deck, [pair(0), pair(1)], 3, "hash")
+    other = connect(PROGRESS_DB_PATH)
+
+    record_pair(deck, pair(0, 0, 1, True))
+    record_pair(deck, pair(2, 1, 1))
+    assert other.execute("SELECT COUNT(*) FROM pairs WHERE correct = 1").fetchone()[0] == 0
+
+    commit_progress()
+    assert other.execute("SELECT entry, attempts, correct FROM pairs ORDER BY entry").fetchall() == [(0, 1, 1), (1, 0, 0), (2, 1, 0)]
+    other.close()
+
+def test_concurrent_connections_write_different_decks(deck):
+    save_deck_progress(deck, [pair(0)], 3, "hash")
+    other = connect(PROGRESS_DB_PATH, timeout=5)
+    with other:
+        other.execute("INSERT INTO decks (deck, deck_hash, entries, updated_at) VALUES ('fr/animals', 'h', 1, 0)")
+        other.execute("INSERT INTO pairs VALUES ('fr/animals', 0, 0, 1, 0, 0)")
+
+    save_deck_progress(deck, [pair(0, 0, 2, True)], 3, "hash")
+
+    assert list_decks_in_progress() == ["fr/animals", "fr/colors"]
+    assert other.execute("SELECT attempts FROM pairs WHERE deck = 'fr/colors'").fetchone() == (2,)
+    other.close()
+
+def test_clearing_removes_rows_and_windows(deck):
+    save_deck_progress(deck, [pair(0)], 3, "hash")
+    save_deck_progress(Path("vocab/fr/animals.json"), [pair(0)], 1, "h")
+
+    clear_deck_progress(deck)
+    assert load_deck_progress(deck) is None and count_pending_pairs(deck) is None
+    assert clear_all_progress() == 1
+    assert list_decks_in_progress() == []
+
+def test_json_progress_and_journal_are_imported(deck):
+    pairs = list(generate_translation_pairs(open_vocab_stream(deck), "fr"))
+    journal = ProgressJournal(pairs, deck, version=get_deck_version(deck))
+    journal.compact()
+    pairs[1].attempts, pairs[1].correct = 2, True
+    journal.record(pairs[1])
+    journal.close()
+
+    assert import_progress_file(deck) is None
+
+    snapshot = load_deck_progress(deck)
+    assert snapshot.deck_hash == get_deck_version(deck)[0]
+    assert rows(snapshot) == [(1, 0, 0), (1, 2, 1), (1, 0, 0)]
+
+def test_legacy_progress_is_migrated_on_import(deck):
+    legacy = [{"prompts": {"words": ["bleu"], "categorie": "fr"}, "answers": [{"words": ["blue"], "categorie": "en"}], "attempts": 3, "correct": False}]
+    build_progress_path(deck).parent.mkdir(parents=True)
+    build_progress_path(deck).write_text(dumps(legacy), encoding="utf-8")
+
+    assert import_progress_file(deck) is None
+    assert rows(load_deck_progress(deck)) == [(NOT_IN_SESSION, 0, 0), (1, 3, 0), (NOT_IN_SESSION, 0, 0)]
+
+def test_import_command_removes_imported_files(deck, monkeypatch, capsys):
+    journal = ProgressJournal(list(generate_translation_pairs(open_vocab_stream(deck), "en")), deck)
+    journal.compact()
+    Path("data/fr/gone_progress.json").write_text("{}", encoding="utf-8")
+    monkeypatch.setattr("sys.argv", ["progress_import", "--remove"])
+
+    import_main()
+
+    output = capsys.readouterr().out
+    assert "Imported data/fr/colors_progress.json" in output and "Skipped data/fr/gone_progress.json: vocab file not found" in output
+    assert not build_progress_path(deck).exists() and not build_journal_path(deck).exists()
+    assert count_pending_pairs(deck) == 3
@@ -0,0 +1,42 @@
+""" Tests for the Leitner scheduler's starting boxes. """
+
+from core.scheduler import LeitnerScheduler, MASTERED_BOX
+from core.utils import build_translation_pair, build_vocab_entry
+
+
+def make_pair(attempts: int = 0, correct: bool = False):
+    return build_translation_pair(build_vocab_entry([["word"], ["mot"]], ["en", "fr"]), 0, 0, attempts, correct)
+
+def answer_until_mastered(scheduler: LeitnerScheduler) -> int:
+    """ Answers every due card correctly and returns the number of answers needed to master them all. """
+
+    answers = 0
+    while scheduler.remaining:
+        scheduler.reschedule(scheduler.next_card(), True)
+        answers += 1
+    return answers
+
+def test_new_pair_is_mastered_by_one_correct_answer():
+    scheduler = LeitnerScheduler([make_pair()])
+
+    assert answer_until_mastered(scheduler) == 1
+
+def test_resumed_pair_that_was_missed_climbs_every_box():
+    pair = make_pair(attempts=4)
+    scheduler = LeitnerScheduler([pair])
+
+    assert answer_until_mastered(scheduler) == MASTERED_BOX
+    assert pair.correct
+
+def test_added_pairs_start_like_initial_pairs():
+    scheduler = LeitnerScheduler([])
+    scheduler.add_pairs([make_pair(attempts=2), make_pair(), make_pair(correct=True)])
+
+    assert scheduler.remaining == 2
+    assert answer_until_mastered(scheduler) == MASTERED_BOX + 1
+
+def test_wrong_answer_sends_pair_back_to_first_box():
+    scheduler = LeitnerScheduler([make_pair()])
+    scheduler.reschedule(scheduler.next_card(), False)
+
+    assert answer_until_mastered(scheduler) == MASTERED_BOX
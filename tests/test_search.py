@@ -0,0 +1,111 @@
+""" Tests for the incremental word index of the vocab tree. """
+
+from os import stat, utime
+from pathlib import Path
+
+import pytest
+
+from core.deck_cache import DECK_CACHE_DIR
+from core.loader import open_vocab_stream
+from core.search import add_entry_words, open_search_index, refresh_search_index, search_words
+
+
+COLORS = '{"categories": ["en", "fr"], "vocab": [[["blue"], ["bleu"]], [["black"], ["noir"]], [["white"], ["blanc", "*Blanche*"]]]}'
+ANIMALS = '{"categories": ["en", "fr"], "vocab": [[["blackbird"], ["merle"]], [["cat"], ["chat"]]]}'
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab/fr").mkdir(parents=True)
+    Path("vocab/fr/colors.json").write_text(COLORS, encoding="utf-8")
+    Path("vocab/fr/animals.json").write_text(ANIMALS, encoding="utf-8")
+    connection = open_search_index()
+    yield connection
+    connection.close()
+
+def forms(connection, query: str, prefix: bool = False, limit: int = 20) -> list:
+    return [(hit["form"], hit["deck"], hit["entry"], hit["category"]) for hit in search_words(connection, query, prefix, limit)]
+
+def test_first_refresh_indexes_every_deck_without_compiling_them(index):
+    assert refresh_search_index(index) == {"indexed": 2, "unchanged": 0, "removed": 0}
+
+    assert forms(index, "bleu") == [("bleu", "fr/colors", 0, "fr")]
+    assert not DECK_CACHE_DIR.exists()
+
+def test_existing_deck_cache_is_read(index):
+    open_vocab_stream(Path("vocab/fr/colors.json"))
+    cache = next(DECK_CACHE_DIR.rglob("*.deck"))
+    before = cache.read_bytes()
+
+    refresh_search_index(index)
+
+    assert forms(index, "noir") == [("noir", "fr/colors", 1, "fr")]
+    assert cache.read_bytes() == before
+    assert [path.name for path in DECK_CACHE_DIR.rglob("*.deck")] == ["colors.deck"]
+
+def test_unchanged_decks_are_not_indexed_again(index):
+    refresh_search_index(index)
+
+    assert refresh_search_index(index) == {"indexed": 0, "unchanged": 2, "removed": 0}
+
+def test_touched_deck_with_same_content_only_updates_its_file_state(index):
+    refresh_search_index(index)
+    file_stat = stat("vocab/fr/colors.json")
+    utime("vocab/fr/colors.json", ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10**9))
+
+    assert refresh_search_index(index) == {"indexed": 0, "unchanged": 2, "removed": 0}
+    assert index.execute("SELECT mtime_ns FROM decks WHERE deck = 'fr/colors'").fetchone()[0] == file_stat.st_mtime_ns + 10**9
+    assert forms(index, "bleu") == [("bleu", "fr/colors", 0, "fr")]
+
+def test_changed_deck_is_indexed_again(index):
+    refresh_search_index(index)
+    Path("vocab/fr/colors.json").write_text(COLORS.replace("bleu", "azur"), encoding="utf-8")
+
+    assert refresh_search_index(index) == {"indexed": 1, "unchanged": 1, "removed": 0}
+    assert forms(index, "bleu") == []
+    assert forms(index, "azur") == [("azur", "fr/colors", 0, "fr")]
+    assert index.execute("SELECT COUNT(*) FROM decks").fetchone()[0] == 2
+
+def test_removed_deck_is_dropped(index):
+    refresh_search_index(index)
+    Path("vocab/fr/animals.json").unlink()
+
+    assert refresh_search_index(index) == {"indexed": 0, "unchanged": 1, "removed": 1}
+    assert forms(index, "chat") == []
+    assert index.execute("SELECT COUNT(*) FROM words w LEFT JOIN decks d ON d.id = w.deck_id WHERE d.id IS NULL").fetchone()[0] == 0
+
+def test_unreadable_deck_is_recorded_without_words(index):
+    Path("vocab/fr/broken.json").write_text('{"categories": ["en"], "vocab": [[["a"], ["b"]]]}', encoding="utf-8")
+
+    assert refresh_search_index(index)["indexed"] == 3
+    assert index.execute("SELECT categories FROM decks WHERE deck = 'fr/broken'").fetchone()[0] == "[]"
+    assert refresh_search_index(index)["unchanged"] == 3
+
+def test_prefix_query_matches_words_in_order(index):
+    refresh_search_index(index)
+
+    assert forms(index, "bl", prefix=True) == [
+        ("black", "fr/colors", 1, "en"),
+        ("blackbird", "fr/animals", 0, "en"),
+        ("blanc", "fr/colors", 2, "fr"),
+        ("blanche", "fr/colors", 2, "fr"),
+        ("bleu", "fr/colors", 0, "fr"),
+        ("blue", "fr/colors", 0, "en")
+    ]
+    assert forms(index, "black", prefix=True, limit=1) == [("black", "fr/colors", 1, "en")]
+    assert forms(index, "bl") == []
+
+def test_queries_are_normalized_like_answers(index):
+    refresh_search_index(index)
+
+    assert forms(index, "  BLANCHE* ") == [("blanche", "fr/colors", 2, "fr")]
+    assert search_words(index, " * ") == []
+
+def test_hits_get_the_words_of_their_entry(index):
+    refresh_search_index(index)
+    hits = search_words(index, "blanc")
+
+    add_entry_words(hits)
+
+    assert hits[0]["words"] == {"en": ["white"], "fr": ["blanc", "Blanche"]}
+    assert not DECK_CACHE_DIR.exists()
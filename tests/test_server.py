@@ -0,0 +1,149 @@
+""" Tests for the quiz server's HTTP request parsing, connections and learner sessions. """
+
+from asyncio import CancelledError, create_task, gather, run, sleep, StreamReader
+from json import loads
+from pathlib import Path
+
+import pytest
+
+from core.server import MAX_BODY_SIZE, QuizServer, read_request, RequestError, respond, serve_connection
+
+
+class RecordingWriter:
+    """ Stands in for a StreamWriter, keeping what is written. """
+
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+async def read_from(data: bytes):
+    """ Reads one request from a stream holding data. """
+
+    return await read_request(make_reader(data))
+
+def make_reader(data: bytes) -> StreamReader:
+    reader = StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+def make_request(content_length: str, body: bytes = b"") -> bytes:
+    return f"POST /sessions HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n".encode("latin-1") + body
+
+def test_reads_json_body():
+    body = b'{"learner": "ana"}'
+
+    assert run(read_from(make_request(str(len(body)), body))) == ("POST", "/sessions", {"content-length": "18"}, {"learner": "ana"})
+
+def test_request_without_body_has_empty_body():
+    assert run(read_from(b"GET /decks?x=1 HTTP/1.1\r\n\r\n")) == ("GET", "/decks", {}, {})
+
+@pytest.mark.parametrize("content_length", ["abc", "-5", "1e3", "+3", "0x10"])
+def test_invalid_content_length_is_a_bad_request(content_length):
+    with pytest.raises(RequestError) as error:
+        run(read_from(make_request(content_length)))
+
+    assert error.value.status == 400
+
+def test_oversized_content_length_is_rejected():
+    with pytest.raises(RequestError) as error:
+        run(read_from(make_request(str(MAX_BODY_SIZE + 1))))
+
+    assert error.value.status == 413
+
+def test_connection_answers_invalid_content_length_with_400():
+    writer = RecordingWriter()
+
+    async def serve() -> None:
+        await serve_connection(None, make_reader(make_request("abc")), writer)
+
+    run(serve())
+
+    head, _, body = writer.data.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 400 ")
+    assert "Content-Length" in loads(body)["error"]
+    assert writer.closed
+
+@pytest.fixture
+def quiz_server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab/fr").mkdir(parents=True)
+    Path("vocab/fr/colors.json").write_text('{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]]]}', encoding="utf-8")
+    Path("vocab/fr/animals.json").write_text('{"categories": ["en", "fr"], "vocab": [[["cat"], ["chat"]]]}', encoding="utf-8")
+    server = QuizServer()
+    yield server
+    server.close()
+
+def start(server: QuizServer, learner: str, *decks: str):
+    return respond(server, "POST", "/sessions", {"learner": learner, "decks": list(decks), "mode": "en"})
+
+def test_second_session_of_a_learner_on_the_same_deck_is_rejected(quiz_server):
+    async def scenario():
+        first = await start(quiz_server, "ana", "fr/colors")
+        second = await start(quiz_server, "ana", "fr/animals", "fr/./colors")
+        return first, second
+
+    (status, _), (conflict, error) = run(scenario())
+
+    assert status == 201
+    assert conflict == 409 and "fr/colors" in error["error"]
+    assert len(quiz_server.sessions) == 1
+
+def test_concurrent_sessions_of_a_learner_on_the_same_deck(quiz_server):
+    async def scenario():
+        return await gather(start(quiz_server, "ana", "fr/colors"), start(quiz_server, "ana", "fr/colors"))
+
+    statuses = sorted(status for status, _ in run(scenario()))
+
+    assert statuses == [201, 409]
+
+def test_other_learners_and_decks_are_independent(quiz_server):
+    async def scenario():
+        return [await start(quiz_server, learner, deck) for learner, deck in [("ana", "fr/colors"), ("ben", "fr/colors"), ("ana", "fr/animals")]]
+
+    assert [status for status, _ in run(scenario())] == [201, 201, 201]
+
+def test_closed_or_finished_session_frees_its_decks(quiz_server):
+    async def scenario():
+        _, state = await start(quiz_server, "ana", "fr/colors")
+        await respond(quiz_server, "DELETE", f"/sessions/{state['session']}", {})
+        status, state = await start(quiz_server, "ana", "fr/colors")
+        assert status == 201
+        await respond(quiz_server, "POST", f"/sessions/{state['session']}/answer", {"answers": ["rouge"]})
+        return await start(quiz_server, "ana", "fr/colors"), state["session"]
+
+    (status, _), finished = run(scenario())
+
+    assert status == 201
+    assert finished not in quiz_server.sessions
+
+def test_failed_session_frees_its_decks(quiz_server):
+    async def scenario():
+        failed = await respond(quiz_server, "POST", "/sessions", {"learner": "ana", "decks": ["fr/colors"], "mode": "de"})
+        return failed, await start(quiz_server, "ana", "fr/colors")
+
+    (failed, _), (status, _) = run(scenario())
+
+    assert failed == 400 and status == 201
+
+def test_cancelled_connection_is_closed_and_cancellation_propagates():
+    writer = RecordingWriter()
+
+    async def scenario():
+        task = create_task(serve_connection(None, StreamReader(), writer))
+        await sleep(0)
+        task.cancel()
+        await task
+
+    with pytest.raises(CancelledError):
+        run(scenario())
+    assert writer.closed
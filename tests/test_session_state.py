@@ -0,0 +1,116 @@
+""" Tests for the session columns and the pairs viewing them. """
+
+from random import Random
+
+import pytest
+
+from core.session_state import ColumnarPair, NO_DIRECTION, NO_ENTRY, SessionPairs
+from core.utils import AnswerGroups, TranslationPair, Word, WordGroup
+
+
+def make_pair(entry_index, direction=0, attempts=0, correct=False) -> TranslationPair:
+    prompt = WordGroup((Word(f"word{entry_index}"),), "en")
+    answers = AnswerGroups((WordGroup((Word(f"mot{entry_index}"),), "fr"),))
+    return TranslationPair(prompt, answers, attempts, correct, entry_index, direction, "deck")
+
+def check_columns(pairs: SessionPairs) -> None:
+    """ Checks that every view reads its own row and that the columns hold one row per pair. """
+
+    columns = pairs.columns
+    assert len(columns.entries) == len(columns.directions) == len(columns.attempts) == len(columns.correct) == len(pairs)
+    for row, pair in enumerate(pairs):
+        assert isinstance(pair, ColumnarPair)
+        assert pair.columns is columns and pair.row == row
+        assert columns.entries[row] == pair.entry_index
+        assert columns.directions[row] == pair.direction
+        assert columns.attempts[row] == pair.attempts
+        assert columns.correct[row] == pair.correct
+
+def state(pair: TranslationPair) -> tuple:
+    return pair.prompt.words[0].text, pair.entry_index, pair.direction, pair.attempts, pair.correct
+
+def test_views_write_through_to_the_columns():
+    pairs = SessionPairs([make_pair(i) for i in range(3)])
+
+    pairs[1].attempts += 2
+    pairs[1].correct = True
+    pairs[2].direction = 1
+
+    check_columns(pairs)
+    assert list(pairs.columns.attempts) == [0, 2, 0]
+    assert pairs.count_correct() == 1 and pairs.get_incorrect_pairs() == [pairs[0], pairs[2]]
+
+def test_removing_and_adding_in_the_same_call():
+    pairs = SessionPairs([make_pair(i, attempts=i) for i in range(5)])
+    removed = [pairs[1], pairs[3]]
+    kept = [state(pair) for pair in pairs if pair not in removed]
+
+    views = pairs.replace_pairs(removed, [make_pair(10, 1, 7, True)])
+
+    check_columns(pairs)
+    assert len(pairs) == 4
+    assert [state(view) for view in views] == [("word10", 10, 1, 7, True)]
+    assert sorted(state(pair) for pair in pairs) == sorted(kept + [state(views[0])])
+
+def test_removed_pairs_keep_their_state_and_leave_the_columns():
+    pairs = SessionPairs([make_pair(i, attempts=i) for i in range(4)])
+    removed = pairs[0]
+
+    pairs.replace_pairs([removed], [])
+    removed.attempts = 99
+
+    check_columns(pairs)
+    assert state(removed) == ("word0", 0, 0, 99, False)
+    assert 99 not in pairs.columns.attempts
+
+def test_removing_the_last_row():
+    pairs = SessionPairs([make_pair(i) for i in range(3)])
+
+    pairs.replace_pairs([pairs[2]], [])
+    check_columns(pairs)
+    assert [pair.entry_index for pair in pairs] == [0, 1]
+
+    pairs.replace_pairs(list(pairs), [])
+    check_columns(pairs)
+    assert len(pairs) == 0 and pairs.get_statistics()["pairs"] == 0
+
+def test_adding_more_pairs_than_removed():
+    pairs = SessionPairs([make_pair(i) for i in range(2)])
+
+    views = pairs.replace_pairs([pairs[0]], [make_pair(5), make_pair(6)])
+
+    check_columns(pairs)
+    assert sorted(pair.entry_index for pair in pairs) == [1, 5, 6]
+    assert [view.entry_index for view in views] == [5, 6]
+
+def test_pairs_without_entry_index_or_direction():
+    pairs = SessionPairs([make_pair(None, None), make_pair(1)])
+
+    assert pairs[0].entry_index is None and pairs[0].direction is None
+    assert pairs.columns.entries[0] == NO_ENTRY and pairs.columns.directions[0] == NO_DIRECTION
+
+    views = pairs.replace_pairs([pairs[1]], [make_pair(None, None, 3)])
+    assert views[0].entry_index is None and views[0].attempts == 3
+    views[0].entry_index = 4
+    assert views[0].entry_index == 4
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_replacements_keep_the_columns_in_sync(seed):
+    rng = Random(seed)
+    pairs = SessionPairs([make_pair(i, attempts=i) for i in range(rng.randrange(10))])
+    expected = {state(pair) for pair in pairs}
+    next_entry = 100
+
+    for _ in range(10):
+        removed = rng.sample(list(pairs), rng.randrange(len(pairs) + 1))
+        added = []
+        for _ in range(rng.randrange(4)):
+            added.append(make_pair(next_entry, rng.randrange(2), rng.randrange(5), rng.random() < 0.5))
+            next_entry += 1
+        expected -= {state(pair) for pair in removed}
+        expected |= {state(pair) for pair in added}
+
+        pairs.replace_pairs(removed, added)
+
+        check_columns(pairs)
+        assert {state(pair) for pair in pairs} == expected
@@ -0,0 +1,119 @@
+""" Tests for studying decks through a bounded window of pairs. """
+
+from pathlib import Path
+
+import pytest
+
+from core.loader import open_vocab_stream
+from core.progress_format import build_snapshot, NOT_IN_SESSION
+from core.study_window import StudyWindow, WindowDeck
+
+
+WORDS = [("red", "rouge"), ("blue", "bleu"), ("green", "vert"), ("black", "noir"), ("white", "blanc")]
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab").mkdir()
+
+def write_deck(name: str, words) -> Path:
+    vocab = ", ".join(f'[["{en}"], ["{fr}"]]' for en, fr in words)
+    file_path = Path("vocab") / f"{name}.json"
+    file_path.write_text(f'{{"categories": ["en", "fr"], "vocab": [{vocab}]}}', encoding="utf-8")
+    return file_path
+
+def open_deck(file_path: Path, mode: str = "en") -> WindowDeck:
+    vocab_data = open_vocab_stream(file_path)
+    snapshot = build_snapshot([], len(list(open_vocab_stream(file_path).entries)), "hash")
+    snapshot.window = {"next": 0, "mode": mode}
+    return WindowDeck(file_path, vocab_data, snapshot)
+
+def master(window: StudyWindow, count: int = None) -> list:
+    pairs = list(window)[:count]
+    for pair in pairs:
+        pair.attempts += 1
+        pair.correct = True
+    return pairs
+
+def test_window_pulls_up_to_its_size(workspace):
+    deck = open_deck(write_deck("colors", WORDS))
+
+    window = StudyWindow([deck], 2)
+
+    assert [pair.entry_index for pair in window] == [0, 1]
+    assert [pair.prompt.categorie for pair in window] == ["en", "en"]
+    assert deck.snapshot.window["next"] == 2
+    assert list(deck.snapshot.directions) == [0, 0, NOT_IN_SESSION, NOT_IN_SESSION, NOT_IN_SESSION]
+
+def test_advance_retires_mastered_pairs_and_refills(workspace):
+    deck = open_deck(write_deck("colors", WORDS))
+    window = StudyWindow([deck], 3)
+    mastered = master(window, 2)
+
+    added, retired = window.advance()
+
+    assert retired == mastered
+    assert sorted(pair.entry_index for pair in added) == [3, 4]
+    assert sorted(pair.entry_index for pair in window) == [2, 3, 4]
+    assert list(deck.snapshot.correct) == [1, 1, 0, 0, 0]
+    assert list(deck.snapshot.attempts)[:2] == [1, 1]
+
+def test_deck_pairs_follow_the_window(workspace):
+    deck = open_deck(write_deck("colors", WORDS))
+    window = StudyWindow([deck], 3)
+
+    for _ in range(3):
+        master(window, 1)
+        window.advance()
+        assert sorted(deck.pairs, key=id) == sorted(window, key=id)
+        assert all(deck.pairs[position] is pair for pair, position in deck.positions.items())
+        assert len(deck.positions) == len(deck.pairs)
+
+def test_retire_moves_the_last_pair_into_the_freed_place(workspace):
+    deck = open_deck(write_deck("colors", WORDS))
+    window = StudyWindow([deck], 3)
+    first, second, last = deck.pairs
+
+    deck.retire(first)
+
+    assert deck.pairs == [last, second]
+    assert deck.positions == {last: 0, second: 1}
+    assert deck.snapshot.directions[first.entry_index] == first.direction
+
+def test_window_is_exhausted_once_every_entry_is_mastered(workspace):
+    deck = open_deck(write_deck("colors", WORDS))
+    window = StudyWindow([deck], 2)
+
+    while len(window):
+        master(window)
+        window.advance()
+
+    assert deck.pairs == [] and deck.positions == {}
+    assert list(deck.snapshot.correct) == [1] * len(WORDS)
+    assert deck.snapshot.window["next"] == len(WORDS)
+    assert window.get_statistics() == {"pairs": 5, "answers": 5, "correct": 5, "first_try": 5}
+    assert window.advance() == ([], [])
+
+def test_window_fills_deck_after_deck_and_skips_duplicates(workspace):
+    first = open_deck(write_deck("first", WORDS[:2]))
+    second = open_deck(write_deck("second", WORDS[1:4]))
+
+    window = StudyWindow([first, second], 4)
+
+    assert [(pair.source.stem, pair.entry_index) for pair in window] == [("first", 0), ("first", 1), ("second", 1), ("second", 2)]
+    assert len(first.pairs) == 2 and len(second.pairs) == 2
+
+def test_resumed_window_pulls_its_active_entries_first(workspace):
+    deck = open_deck(write_deck("colors", WORDS))
+    window = StudyWindow([deck], 2)
+    master(window, 1)
+    window.advance()
+    next(pair for pair in window if pair.entry_index == 1).attempts = 4
+    for pair in window:
+        deck.snapshot.attempts[pair.entry_index] = pair.attempts
+
+    resumed_deck = WindowDeck(deck.file_path, open_vocab_stream(deck.file_path), deck.snapshot)
+    resumed = StudyWindow([resumed_deck], 3)
+
+    assert [pair.entry_index for pair in resumed] == [1, 2, 3]
+    assert resumed[0].attempts == 4
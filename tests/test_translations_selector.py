@@ -0,0 +1,53 @@
+""" Tests for merging the pairs of several decks into one session. """
+
+from pathlib import Path
+
+import pytest
+
+from core.catalog import forget_catalog
+from core.console import reset_console, set_input_source, set_output_sink
+from core.journal import ProgressJournal
+from core.loader import open_vocab_stream
+from core.translations_selector import generate_translation_pairs, get_entry_digest, select_translations
+
+
+FIRST = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue"], ["bleu"]]]}'
+SECOND = '{"categories": ["en", "fr"], "vocab": [[["green"], ["vert"]], [["*Blue*"], ["bleu"]]]}'
+
+@pytest.fixture
+def decks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab").mkdir()
+    Path("vocab/first.json").write_text(FIRST, encoding="utf-8")
+    Path("vocab/second.json").write_text(SECOND, encoding="utf-8")
+    set_input_source(lambda prompt, expected=None: "en")
+    set_output_sink(lambda text: None)
+    forget_catalog()
+    yield Path("vocab/first.json"), Path("vocab/second.json")
+    reset_console()
+    forget_catalog()
+
+def describe(pairs) -> list:
+    return sorted((pair.source.stem, pair.entry_index) for pair in pairs)
+
+def test_entry_in_two_decks_gives_one_pair_from_the_first_deck(decks):
+    pairs = select_translations(False, list(decks))
+
+    assert describe(pairs) == [("first", 0), ("first", 1), ("second", 0)]
+    assert len({get_entry_digest(pair) for pair in pairs}) == 3
+
+def test_deck_order_decides_the_source_of_a_shared_entry(decks):
+    pairs = select_translations(False, list(reversed(decks)))
+
+    assert describe(pairs) == [("first", 0), ("second", 0), ("second", 1)]
+
+def test_saved_pairs_keep_a_shared_entry_before_new_decks(decks):
+    first, second = decks
+    saved = list(generate_translation_pairs(open_vocab_stream(second), "en"))
+    saved[1].attempts = 2
+    ProgressJournal(saved, second).compact()
+
+    pairs = select_translations(True, [first, second])
+
+    assert describe(pairs) == [("first", 0), ("second", 0), ("second", 1)]
+    assert next(pair for pair in pairs if pair.entry_index == 1).attempts == 2
@@ -0,0 +1,104 @@
+""" Tests for validating the vocab tree and reporting its problems. """
+
+from json import loads
+from pathlib import Path
+
+import pytest
+
+from core import validator
+from core.validator import display_report, main, MAX_PROBLEMS_PER_FILE, validate_vocab_file, validate_vocab_tree
+
+
+VALID = '{"categories": ["en", "fr"], "vocab": [[["red"], ["rouge"]], [["blue"], ["bleu"]]]}'
+INVALID = '{"categories": ["en", "fr"], "vocab": [[["red"], ["*rouge"]], [["red"]], [["Red"], ["rouge"]], [["x"], []]]}'
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("vocab/fr").mkdir(parents=True)
+    Path("vocab/fr/valid.json").write_text(VALID, encoding="utf-8")
+    Path("vocab/fr/invalid.json").write_text(INVALID, encoding="utf-8")
+    Path("vocab/broken.json").write_text("{", encoding="utf-8")
+    return validator.find_vocab_files(Path("vocab"))
+
+def test_problems_of_a_file_name_entries_and_groups(tree):
+    assert validate_vocab_file("vocab/fr/invalid.json") == [
+        "entry 0, group 1: unbalanced '*' in '*rouge'",
+        "entry 1 has 1 groups but there are 2 categories",
+        "entry 2 duplicates entry 0",
+        "entry 3, group 1 must be a non-empty list of words"
+    ]
+    assert validate_vocab_file("vocab/fr/valid.json") == []
+
+@pytest.mark.parametrize("content, problem", [
+    ("[]", "top level must be an object"),
+    ('{"vocab": []}', "must contain 'categories' and 'vocab' keys"),
+    ('{"categories": ["en"], "vocab": []}', "'categories' must be a list of at least two languages"),
+    ('{"categories": ["en", "en"], "vocab": []}', "'categories' contains the same language twice"),
+    ('{"categories": ["en", "fr"], "vocab": {}}', "'vocab' must be a list of entries")
+])
+def test_schema_problems(tmp_path, content, problem):
+    file_path = tmp_path / "deck.json"
+    file_path.write_text(content, encoding="utf-8")
+
+    assert validate_vocab_file(str(file_path)) == [problem]
+
+def test_duplicates_are_reported_after_normalization(tmp_path):
+    file_path = tmp_path / "deck.json"
+    file_path.write_text('{"categories": ["en", "fr"], "vocab": [[["a", "B"], ["c"]], [["b", "*a*"], ["C"]]]}', encoding="utf-8")
+
+    assert validate_vocab_file(str(file_path)) == ["entry 1 duplicates entry 0"]
+
+def test_unreadable_and_invalid_json_files(tmp_path):
+    assert validate_vocab_file(str(tmp_path / "missing.json"))[0].startswith("cannot be read: ")
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    assert validate_vocab_file(str(tmp_path / "broken.json"))[0].startswith("is not valid JSON: ")
+
+def test_problems_are_capped_per_file(tmp_path):
+    file_path = tmp_path / "deck.json"
+    entries = ", ".join(f'[["word{i}"]]' for i in range(MAX_PROBLEMS_PER_FILE + 5))
+    file_path.write_text(f'{{"categories": ["en", "fr"], "vocab": [{entries}]}}', encoding="utf-8")
+
+    problems = validate_vocab_file(str(file_path))
+
+    assert len(problems) == MAX_PROBLEMS_PER_FILE + 1
+    assert problems[-1] == "... and 5 more problems"
+
+def test_single_job_validates_in_this_process(tree, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("no process pool expected")
+
+    monkeypatch.setattr(validator, "ProcessPoolExecutor", no_pool)
+
+    report = validate_vocab_tree(tree, 1)
+
+    assert list(report) == ["vocab/broken.json", "vocab/fr/invalid.json"]
+    assert validate_vocab_tree(tree[:1], 8) == {"vocab/broken.json": report["vocab/broken.json"]}
+
+def test_process_pool_gives_the_same_report(tree):
+    assert validate_vocab_tree(tree, 2) == validate_vocab_tree(tree, 1)
+
+def test_report_lists_each_invalid_file_and_a_summary(capsys):
+    display_report({"vocab/a.json": ["first", "second"]}, 3)
+
+    assert capsys.readouterr().out == "❌ vocab/a.json\n   - first\n   - second\n\n1 of 3 file(s) have problems.\n"
+
+    display_report({}, 3)
+    assert capsys.readouterr().out == "✅ All 3 file(s) are valid.\n"
+
+def test_main_prints_json_and_exits_with_status_1(tree, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["validator", "--jobs", "1", "--json"])
+
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+
+    assert exit_info.value.code == 1
+    report = loads(capsys.readouterr().out)
+    assert report["files"] == 3 and sorted(report["invalid"]) == ["vocab/broken.json", "vocab/fr/invalid.json"]
+
+def test_main_exits_normally_when_every_file_is_valid(tree, monkeypatch, capsys):
+    Path("vocab/fr/invalid.json").unlink()
+    monkeypatch.setattr("sys.argv", ["validator", "vocab/fr", "--jobs", "1"])
+    main()
+
+    assert capsys.readouterr().out == "✅ All 1 file(s) are valid.\n"